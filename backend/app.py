@@ -1,12 +1,23 @@
-from flask import Flask, jsonify, request,send_file
+from flask import Flask, jsonify, request,send_file, Response, stream_with_context
 import os
 from data_loader import Dataloader
 from data_cleaner import DataCleaner
 from kpi_calculator import KPICalculator
+from portfolio_calculator import PortfolioKPICalculator
+from time_index import TimeRangeIndex
+from kpi_cube import KPICube, CubeKPICalculator
+from bitmap_index import FilterIndex
+from kpi_kernels import NumpyKPICalculator
+from scenario_engine import ScenarioEngine
+from kpi_cache import KPICache
+from feature_store import FeatureStore, canonical_recipe
+from kpi_executor import ParallelKPIExecutor
+from kpi_aggregates import AggregateKPICalculator
+from kpi_preview import KPIPreview
 from llm_agent import LLMAgent
 import json
 import numpy as np 
-from database import BusinessDatabase
+from database import BusinessDatabase, SQLiteBusinessDatabase
 from entry_questions import BusinessQuestions
 from flask_cors import CORS
 from reportlab.lib.pagesizes import A4
@@ -17,8 +28,10 @@ from reportlab.lib import colors
 from datetime import datetime
 from flask import send_file
 # HIMANSHU'S ML MODULES (NEW IMPORTS)
-from feature_engineer import FeatureEngineer
-from ml_predictor import MLPredictor
+from feature_engineer import FeatureEngineer, RESAMPLE_FREQUENCIES, RESAMPLE_FILLS
+from ml_predictor import MLPredictor, CANDIDATE_MODELS
+from feature_pruner import FeaturePruner
+from model_registry import ModelRegistry
 from visualizations import ChartGenerator
 
 app = Flask(__name__)  # initialize the flask app
@@ -29,6 +42,35 @@ UPLOAD_FOLDER = "../data/upload"  # path
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER  # configure the upload folder
 REPORTS_FOLDER = "../reports"
 app.config["REPORTS_FOLDER"] = REPORTS_FOLDER
+# KPI engine used by /analyze ("numpy" kernels or the plain "pandas" calculator, same results)
+KPI_BACKENDS = {"pandas": KPICalculator, "numpy": NumpyKPICalculator}
+app.config["KPI_BACKEND"] = "numpy"
+# "parallel" reads, cleans and aggregates byte ranges of the file on every core (map-reduce)
+# files over KPI_PARALLEL_MIN_BYTES use it when the request does not name a backend
+app.config["KPI_WORKERS"] = os.cpu_count()
+app.config["KPI_PARALLEL_MIN_BYTES"] = 512 * 1024 * 1024
+# Disk cache of /analyze results (shared by all workers, survives restarts)
+app.config["KPI_CACHE_FOLDER"] = "../data/cache/kpis"
+app.config["KPI_CACHE_MAX_BYTES"] = 256 * 1024 * 1024
+kpi_cache = KPICache(app.config["KPI_CACHE_FOLDER"], app.config["KPI_CACHE_MAX_BYTES"])
+# Disk store of cleaned data + engineered features (shared by /predict and /charts)
+app.config["FEATURE_STORE_FOLDER"] = "../data/cache/features"
+app.config["FEATURE_STORE_MAX_BYTES"] = 512 * 1024 * 1024
+feature_store = FeatureStore(app.config["FEATURE_STORE_FOLDER"], app.config["FEATURE_STORE_MAX_BYTES"])
+# Trained forecasting models per business + dataset + training spec (reused by /predict and /charts)
+app.config["MODEL_REGISTRY_FOLDER"] = "../data/cache/models"
+app.config["MODEL_REGISTRY_MAX_BYTES"] = 1024 * 1024 * 1024
+model_registry = ModelRegistry(app.config["MODEL_REGISTRY_FOLDER"], app.config["MODEL_REGISTRY_MAX_BYTES"])
+# Database of the transactions / benchmark routes (None = the MySQL BusinessDatabase, or a path of an SQLite file)
+app.config["DATABASE_SQLITE_PATH"] = None
+
+def open_database():
+    """Connected database for the transactions and benchmark routes (MySQL, or SQLite when configured)"""
+    path = app.config["DATABASE_SQLITE_PATH"]
+    db = SQLiteBusinessDatabase(path) if path else BusinessDatabase()
+    if not db.connect():
+        raise ConnectionError('Could not connect to the database')
+    return db
 
 
 #Set the upload folder
@@ -131,12 +173,162 @@ def convert_numpy_types(obj):
     elif isinstance(obj, (np.floating, np.float64)):
         return float(obj)
     return obj
+
+# Per-file structures built from the cleaned data (date index, calendar cube, bitmaps), rebuilt when a file changes
+DATASET_INDEXES = {}
+MAX_DATASET_INDEXES = 16
+
+def get_dataset_index(filepath, builder):
+    """Return builder(cleaned_df) for a file, loading and cleaning it only on first use"""
+    key = (os.path.abspath(filepath), os.path.getmtime(filepath), builder.__name__)
+    if key not in DATASET_INDEXES:
+        loader = Dataloader(filepath)
+        if not loader.load_csv():
+            raise ValueError('Failed to load data')
+        cleaned_df = DataCleaner(loader.get_dataframe()).clean_all()
+        if len(DATASET_INDEXES) >= MAX_DATASET_INDEXES:
+            DATASET_INDEXES.pop(next(iter(DATASET_INDEXES)))
+        DATASET_INDEXES[key] = builder(cleaned_df)
+    return DATASET_INDEXES[key]
+
+def get_time_index(filepath):
+    """Return the date-sorted prefix-sum TimeRangeIndex of a file"""
+    return get_dataset_index(filepath, TimeRangeIndex)
+
+def get_kpi_cube(filepath):
+    """Return the year x quarter x month x product KPICube of a file"""
+    return get_dataset_index(filepath, KPICube)
+
+def get_filter_index(filepath):
+    """Return the bitmap FilterIndex (Product_Name and the other categorical columns) of a file"""
+    return get_dataset_index(filepath, FilterIndex)
+
+# Feature recipes of the ML routes (see FeatureEngineer.apply_spec)
+CLEANED_DATA = {'time_features': False, 'features': [], 'drop_missing': False}
+# Only lags of the target: its rolling / growth features include the current period and are
+# always pruned as leakage (see feature_pruner.LEAKAGE_COLUMNS)
+PREDICT_FEATURES = {'time_features': True,
+                    'features': {'columns': ['Revenue'], 'lags': [1, 2, 3]},
+                    'drop_missing': True}
+# The ML routes resample the transactions to this regular frequency first (None = raw rows in file order)
+app.config["ML_FREQUENCY"] = "W"
+
+def with_resample(recipe, freq, fill='zero'):
+    """Recipe on the transactions resampled to freq (unchanged when freq is None)"""
+    return {**recipe, 'resample': {'freq': freq, 'fill': fill}} if freq else recipe
+
+def resample_options(data):
+    """(freq, fill) of an ML request, or raise ValueError"""
+    freq = data.get("freq", app.config["ML_FREQUENCY"])
+    fill = data.get("fill", "zero")
+    if freq is not None and freq not in RESAMPLE_FREQUENCIES:
+        raise ValueError(f"freq must be one of {list(RESAMPLE_FREQUENCIES)} or null")
+    if fill not in RESAMPLE_FILLS:
+        raise ValueError(f"fill must be one of {list(RESAMPLE_FILLS)}")
+    return freq, fill
+
+def get_features(filepath, recipe):
+    """Return the feature frame of a file + recipe from the feature store, building (and storing) it on a miss"""
+    key = feature_store.make_key(Dataloader(filepath).file_hash(), recipe)
+    features = feature_store.get(key)
+    if features is not None:
+        print("✅ Features served from the feature store")
+        return features
+    if canonical_recipe(recipe) == canonical_recipe(CLEANED_DATA):
+        loader = Dataloader(filepath)
+        if not loader.load_csv():
+            raise ValueError('Failed to load file')
+        features = DataCleaner(loader.get_dataframe()).clean_all()
+    else:
+        features = FeatureEngineer(get_features(filepath, CLEANED_DATA)).apply_spec(recipe).get_features_dataframe()
+    feature_store.put(key, features)
+    return features
+
+def get_forecaster(filepath, business_id, freq, fill, periods):
+    """
+    Return (predictor, meta, series_df, cached) of a business + file + forecast settings
+
+    The model comes from the model registry when the same business already trained
+    on the same file content with the same spec, otherwise it is trained (walk-forward
+    validation) and registered. Raises ValueError when there are too few periods to train on.
+    """
+    series_df = get_features(filepath, with_resample(CLEANED_DATA, freq, fill))
+    recipe = with_resample(PREDICT_FEATURES, freq, fill)
+    spec = {'recipe': canonical_recipe(recipe), 'target': 'Revenue', 'periods': periods,
+            'candidates': list(CANDIDATE_MODELS), 'n_splits': 5}
+    dataset_hash = Dataloader(filepath).file_hash()
+    key = model_registry.make_key(business_id, dataset_hash, spec)
+    entry = model_registry.get(key)
+    if entry is not None:
+        print("✅ Model served from the model registry")
+        return entry[0], entry[1], series_df, True
+
+    # Feature Engineering (Himanshu's module, stored per dataset + recipe)
+    engineer = FeatureEngineer(get_features(filepath, recipe))
+    X, y, feature_names = engineer.prepare_ml_data(target_column='Revenue', as_array=True, dtype=np.float32)
+    # Revenue of the same period and the periods after it: one model output per forecast period
+    Y = engineer.prepare_horizon_targets(series_df, periods, target_column='Revenue')
+    known = ~np.isnan(Y).any(axis=1)
+    X, Y = np.ascontiguousarray(X[known]), Y[known]
+    if periods == 1:
+        Y = Y.ravel()     # one period: a plain single output model
+    if len(X) < 4:
+        raise ValueError(f'Only {len(X)} periods to train on, use a shorter freq or fewer periods')
+
+    # Drop leakage, constant and duplicate features before training
+    pruner = FeaturePruner().fit(X, feature_names=feature_names, target_column='Revenue')
+    X, feature_names = pruner.transform(X), pruner.kept
+
+    # Train ML Model (Himanshu's module, direct multi-horizon, chosen by walk-forward validation)
+    predictor = MLPredictor()
+    start = datetime.now()
+    metrics = predictor.train_walk_forward(X, Y, n_splits=spec['n_splits'], feature_names=feature_names)
+    meta = model_registry.put(key, predictor, {
+        'business_id': business_id,
+        'dataset_hash': dataset_hash,
+        'spec': spec,
+        'model_name': predictor.best_model_name,
+        'metrics': metrics,
+        'feature_names': feature_names,
+        'horizons': predictor.horizons,
+        'training_seconds': predictor.timings,
+        'wall_seconds': round((datetime.now() - start).total_seconds(), 3),
+        'features': pruner.report(),
+    })
+    return predictor, meta, series_df, False
+
+def kpi_parameters(data):
+    """Optional numeric KPI inputs of a request (current_cash, initial_investment), or raise ValueError"""
+    params = {}
+    for k in ("current_cash", "initial_investment"):
+        if data.get(k) is None:
+            continue
+        try:
+            params[k] = float(data[k])
+        except (TypeError, ValueError):
+            raise ValueError(f'{k} must be a number')
+    return params
+
 # defining the analyze route
 @app.route("/analyze", methods=["POST"])
 def analyze_business():
     # Get the file name from the request
     data = request.get_json()
     filename = data.get("filename")
+    # optional date range (inclusive, e.g. "2020-01-01"), answered from the prefix-sum index
+    start_date = data.get("start_date")
+    end_date = data.get("end_date")
+    # optional list of KPI names, only these (and what they depend on) are computed
+    fields = data.get("fields")
+    # optional categorical filters, e.g. {"Product_Name": ["product1", "product2"]}, answered from bitmap indexes
+    filters = data.get("filters")
+    exclude = data.get("exclude")
+    backend = data.get("backend")
+    # optional KPI inputs (runway uses current_cash, ROI uses initial_investment)
+    try:
+        kpi_params = kpi_parameters(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     # check the file name is provided or not
     if not filename:
         return jsonify({
@@ -149,34 +341,94 @@ def analyze_business():
         return jsonify({
             'error': 'file not found'
         }), 404
+    if backend is None:
+        large = os.path.getsize(filepath) >= app.config["KPI_PARALLEL_MIN_BYTES"]
+        backend = "parallel" if large else app.config["KPI_BACKEND"]
+    if backend not in KPI_BACKENDS and backend != "parallel":
+        return jsonify({'error': f'Unknown backend: {backend}', 'available_backends': list(KPI_BACKENDS) + ['parallel']}), 400
+    if any(f is not None and not isinstance(f, dict) for f in (filters, exclude)):
+        return jsonify({'error': 'filters and exclude must map column names to lists of values'}), 400
+    if fields is not None and (not isinstance(fields, list) or not all(isinstance(f, str) for f in fields)):
+        return jsonify({'error': 'fields must be a list of KPI names', 'available_kpis': KPICalculator.available_kpis()}), 400
+    if fields is not None:
+        try:
+            KPICalculator.resolve_kpis(fields)
+        except ValueError as e:
+            return jsonify({'error': str(e), 'available_kpis': KPICalculator.available_kpis()}), 400
     try:
-        #Step 1 : loading the csv file given by the user 
-        print("🔹 Step 1: Loading file...")
-        loader = Dataloader(filepath)   #file is loaded
-        if not loader.load_csv() :
-            return jsonify({
-                'error' : 'Failed to load data'
-            }),500
-        
-        #Step 2 : Clean CSV file Data
-        print("🔹 Step 2: Cleaning data...")
-        df = loader.get_dataframe()
-        cleaner = DataCleaner(df)
-        cleaned_df = cleaner.clean_all()  # now the file is cleaned
-        print(f"✅ Cleaned! Rows: {len(cleaned_df)}")
+        #Step 0 : cached result of the same file content + parameters (no csv parsing at all)
+        cache_key = kpi_cache.make_key(Dataloader(filepath).file_hash(), {
+            'start_date': start_date, 'end_date': end_date, 'fields': fields,
+            'filters': filters, 'exclude': exclude, 'backend': backend, **kpi_params})
+        cached = kpi_cache.get(cache_key)
+        if cached is not None:
+            print("✅ KPIs served from cache!")
+            return jsonify({**cached, 'cached': True}), 200
+
+        if filters or exclude:
+            #Step 1-2 : AND / OR of the cached bitmaps, then only the selected rows are reduced
+            print("🔹 Step 1: Selecting rows from the bitmap index...")
+            filter_index = get_filter_index(filepath)
+            try:
+                rows = filter_index.select(filters, exclude, start_date, end_date)
+            except ValueError as e:
+                return jsonify({'error': f'Invalid filter: {e}'}), 400
+            if rows.count() == 0:
+                return jsonify({'error': 'No data matches the filters'}), 400
+            calculator = filter_index.calculator(rows)
+            print(f"✅ Rows selected: {rows.count()}")
+        elif start_date or end_date:
+            #Step 1-2 : date range query on the cached, date sorted index
+            print(f"🔹 Step 1: Locating date range {start_date} → {end_date}...")
+            try:
+                calculator = get_time_index(filepath).calculator(start_date, end_date)
+            except ValueError as e:
+                return jsonify({'error': f'Invalid date range: {e}'}), 400
+            if calculator.row_count() == 0:
+                return jsonify({'error': 'No data in the selected date range'}), 400
+            print(f"✅ Range located! Rows: {calculator.row_count()}")
+        elif backend == "parallel":
+            #Step 1-2 : load, clean and aggregate byte ranges of the file on every core
+            print(f"🔹 Step 1-2: Aggregating the file on {app.config['KPI_WORKERS']} workers...")
+            executor = ParallelKPIExecutor(workers=app.config["KPI_WORKERS"])
+            calculator = AggregateKPICalculator(executor.aggregate_file(filepath))
+            print(f"✅ Aggregated! Rows: {calculator.aggregates.rows}")
+        else:
+            #Step 1 : loading the csv file given by the user 
+            print("🔹 Step 1: Loading file...")
+            loader = Dataloader(filepath)   #file is loaded
+            if not loader.load_csv() :
+                return jsonify({
+                    'error' : 'Failed to load data'
+                }),500
+            
+            #Step 2 : Clean CSV file Data
+            print("🔹 Step 2: Cleaning data...")
+            df = loader.get_dataframe()
+            cleaner = DataCleaner(df)
+            cleaned_df = cleaner.clean_all()  # now the file is cleaned
+            print(f"✅ Cleaned! Rows: {len(cleaned_df)}")
+            calculator = KPI_BACKENDS[backend](cleaned_df)
 
         # Step 3: Performing the KPI calculations on the data
         print("🔹 Step 3: Calculating KPIs...")
-        calculator = KPICalculator(cleaned_df)
-        kpis = calculator.get_all_kpis()
+        kpis = calculator.get_kpis(fields, **kpi_params)
         kpis = convert_numpy_types(kpis) 
-        print("✅ KPIs calculated!")
+        print(f"✅ KPIs calculated! ({len(kpis)} KPIs)")
 
         # Step 4: Return the results after the analyze
-        return jsonify({
+        response = {
         'message': 'Analysis Complete!',
         'kpis': kpis
-        }), 200
+        }
+        if filters or exclude:
+            response['filters'] = {'include': filters, 'exclude': exclude,
+                                   'start_date': start_date, 'end_date': end_date, 'rows': rows.count()}
+        elif start_date or end_date:
+            response['date_range'] = {'start_date': start_date, 'end_date': end_date,
+                                      'rows': calculator.row_count()}
+        kpi_cache.put(cache_key, response)
+        return jsonify({**response, 'cached': False}), 200
     except Exception as e:
         print(f"❌ ERROR: {str(e)}")  
         import traceback
@@ -185,12 +437,350 @@ def analyze_business():
             'error': str(e)
         }), 500
 
+# defining the preview route (approximate KPIs with confidence intervals for huge files)
+@app.route("/analyze/preview", methods=["POST"])
+def preview_analysis():
+    """
+    Request JSON:
+    {
+        "filename": "uploaded_file.csv",
+        "sample_size": 2000,
+        "stream": false
+    }
+
+    stream=false returns the sample estimate only (fast). stream=true returns
+    newline separated JSON objects: the sample estimate, then one refined
+    estimate per scanned block, the last one with "exact": true (or an
+    {"error": ...} record when the scan fails part way).
+    """
+    data = request.get_json()
+    filename = data.get("filename")
+    if not filename:
+        return jsonify({'error': 'Filename is required'}), 400
+    filepath = os.path.join(app.config["UPLOAD_FOLDER"], filename)
+    if not os.path.exists(filepath):
+        return jsonify({'error': 'file not found'}), 404
+
+    sample_size = data.get("sample_size", 2000)
+    if not isinstance(sample_size, int) or isinstance(sample_size, bool) or sample_size < 1:
+        return jsonify({'error': 'sample_size must be a positive integer'}), 400
+
+    preview = KPIPreview(filepath, sample_size=sample_size)
+    if data.get("stream"):
+        def generate():
+            try:
+                for estimate in preview.progressive():
+                    yield json.dumps(convert_numpy_types(estimate)) + "\n"
+            except Exception as e:
+                # the status line is already sent, the error is the last record of the stream
+                print(f"❌ ERROR: {str(e)}")
+                yield json.dumps({'error': str(e)}) + "\n"
+        return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+    try:
+        print("🔹 Estimating KPIs from a sample...")
+        estimate = convert_numpy_types(preview.estimate())
+        print("✅ Preview ready!")
+        return jsonify({'message': 'Preview ready', **estimate}), 200
+    except Exception as e:
+        print(f"❌ ERROR: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+# defining the portfolio route (one csv with many businesses, one row of KPIs per business)
+@app.route("/portfolio/analyze", methods=["POST"])
+def analyze_portfolio():
+    data = request.get_json()
+    filename = data.get("filename")
+    business_col = data.get("business_column", "Business_ID")
+    if not filename:
+        return jsonify({'error': 'Filename is required'}), 400
+    filepath = os.path.join(app.config["UPLOAD_FOLDER"], filename)
+    if not os.path.exists(filepath):
+        return jsonify({'error': 'file not found'}), 404
+    try:
+        loader = Dataloader(filepath)
+        if not loader.load_csv():
+            return jsonify({'error': 'Failed to load data'}), 500
+        cleaned_df = DataCleaner(loader.get_dataframe()).clean_all()
+        if business_col not in cleaned_df.columns:
+            return jsonify({'error': f"Column '{business_col}' not found"}), 400
+
+        print("🔹 Calculating portfolio KPIs...")
+        table = PortfolioKPICalculator(cleaned_df, business_col=business_col).get_all_kpis()
+        businesses = convert_numpy_types(table.reset_index().to_dict(orient="records"))
+        print(f"✅ Portfolio KPIs calculated for {len(businesses)} businesses")
+
+        return jsonify({
+            'message': 'Portfolio Analysis Complete!',
+            'business_column': business_col,
+            'businesses': businesses
+        }), 200
+    except Exception as e:
+        print(f"❌ ERROR: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+# Percentile ranks of a business among its industry (None when the database can not answer)
+def get_business_benchmarks(business_id, kpis=None):
+    db = open_database()
+    try:
+        if kpis is None:
+            kpis = db.get_latest_kpis(business_id)
+            if kpis is None:
+                return None
+        return db.get_benchmarks(business_id, kpis)
+    finally:
+        db.close()
+
+# defining the benchmark route (percentiles from the per industry sketches, no scan of the analyses)
+@app.route("/benchmark", methods=["POST"])
+def benchmark_business():
+    """
+    Request JSON:
+    {
+        "business_id": 1,
+        "kpis": {...}     (optional, default = latest stored analysis of the business)
+    }
+    """
+    data = request.get_json()
+    business_id = data.get("business_id")
+    if business_id is None:
+        return jsonify({'error': 'business_id is required'}), 400
+    try:
+        result = get_business_benchmarks(business_id, data.get("kpis"))
+        if result is None:
+            return jsonify({'error': 'No analysis found for this business'}), 404
+        return jsonify(convert_numpy_types({'message': 'Benchmark Complete!', 'business_id': business_id, **result})), 200
+    except Exception as e:
+        print(f"❌ ERROR: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+# defining the transactions routes (raw rows in the database, KPIs aggregated in SQL)
+@app.route("/transactions/load", methods=["POST"])
+def load_transactions():
+    """
+    Request JSON:
+    {
+        "filename": "uploaded_file.csv",
+        "business_id": 1,
+        "replace": true
+    }
+
+    The file is cleaned like /analyze does and bulk loaded into the
+    transactions table, after that /transactions/analyze needs no file.
+    """
+    data = request.get_json()
+    filename = data.get("filename")
+    business_id = data.get("business_id")
+    if not filename or business_id is None:
+        return jsonify({'error': 'filename and business_id are required'}), 400
+    filepath = os.path.join(app.config["UPLOAD_FOLDER"], filename)
+    if not os.path.exists(filepath):
+        return jsonify({'error': 'file not found'}), 404
+    try:
+        loader = Dataloader(filepath)
+        if not loader.load_csv():
+            return jsonify({'error': 'Failed to load data'}), 500
+        cleaned_df = DataCleaner(loader.get_dataframe()).clean_all()
+
+        print("🔹 Loading transactions into the database...")
+        db = open_database()
+        try:
+            if data.get("replace", True):
+                db.delete_transactions(business_id)
+            rows = db.bulk_load_transactions(business_id, cleaned_df)
+        finally:
+            db.close()
+        print(f"✅ Transactions loaded! Rows: {rows}")
+        return jsonify({'message': 'Transactions loaded', 'business_id': business_id, 'rows': rows}), 200
+    except Exception as e:
+        print(f"❌ ERROR: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+@app.route("/transactions/analyze", methods=["POST"])
+def analyze_transactions():
+    """
+    Request JSON:
+    {
+        "business_id": 1,
+        "start_date": "2020-01-01",   (optional)
+        "end_date": "2020-12-31",     (optional)
+        "fields": ["net_profit"]      (optional)
+    }
+
+    Same KPIs as /analyze; the sums, monthly and per product groupings run in
+    the database and only the aggregates reach the web node.
+    """
+    data = request.get_json()
+    business_id = data.get("business_id")
+    fields = data.get("fields")
+    try:
+        kpi_params = kpi_parameters(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    if business_id is None:
+        return jsonify({'error': 'business_id is required'}), 400
+    if fields is not None and (not isinstance(fields, list) or not all(isinstance(f, str) for f in fields)):
+        return jsonify({'error': 'fields must be a list of KPI names', 'available_kpis': KPICalculator.available_kpis()}), 400
+    if fields is not None:
+        try:
+            KPICalculator.resolve_kpis(fields)
+        except ValueError as e:
+            return jsonify({'error': str(e), 'available_kpis': KPICalculator.available_kpis()}), 400
+    try:
+        print("🔹 Aggregating transactions in the database...")
+        db = open_database()
+        try:
+            aggregates = db.get_transaction_aggregates(business_id, data.get("start_date"), data.get("end_date"))
+        finally:
+            db.close()
+        if aggregates.rows == 0:
+            return jsonify({'error': 'No transactions found for this business'}), 404
+
+        kpis = convert_numpy_types(AggregateKPICalculator(aggregates).get_kpis(fields, **kpi_params))
+        print(f"✅ KPIs calculated! ({len(kpis)} KPIs)")
+        return jsonify({
+            'message': 'Analysis Complete!',
+            'business_id': business_id,
+            'rows': aggregates.rows,
+            'kpis': kpis
+        }), 200
+    except Exception as e:
+        print(f"❌ ERROR: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+# defining the trends route (every trend / seasonality query is a roll-up of the calendar cube)
+TREND_KPIS = ['monthly_revenue', 'monthly_profit', 'growth_trajectory', 'seasonal_analysis', 'seasonal_by_year']
+
+@app.route("/trends", methods=["POST"])
+def get_trends():
+    data = request.get_json()
+    filename = data.get("filename")
+    column = data.get("column", "Revenue")
+    freq = data.get("freq", "M")
+    if not filename:
+        return jsonify({'error': 'Filename is required'}), 400
+    filepath = os.path.join(app.config["UPLOAD_FOLDER"], filename)
+    if not os.path.exists(filepath):
+        return jsonify({'error': 'file not found'}), 404
+    try:
+        cube = get_kpi_cube(filepath)
+        if column not in cube.columns:
+            return jsonify({'error': f"Column '{column}' not found"}), 400
+        try:
+            product_trend = cube.product_trend(data.get("product"), column=column, freq=freq)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        print("🔹 Rolling up the calendar cube...")
+        trends = CubeKPICalculator(cube).get_kpis(TREND_KPIS)
+        quarterly = cube.quarterly([column])[column]
+        seasonal = cube.seasonal([column])[column]
+
+        return jsonify(convert_numpy_types({
+            'message': 'Trend Analysis Complete!',
+            'column': column,
+            'kpis': trends,
+            'quarterly': {k: round(v, 2) for k, v in quarterly.items()},
+            'seasonal': {f'Q{k}': round(v, 2) for k, v in seasonal.items()},
+            'year_over_year': cube.year_over_year(column),
+            'product_trend': product_trend
+        })), 200
+    except Exception as e:
+        print(f"❌ ERROR: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
+# Largest what-if grid served in one request
+MAX_SCENARIOS = 1000000
+
+def finite_list(values):
+    """Array -> JSON list (inf / nan become null)"""
+    return [v if np.isfinite(v) else None for v in np.asarray(values, dtype=float).tolist()]
+
+# defining the what-if scenario route (runway, ROI, burn rate, margin, break-even for a grid of inputs)
+@app.route("/scenarios", methods=["POST"])
+def run_scenarios():
+    """
+    Request JSON:
+    {
+        "filename": "uploaded_file.csv",
+        "current_cash": {"start": 10000, "stop": 500000, "num": 50},
+        "initial_investment": [50000, 100000],
+        "revenue_growth": [-10, 0, 10, 20],
+        "cost_multipliers": {"Marketing_Cost": [0.5, 1, 1.5]},
+        "grid": true
+    }
+    """
+    data = request.get_json()
+    filename = data.get("filename")
+    if not filename:
+        return jsonify({'error': 'Filename is required'}), 400
+    filepath = os.path.join(app.config["UPLOAD_FOLDER"], filename)
+    if not os.path.exists(filepath):
+        return jsonify({'error': 'file not found'}), 404
+
+    parameters = {
+        'current_cash': data.get('current_cash', 50000),
+        'initial_investment': data.get('initial_investment', 100000),
+        'revenue_growth': data.get('revenue_growth', 0),
+        'cost_multipliers': data.get('cost_multipliers', {}),
+        'grid': bool(data.get('grid', True)),
+    }
+    if not isinstance(parameters['cost_multipliers'], dict):
+        return jsonify({'error': 'cost_multipliers must map cost columns to multipliers'}), 400
+    try:
+        axes = {k: v for k, v in parameters.items() if k not in ('cost_multipliers', 'grid')}
+        axes.update(parameters['cost_multipliers'])
+        count = ScenarioEngine.count_scenarios(axes, parameters['grid'], limit=MAX_SCENARIOS)
+    except (TypeError, ValueError, KeyError) as e:
+        return jsonify({'error': f'Invalid scenario parameters: {e}'}), 400
+    if count > MAX_SCENARIOS:
+        return jsonify({'error': f'Too many scenarios ({count}), the limit is {MAX_SCENARIOS}'}), 400
+
+    try:
+        loader = Dataloader(filepath)
+        if not loader.load_csv():
+            return jsonify({'error': 'Failed to load data'}), 500
+        cleaned_df = DataCleaner(loader.get_dataframe()).clean_all()
+
+        print(f"🔹 Evaluating {count} scenarios...")
+        engine = ScenarioEngine(NumpyKPICalculator(cleaned_df))
+        try:
+            output = engine.evaluate(**parameters)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        print("✅ Scenarios evaluated!")
+
+        return jsonify({
+            'message': 'Scenarios evaluated',
+            'scenario_count': count,
+            'parameters': {k: finite_list(v) for k, v in output['parameters'].items()},
+            'results': {k: finite_list(v) for k, v in output['results'].items()}
+        }), 200
+    except Exception as e:
+        print(f"❌ ERROR: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'error': str(e)}), 500
+
 # define the llm route that take the suggestion from the llm
 @app.route("/recommendations", methods=["POST"])
 def get_recommendations():
     data = request.get_json()
     kpis = data.get('kpis')
     business_profile = data.get('profile')
+    business_id = data.get('business_id') or (business_profile or {}).get('business_id')
     
     print("=" * 60)
     print("🤖 RECOMMENDATIONS REQUEST")
@@ -201,13 +791,22 @@ def get_recommendations():
     if not kpis:
         return jsonify({'error': 'Kpis Required'}), 400
     
+    # peer percentiles of the industry (optional, recommendations still work without them)
+    benchmarks = None
+    if business_id is not None:
+        try:
+            benchmarks = get_business_benchmarks(business_id, kpis)
+            print("✅ Industry benchmarks loaded")
+        except Exception as e:
+            print(f"⚠️ Benchmarks not available: {e}")
+
     try:
         print("🔹 Creating LLM Agent...")
         agent = LLMAgent()
         print("✅ Agent created")
         
         print("🔹 Calling generate_recommendations...")
-        recommendations = agent.generate_recommendations(kpis, business_profile)
+        recommendations = agent.generate_recommendations(kpis, business_profile, benchmarks)
         print("✅ Recommendations generated successfully")
         print(f"Response length: {len(recommendations)} chars")
         
@@ -238,12 +837,19 @@ def predict_sales():
     
     Request JSON:
     {
-        "filename": "uploaded_file.csv"
+        "filename": "uploaded_file.csv",
+        "freq": "W",        (optional: "D", "W", "M" or null for raw rows, default ML_FREQUENCY)
+        "fill": "zero",     (optional: "zero", "ffill", "interpolate" or null for empty periods)
+        "periods": 6,       (optional: number of periods to forecast)
+        "business_id": 1    (optional: owner of the trained model in the model registry)
     }
     
     Response:
     {
         "success": true,
+        "frequency": "W",
+        "model_id": "3f2a...",
+        "cached": false,    (true when the registered model was reused instead of retrained)
         "model_name": "Linear Regression",
         "model_accuracy": 1.0,
         "future_predictions": [70000, 72000, 75000, ...],
@@ -260,52 +866,49 @@ def predict_sales():
     
     if not os.path.exists(filepath):
         return jsonify({'error': 'File not found'}), 404
+    try:
+        freq, fill = resample_options(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    periods = data.get("periods", 6)
+    if not isinstance(periods, int) or isinstance(periods, bool) or not 1 <= periods <= 52:
+        return jsonify({'error': 'periods must be an integer between 1 and 52'}), 400
+    business_id = data.get("business_id")
     
     try:
-        # Step 1: Load and Clean Data (Using Dhruv's modules)
-        loader = Dataloader(filepath)
-        if not loader.load_csv():
-            return jsonify({'error': 'Failed to load file'}), 500
-        
-        df = loader.get_dataframe()
-        cleaner = DataCleaner(df)
-        cleaned_df = cleaner.clean_all()
-        
-        # Step 2: Feature Engineering (Himanshu's module)
-        engineer = FeatureEngineer(cleaned_df)
-        engineer.create_time_features()
-        engineer.create_lag_features(column='Revenue', lags=[1, 2, 3])
-        engineer.create_rolling_features(column='Revenue', windows=[3, 5])
-        engineer.create_growth_rate(column='Revenue')
-        engineer.drop_missing_rows()
-        
-        X, y = engineer.prepare_ml_data(target_column='Revenue')
-        
-        # Step 3: Train ML Model (Himanshu's module)
-        predictor = MLPredictor()
-        metrics = predictor.train_models(X, y, test_size=0.2)
-        predictor.save_model('models/sales_predictor.pkl')
-        
-        # Step 4: Generate Future Predictions
-        last_features = X.iloc[-1].values
-        predictions = predictor.predict_next_periods(last_features, num_periods=6)
+        # Step 1-3: Load, clean, engineer features and train (or reuse the registered model)
+        try:
+            predictor, meta, series_df, cached = get_forecaster(filepath, business_id, freq, fill, periods)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Step 4: Generate Future Predictions (features of the next period, all periods in one predict call)
+        origin = FeatureEngineer(series_df).forecast_origin(PREDICT_FEATURES, predictor.feature_names, freq)
+        predictions = predictor.predict_next_periods(origin, num_periods=periods)
         #Convert to normal Python list
         predictions = [float(p) for p in predictions]
 
         # Step 5: Calculate Insights
-        current_avg = float(cleaned_df['Revenue'].tail(6).mean())
+        current_avg = float(series_df['Revenue'].tail(6).mean())
         predicted_avg = float(sum(predictions) / len(predictions))
         growth_rate = ((predicted_avg - current_avg) / current_avg) * 100
         
         # Step 6: Return Response
-        model_key = predictor.best_model_name.lower().replace(' ', '_')
+        model_key = meta['model_name'].lower().replace(' ', '_')
         
         return jsonify({
             'success': True,
             'message': 'Predictions generated successfully',
-            'model_name': predictor.best_model_name,
-            'model_accuracy': metrics[model_key]['R2'],
+            'frequency': freq,
+            'model_id': meta['key'],
+            'cached': cached,
+            'trained_at': meta['created_at'],
+            'model_name': meta['model_name'],
+            'model_accuracy': meta['metrics'][model_key]['R2'],
+            'training_seconds': meta['training_seconds'],
+            'validation': meta['metrics'],
             'future_predictions': predictions,
+            'features': meta['features'],
             'insights': {
                 'current_avg_revenue': current_avg,
                 'predicted_avg_revenue': predicted_avg,
@@ -328,7 +931,9 @@ def generate_charts():
     Request JSON:
     {
         "filename": "uploaded_file.csv",
-        "chart_types": ["revenue_trend", "product_comparison", "expense_breakdown", "forecast"]
+        "chart_types": ["revenue_trend", "product_comparison", "expense_breakdown", "forecast"],
+        "freq": "W",        (optional: periods of the forecast chart, like /predict)
+        "business_id": 1    (optional: owner of the forecast model, like /predict)
     }
     
     Response:
@@ -344,6 +949,7 @@ def generate_charts():
     data = request.get_json()
     filename = data.get("filename")
     chart_types = data.get("chart_types", ["revenue_trend"])
+    business_id = data.get("business_id")
     
     if not filename:
         return jsonify({'error': 'Filename is required'}), 400
@@ -352,17 +958,15 @@ def generate_charts():
     
     if not os.path.exists(filepath):
         return jsonify({'error': 'File not found'}), 404
+    try:
+        freq, fill = resample_options(data)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
     
     try:
         print("📊 Generating charts...")
-        # Step 1: Load and Clean Data
-        loader = Dataloader(filepath)
-        if not loader.load_csv():
-            return jsonify({'error': 'Failed to load file'}), 500
-        
-        df = loader.get_dataframe()
-        cleaner = DataCleaner(df)
-        cleaned_df = cleaner.clean_all()
+        # Step 1: Load and Clean Data (from the feature store after the first request)
+        cleaned_df = get_features(filepath, CLEANED_DATA)
         print(f"✅ Data cleaned: {len(cleaned_df)} rows") 
 
         # Step 2: Initialize Chart Generator
@@ -400,29 +1004,16 @@ def generate_charts():
             charts['expense_breakdown'] = generator.expense_breakdown_chart(expense_data)
         
         if 'forecast' in chart_types:
-            # Get historical data
-            historical_revenue = cleaned_df['Revenue'].tail(20).tolist()
+            # Get historical data (same periods as the predictions)
+            series_df = get_features(filepath, with_resample(CLEANED_DATA, freq, fill))
+            historical_revenue = series_df['Revenue'].tail(20).tolist()
             
             # Get predictions (if available)
             try:
-                # Quick feature engineering for predictions
-                engineer = FeatureEngineer(cleaned_df)
-                engineer.create_time_features()
-                engineer.create_lag_features(column='Revenue', lags=[1, 2])
-                engineer.create_rolling_features(column='Revenue', windows=[3])
-                engineer.drop_missing_rows()
-                
-                X, y = engineer.prepare_ml_data(target_column='Revenue')
-                
-                # Load or train model
-                predictor = MLPredictor()
-                try:
-                    predictor.load_model('models/sales_predictor.pkl')
-                except:
-                    predictor.train_models(X, y, test_size=0.2)
-                
-                last_features = X.iloc[-1].values
-                predictions = predictor.predict_next_periods(last_features, num_periods=6)
+                # Model of this business + file from the registry (trained and registered on a miss)
+                predictor, meta, series_df, cached = get_forecaster(filepath, business_id, freq, fill, 6)
+                origin = FeatureEngineer(series_df).forecast_origin(PREDICT_FEATURES, predictor.feature_names, freq)
+                predictions = [float(p) for p in predictor.predict_next_periods(origin, num_periods=6)]
                 
                 charts['forecast'] = generator.forecast_chart(historical_revenue, predictions)
             except:
@@ -0,0 +1,186 @@
+#Bitmap indexes on categorical columns for filtered KPI queries
+
+import pandas as pd
+import numpy as np
+from kpi_kernels import KPIArrays, NumpyKPICalculator
+
+# Number of set bits of every byte value
+POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+class Bitmap:
+    """
+    A set of row positions out of n rows, stored in the cheaper of two containers
+
+    - positions: sorted int64 row numbers (sparse sets, 8 bytes per row in the set)
+    - bits: np.packbits of the row mask (dense sets, n / 8 bytes)
+
+    Like roaring bitmaps, the container is picked by the number of rows in
+    the set, so a rare SKU costs a few bytes and a common one n / 8 bytes.
+    AND / OR / NOT work on both containers without going through pandas.
+    """
+
+    def __init__(self, n, positions=None, bits=None):
+        self.n = n
+        self.positions = positions
+        self.bits = bits
+
+    # Bitmap of a sorted position array, in the right container
+    @classmethod
+    def from_positions(cls, n, positions):
+        positions = np.asarray(positions, dtype=np.int64)
+        if positions.size * 64 > n:
+            mask = np.zeros(n, dtype=bool)
+            mask[positions] = True
+            return cls(n, bits=np.packbits(mask))
+        return cls(n, positions=positions)
+
+    # Bitmap of a packed bit array, in the right container
+    @classmethod
+    def from_bits(cls, n, bits):
+        bitmap = cls(n, bits=bits)
+        if bitmap.count() * 64 <= n:
+            return cls(n, positions=bitmap.to_positions())
+        return bitmap
+
+    @classmethod
+    def from_mask(cls, mask):
+        return cls.from_bits(mask.size, np.packbits(mask))
+
+    # Number of rows in the set
+    def count(self):
+        if self.bits is None:
+            return int(self.positions.size)
+        return int(POPCOUNT[self.bits].sum(dtype=np.int64))
+
+    def to_bits(self):
+        if self.bits is not None:
+            return self.bits
+        mask = np.zeros(self.n, dtype=bool)
+        mask[self.positions] = True
+        return np.packbits(mask)
+
+    def to_positions(self):
+        if self.positions is not None:
+            return self.positions
+        return np.flatnonzero(np.unpackbits(self.bits, count=self.n)).astype(np.int64)
+
+    # Which of some positions are in the set
+    def _contains(self, positions):
+        bits = self.to_bits()
+        return ((bits[positions >> 3] >> (7 - (positions & 7))) & 1).astype(bool)
+
+    def __and__(self, other):
+        if self.positions is not None and other.positions is not None:
+            return Bitmap(self.n, positions=np.intersect1d(self.positions, other.positions, assume_unique=True))
+        if self.positions is not None:
+            return Bitmap(self.n, positions=self.positions[other._contains(self.positions)])
+        if other.positions is not None:
+            return Bitmap(self.n, positions=other.positions[self._contains(other.positions)])
+        return Bitmap.from_bits(self.n, np.bitwise_and(self.bits, other.bits))
+
+    def __or__(self, other):
+        if self.positions is not None and other.positions is not None:
+            return Bitmap.from_positions(self.n, np.union1d(self.positions, other.positions))
+        return Bitmap.from_bits(self.n, np.bitwise_or(self.to_bits(), other.to_bits()))
+
+    def __invert__(self):
+        bits = np.invert(self.to_bits())
+        tail = self.n % 8
+        if tail:
+            bits[-1] &= np.uint8((0xFF << (8 - tail)) & 0xFF)   # padding bits stay out of the set
+        return Bitmap.from_bits(self.n, bits)
+
+    @classmethod
+    def full(cls, n):
+        return ~cls(n, positions=np.empty(0, dtype=np.int64))
+
+
+class BitmapIndex:
+    """
+    One Bitmap per value of every categorical column (built once per dataset)
+
+    Filters are answered by OR-ing the bitmaps of the wanted values of a
+    column, AND-ing across columns and AND NOT-ing the excluded values, so a
+    request never scans the Product_Name strings again.
+    """
+
+    def __init__(self, dataframe, columns=None, max_cardinality=100000):
+        self.n = len(dataframe)
+        if columns is None:
+            columns = [col for col in dataframe.columns
+                       if col != "Date" and (dataframe[col].dtype == object
+                                             or isinstance(dataframe[col].dtype, pd.CategoricalDtype))]
+        self.bitmaps = {}
+        for col in columns:
+            codes, values = pd.factorize(dataframe[col])
+            if values.size > max_cardinality:
+                continue
+            # rows of every value in one pass: sort the rows by code, then cut at the code boundaries
+            order = np.argsort(codes, kind="stable")
+            bounds = np.searchsorted(codes[order], np.arange(values.size + 1))
+            self.bitmaps[col] = {value: Bitmap.from_positions(self.n, order[bounds[i]:bounds[i + 1]])
+                                 for i, value in enumerate(values)}
+
+    # Names of the indexed columns
+    def columns(self):
+        return list(self.bitmaps)
+
+    # Rows whose column holds any of the values (unknown values match nothing)
+    def any_of(self, column, values):
+        if column not in self.bitmaps:
+            raise ValueError(f"Column '{column}' is not indexed, indexed columns: {self.columns()}")
+        if isinstance(values, (str, int, float)):
+            values = [values]
+        if not isinstance(values, (list, tuple)) or not all(isinstance(v, (str, int, float)) for v in values):
+            raise ValueError(f"Values of '{column}' must be a value or a list of values")
+        result = Bitmap(self.n, positions=np.empty(0, dtype=np.int64))
+        for value in values:
+            if value in self.bitmaps[column]:
+                result = result | self.bitmaps[column][value]
+        return result
+
+    def select(self, include=None, exclude=None):
+        """
+        Rows matching a filter
+
+        Args:
+            include: {column: [values]} rows must hold one of the values of every listed column
+            exclude: {column: [values]} rows holding any of these values are dropped
+
+        Returns:
+            Bitmap: the selected rows
+        """
+        result = Bitmap.full(self.n)
+        for column, values in (include or {}).items():
+            result = result & self.any_of(column, values)
+        for column, values in (exclude or {}).items():
+            result = result & ~self.any_of(column, values)
+        return result
+
+
+class FilterIndex:
+    """Bitmap index + KPI arrays of one dataset, for filtered KPI evaluation"""
+
+    def __init__(self, dataframe):
+        self.arrays = KPIArrays(dataframe)
+        self.bitmaps = BitmapIndex(dataframe)
+
+    # Rows between two dates (inclusive, None is open ended)
+    def date_range(self, start=None, end=None):
+        mask = self.arrays.valid_date.copy()
+        if start is not None:
+            mask &= self.arrays.row_days >= np.datetime64(pd.Timestamp(start), "D").astype(np.int64)
+        if end is not None:
+            mask &= self.arrays.row_days <= np.datetime64(pd.Timestamp(end), "D").astype(np.int64)
+        return Bitmap.from_mask(mask)
+
+    # Selected rows of a filter (optionally limited to a date range)
+    def select(self, include=None, exclude=None, start=None, end=None):
+        rows = self.bitmaps.select(include, exclude)
+        if start is not None or end is not None:
+            rows = rows & self.date_range(start, end)
+        return rows
+
+    # KPI calculator reducing only the selected rows
+    def calculator(self, rows):
+        return NumpyKPICalculator(None, arrays=self.arrays.take(rows.to_positions()))
@@ -2,6 +2,7 @@
 
 import pandas as pd
 import numpy as np 
+from jit_kernels import use_numba, zscore_keep_kernel
 
 class DataCleaner:
     #store the dataframe in the constructor
@@ -41,9 +42,15 @@ class DataCleaner:
         return self.df
     
     #remove outlier means that values that are uncertain and extremly unique
+    #with the numba kernel backend the z-scores are one compiled loop per column (no temporary Series)
     def remove_outliers(self,z_threshold=3):
         numeric_cols = self.df.select_dtypes(include=["number"]).columns
         for col in numeric_cols:
+            if use_numba():
+                keep = np.empty(len(self.df), dtype=bool)
+                zscore_keep_kernel(self.df[col].to_numpy(dtype=np.float64), float(z_threshold), keep)
+                self.df = self.df[keep]
+                continue
             z_scores = np.abs(( self.df[col]- self.df[col].mean() ) / self.df[col].std())
             self.df = self.df[z_scores < z_threshold]
         return self.df
@@ -1,7 +1,14 @@
 #read the csv file 
 
+import hashlib
+import io
+import os
+import numpy as np
 import pandas as pd
 
+# content hashes already computed, keyed by (path, size, modification time)
+_FILE_HASHES = {}
+
 class Dataloader:
     def __init__(self,filepath):   #constructor
         self.filepath = filepath  #store the file path that define in the app.py file
@@ -26,6 +33,69 @@ class Dataloader:
     def get_dataframe(self):
         return self.df
 
+    #sha256 of the file content (read in 1 MB blocks, no csv parsing), reused while the file is unchanged
+    def file_hash(self):
+        stat = os.stat(self.filepath)
+        key = (os.path.abspath(self.filepath), stat.st_size, stat.st_mtime_ns)
+        if key not in _FILE_HASHES:
+            digest = hashlib.sha256()
+            with open(self.filepath, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+            _FILE_HASHES[key] = digest.hexdigest()
+        return _FILE_HASHES[key]
+
+    #random rows from anywhere in the file without reading it all (seek to random byte offsets)
+    #returns (dataframe, byte offset of every sampled line, byte length of every sampled line)
+    #note: a line is picked when the offset falls in the line before it, so lines after long lines are a bit favoured
+    def sample_rows(self, n_rows, seed=42):
+        size = os.path.getsize(self.filepath)
+        rng = np.random.default_rng(seed)
+        lines, offsets = [], []
+        with open(self.filepath, "rb") as f:
+            header = f.readline()
+            data_start = f.tell()
+            if data_start < size:
+                for position in np.sort(rng.integers(data_start, size, n_rows)):
+                    f.seek(position - 1)
+                    f.readline()              # finish the line the offset fell into
+                    start = f.tell()
+                    line = f.readline()
+                    if line.strip():
+                        offsets.append(start)
+                        lines.append(line if line.endswith(b"\n") else line + b"\n")
+        df = pd.read_csv(io.BytesIO(header + b"".join(lines)))
+        return df, np.array(offsets, dtype=np.int64), np.array([len(line) for line in lines], dtype=np.int64)
+
+    #read the file in blocks of about chunk_bytes (whole lines only)
+    #yields (dataframe of the block, bytes of the file read so far)
+    def iter_chunks(self, chunk_bytes=64 * 1024 * 1024):
+        with open(self.filepath, "rb") as f:
+            header = f.readline()
+            while True:
+                lines = f.readlines(chunk_bytes)
+                if not lines:
+                    break
+                if not lines[-1].endswith(b"\n"):
+                    lines[-1] += b"\n"
+                yield pd.read_csv(io.BytesIO(header + b"".join(lines))), f.tell()
+
+    #read only the lines that start inside the byte range [start, end) (with the header)
+    #ranges that cover the file side by side give every line exactly once
+    def load_csv_range(self, start, end):
+        with open(self.filepath, "rb") as f:
+            header = f.readline()
+            if start > f.tell():
+                f.seek(start - 1)
+                f.readline()              # the line in progress belongs to the previous range
+            position = f.tell()
+            block = f.read(max(end - position, 0)) if position < end else b""
+            if block and not block.endswith(b"\n"):
+                block += f.readline()     # finish the last line started inside the range
+        if block and not block.endswith(b"\n"):
+            block += b"\n"
+        return pd.read_csv(io.BytesIO(header + block))
+
 # #Create the instance
 # loader = Dataloader("file.csv")
 # #call the functions through the instance
@@ -1,11 +1,64 @@
 import mysql.connector
 from mysql.connector import Error 
 import json 
+import os
+import sqlite3
+import tempfile
 from datetime import datetime
 import numpy as np 
+import pandas as pd
+from kpi_aggregates import KPIAggregates, MONTHLY_COLUMNS, PRODUCT_COLUMNS
+from quantile_sketch import QuantileSketch, BENCHMARK_METRICS, metric_value, benchmark
+
+# csv column -> transactions table column (every money / count column the KPIs read)
+TRANSACTION_COLUMNS = {
+    "Revenue": "revenue",
+    "Units_sold": "units_sold",
+    "Costs_Of_Goods": "costs_of_goods",
+    "Marketing_Cost": "marketing_cost",
+    "Logistic_Cost": "logistic_cost",
+    "Other_Cost": "other_cost",
+    "Operating_Expenses": "operating_expenses",
+}
 
 #Database class that interact with the database
 class BusinessDatabase:
+    #SQL that differs between MySQL and the SQLite stand-in
+    PLACEHOLDER = "%s"
+    MONTH_EXPR = "DATE_FORMAT(sale_date, '%%Y-%%m')"   #%% because the query has parameters
+    TRANSACTIONS_TABLE = """
+        CREATE TABLE IF NOT EXISTS transactions(
+        id BIGINT AUTO_INCREMENT PRIMARY KEY,
+        business_id INT NOT NULL,
+        sale_date DATE,
+        product_name VARCHAR(200),
+        units_sold DECIMAL(15, 2),
+        revenue DECIMAL(15, 2),
+        costs_of_goods DECIMAL(15, 2),
+        marketing_cost DECIMAL(15, 2),
+        logistic_cost DECIMAL(15, 2),
+        other_cost DECIMAL(15, 2),
+        operating_expenses DECIMAL(15, 2),
+        INDEX idx_business_date (business_id, sale_date),
+        FOREIGN KEY (business_id) REFERENCES businesses(id)
+        )
+    """
+
+    SKETCHES_TABLE = """
+        CREATE TABLE IF NOT EXISTS kpi_sketches(
+        industry VARCHAR(100) NOT NULL,
+        metric VARCHAR(50) NOT NULL,
+        sketch JSON,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        PRIMARY KEY (industry, metric)
+        )
+    """
+    UPSERT_SKETCH = """
+        INSERT INTO kpi_sketches(industry, metric, sketch) VALUES (%s, %s, %s)
+        ON DUPLICATE KEY UPDATE sketch = VALUES(sketch)
+    """
+    LOCK_ROWS = " FOR UPDATE"   #sketch rows stay locked until the analysis is committed
+
     def __init__(self):
         #database credentials that is used for the connection
         self.host = "localhost" #change after render or deploy
@@ -14,17 +67,14 @@ class BusinessDatabase:
         self.database = "business_analyzer_db"  #mysql database name 
         #initally server is not connected 
         self.connection = None
+        #kpi_sketches is created on first use (databases made before the table existed)
+        self.sketches_table_ready = False
     
     #1.Establish the connection of Mysql
     def connect(self):
         #mysql.connector.connect helps to create the link that connect the Mqsql 
         try:
-            self.connection = mysql.connector.connect(
-                host = self.host,
-                user = self.user,
-                password = self.password,
-                database = self.database
-            )
+            self.connection = self._open_connection()
             #check the connection is build or not
             if self.connection.is_connected():
                 print("Connected to MySQL")
@@ -34,6 +84,16 @@ class BusinessDatabase:
             return False 
 
 
+    #new MySQL connection; local_infile only for LOAD DATA LOCAL INFILE (it lets the server read client files)
+    def _open_connection(self, local_infile=False):
+        return mysql.connector.connect(
+            host = self.host,
+            user = self.user,
+            password = self.password,
+            database = self.database,
+            allow_local_infile = local_infile
+        )
+
     #2. Creating the required tables 
     def create_tables(self):
         cursor = self.connection.cursor() #cursor helps to execute the queries 
@@ -94,6 +154,14 @@ class BusinessDatabase:
         
         cursor.execute(query_predictions)
         print("Table 'predictions' created")
+
+        #Table 4 : Transactions = the raw rows of the uploaded files (KPIs are aggregated in SQL)
+        cursor.execute(self.TRANSACTIONS_TABLE)
+        print("Table 'transactions' created")
+
+        #Table 5 : KPI sketches = per industry quantile sketches of the main KPIs (peer benchmarks)
+        cursor.execute(self.SKETCHES_TABLE)
+        print("Table 'kpi_sketches' created")
         #free the resource
         cursor.close()
 
@@ -107,7 +175,7 @@ class BusinessDatabase:
         #order the values in %s where %s is the placeholder prevent from the sql injection 
         values = (business_name,industry,business_type)
         #execute the query 
-        cursor.execute(query,values)
+        cursor.execute(self._sql(query),values)
         #commit the changes by which it store permanently in the database
         self.connection.commit()
         #getting the newly inserted row id
@@ -119,6 +187,7 @@ class BusinessDatabase:
 
     def insert_analysis(self, business_id, kpis):
         cursor = self.connection.cursor()
+        self._ensure_sketches_table(cursor)   #before the insert: MySQL commits around CREATE TABLE
         # Recursive cleaner for numpy values inside dict/list
         def clean_numpy(obj):
             if isinstance(obj, dict):
@@ -165,9 +234,11 @@ class BusinessDatabase:
             json.dumps(kpis_cleaned)
 
         )
-        cursor.execute(query, values)
-        self.connection.commit()
+        cursor.execute(self._sql(query), values)
         analysis_id = cursor.lastrowid
+        #stream the new KPIs into the industry sketches (same transaction as the analysis)
+        self._update_kpi_sketches(cursor, business_id, kpis_cleaned)
+        self.connection.commit()
         print(f"Analysis added (ID: {analysis_id})")
         cursor.close()
         return analysis_id
@@ -264,6 +335,210 @@ class BusinessDatabase:
             return None
 
 
+    #--------------------------KPI sketches (peer benchmarks)--------------------------#
+
+    #create kpi_sketches once per instance if it is missing (CREATE TABLE IF NOT EXISTS)
+    def _ensure_sketches_table(self, cursor):
+        if not self.sketches_table_ready:
+            cursor.execute(self.SKETCHES_TABLE)
+            self.sketches_table_ready = True
+
+    #industry of a business ("Unknown" when not set)
+    def _business_industry(self, cursor, business_id):
+        cursor.execute(self._sql("SELECT industry FROM businesses WHERE id = %s"), (int(business_id),))
+        row = cursor.fetchone()
+        return (row[0] if row else None) or "Unknown"
+
+    #sketches of one industry read with the given cursor (lock=True keeps the rows locked for an update)
+    def _read_sketches(self, cursor, industry, lock=False):
+        query = "SELECT metric, sketch FROM kpi_sketches WHERE industry = %s" + (self.LOCK_ROWS if lock else "")
+        cursor.execute(self._sql(query), (industry,))
+        return {metric: QuantileSketch.from_dict(json.loads(sketch)) for metric, sketch in cursor.fetchall()}
+
+    #add the KPIs of one analysis to the sketches of the business industry
+    def _update_kpi_sketches(self, cursor, business_id, kpis):
+        industry = self._business_industry(cursor, business_id)
+        sketches = self._read_sketches(cursor, industry, lock=True)
+        for metric in BENCHMARK_METRICS:
+            value = metric_value(kpis, metric)
+            if value is None:
+                continue
+            sketch = sketches.get(metric, QuantileSketch())
+            sketch.add(value)
+            cursor.execute(self._sql(self.UPSERT_SKETCH), (industry, metric, json.dumps(sketch.to_dict())))
+
+    #full KPI dict of the latest analysis of a business (None when there is none)
+    def get_latest_kpis(self, business_id):
+        cursor = self.connection.cursor()
+        cursor.execute(self._sql("""
+        SELECT full_kpis FROM analyses WHERE business_id = %s
+        ORDER BY analyzed_at DESC, id DESC LIMIT 1
+        """), (int(business_id),))
+        row = cursor.fetchone()
+        cursor.close()
+        if not row or not row[0]:
+            return None
+        return json.loads(row[0]) if isinstance(row[0], (str, bytes, bytearray)) else row[0]
+
+    #metric -> QuantileSketch of an industry
+    def get_kpi_sketches(self, industry):
+        cursor = self.connection.cursor()
+        self._ensure_sketches_table(cursor)
+        sketches = self._read_sketches(cursor, industry)
+        cursor.close()
+        return sketches
+
+    #percentile ranks of a business among its industry (reads one business row + the industry sketches only)
+    def get_benchmarks(self, business_id, kpis):
+        cursor = self.connection.cursor()
+        self._ensure_sketches_table(cursor)
+        industry = self._business_industry(cursor, business_id)
+        sketches = self._read_sketches(cursor, industry)
+        cursor.close()
+        return {'industry': industry, 'benchmarks': benchmark(sketches, kpis)}
+
+    #one time backfill of the sketches from the analyses already stored (full scan, not needed afterwards)
+    def rebuild_kpi_sketches(self):
+        cursor = self.connection.cursor()
+        self._ensure_sketches_table(cursor)
+        cursor.execute("""
+        SELECT COALESCE(b.industry, 'Unknown'), a.full_kpis
+        FROM analyses a JOIN businesses b ON a.business_id = b.id
+        """)
+        sketches = {}
+        for industry, full_kpis in cursor.fetchall():
+            kpis = json.loads(full_kpis) if isinstance(full_kpis, (str, bytes, bytearray)) else (full_kpis or {})
+            for metric in BENCHMARK_METRICS:
+                value = metric_value(kpis, metric)
+                if value is not None:
+                    sketches.setdefault((industry, metric), QuantileSketch()).add(value)
+        cursor.execute("DELETE FROM kpi_sketches")
+        for (industry, metric), sketch in sketches.items():
+            cursor.execute(self._sql(self.UPSERT_SKETCH), (industry, metric, json.dumps(sketch.to_dict())))
+        self.connection.commit()
+        cursor.close()
+        print(f"KPI sketches rebuilt: {len(sketches)} (industry, metric) pairs")
+        return len(sketches)
+
+    #----------------------------Transactions (raw rows)-----------------------------#
+
+    #query with the placeholder of this database
+    def _sql(self, query):
+        return query.replace("%s", self.PLACEHOLDER)
+
+    #cleaned dataframe -> rows of the transactions table (business_id first, NULL for missing values)
+    @staticmethod
+    def _transaction_rows(business_id, dataframe):
+        dates = pd.to_datetime(dataframe["Date"], errors="coerce")
+        table = pd.DataFrame({
+            "business_id": int(business_id),
+            "sale_date": dates.dt.strftime("%Y-%m-%d"),
+            "product_name": dataframe["Product_Name"] if "Product_Name" in dataframe.columns else None,
+        }, index=dataframe.index)
+        for col, db_col in TRANSACTION_COLUMNS.items():
+            table[db_col] = dataframe[col].astype(float) if col in dataframe.columns else None
+        return table.astype(object).where(table.notna(), None)
+
+    #batched multi-row inserts (works on every database)
+    def insert_transactions(self, business_id, dataframe, batch_size=10000):
+        table = self._transaction_rows(business_id, dataframe)
+        query = self._sql(f"""
+        INSERT INTO transactions({", ".join(table.columns)})
+        VALUES ({", ".join(["%s"] * len(table.columns))})
+        """)
+        rows = list(table.itertuples(index=False, name=None))
+        cursor = self.connection.cursor()
+        for start in range(0, len(rows), batch_size):
+            cursor.executemany(query, rows[start:start + batch_size])
+        self.connection.commit()
+        cursor.close()
+        print(f"Transactions added: {len(rows)} rows (business ID:{business_id})")
+        return len(rows)
+
+    #bulk load: the rows go to a temporary csv that MySQL reads with LOAD DATA LOCAL INFILE
+    def bulk_load_transactions(self, business_id, dataframe):
+        table = self._transaction_rows(business_id, dataframe)
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False, newline="") as f:
+            table.to_csv(f, index=False, header=False, na_rep="\\N")   #\N = NULL for LOAD DATA
+            path = f.name
+        try:
+            #dedicated connection with local_infile, closed right after the load
+            connection = self._open_connection(local_infile=True)
+            try:
+                cursor = connection.cursor()
+                cursor.execute(f"""
+                LOAD DATA LOCAL INFILE '{path}' INTO TABLE transactions
+                FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"'
+                LINES TERMINATED BY '\\n'
+                ({", ".join(table.columns)})
+                """)
+                connection.commit()
+                cursor.close()
+            finally:
+                connection.close()
+        finally:
+            os.remove(path)
+        print(f"Transactions loaded: {len(table)} rows (business ID:{business_id})")
+        return len(table)
+
+    #remove the rows of a business (before loading a new file for it)
+    def delete_transactions(self, business_id):
+        cursor = self.connection.cursor()
+        cursor.execute(self._sql("DELETE FROM transactions WHERE business_id = %s"), (int(business_id),))
+        self.connection.commit()
+        deleted = cursor.rowcount
+        cursor.close()
+        return deleted
+
+    #KPI aggregates computed by the database (sums, monthly sums, product sums), only the aggregates come back
+    def get_transaction_aggregates(self, business_id, start_date=None, end_date=None):
+        where = "business_id = %s"
+        params = [int(business_id)]
+        if start_date:
+            where += " AND sale_date >= %s"
+            params.append(pd.Timestamp(start_date).strftime("%Y-%m-%d"))
+        if end_date:
+            where += " AND sale_date <= %s"
+            params.append(pd.Timestamp(end_date).strftime("%Y-%m-%d"))
+        sums = ", ".join(f"COALESCE(SUM({TRANSACTION_COLUMNS[col]}), 0)" for col in TRANSACTION_COLUMNS)
+        cursor = self.connection.cursor()
+
+        #1. totals + first / last date
+        cursor.execute(self._sql(f"""
+        SELECT COUNT(*), MIN(sale_date), MAX(sale_date), {sums}
+        FROM transactions WHERE {where}
+        """), params)
+        row = cursor.fetchone()
+        rows, first_date, last_date = row[0], row[1], row[2]
+        totals = {col: float(value) for col, value in zip(TRANSACTION_COLUMNS, row[3:])}
+
+        #2. sums per month
+        month_sums = ", ".join(f"COALESCE(SUM({TRANSACTION_COLUMNS[col]}), 0)" for col in MONTHLY_COLUMNS)
+        cursor.execute(self._sql(f"""
+        SELECT {self.MONTH_EXPR} AS month, {month_sums}
+        FROM transactions WHERE {where} AND sale_date IS NOT NULL
+        GROUP BY month ORDER BY month
+        """), params)
+        monthly_rows = cursor.fetchall()
+        monthly = pd.DataFrame([[float(v) for v in r[1:]] for r in monthly_rows], columns=MONTHLY_COLUMNS,
+                               index=pd.PeriodIndex([r[0] for r in monthly_rows], freq="M", name="Month"))
+
+        #3. sums per product (in order of first appearance = smallest id)
+        product_sums = ", ".join(f"COALESCE(SUM({TRANSACTION_COLUMNS[col]}), 0)" for col in PRODUCT_COLUMNS)
+        cursor.execute(self._sql(f"""
+        SELECT product_name, {product_sums}
+        FROM transactions WHERE {where} AND product_name IS NOT NULL
+        GROUP BY product_name ORDER BY MIN(id)
+        """), params)
+        product_rows = cursor.fetchall()
+        products = pd.DataFrame([[float(v) for v in r[1:]] for r in product_rows], columns=PRODUCT_COLUMNS,
+                                index=pd.Index([r[0] for r in product_rows], name="Product_Name"))
+        cursor.close()
+
+        def to_day(value):
+            return None if value is None else int(np.datetime64(pd.Timestamp(value), "D").astype(np.int64))
+        return KPIAggregates(rows, totals, to_day(first_date), to_day(last_date), monthly, products)
+
     def close(self):
         #closing the connection
         if self.connection and self.connection.is_connected():
@@ -271,6 +546,85 @@ class BusinessDatabase:
             print("Database connection closed")
 
 
+#Embedded SQLite stand-in (tests / single machine setups): same profile, transactions and sketch tables and queries
+class SQLiteBusinessDatabase(BusinessDatabase):
+    PLACEHOLDER = "?"
+    MONTH_EXPR = "strftime('%Y-%m', sale_date)"
+    TRANSACTIONS_TABLE = """
+        CREATE TABLE IF NOT EXISTS transactions(
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        business_id INTEGER NOT NULL,
+        sale_date TEXT,
+        product_name TEXT,
+        units_sold REAL,
+        revenue REAL,
+        costs_of_goods REAL,
+        marketing_cost REAL,
+        logistic_cost REAL,
+        other_cost REAL,
+        operating_expenses REAL
+        )
+    """
+
+    SKETCHES_TABLE = """
+        CREATE TABLE IF NOT EXISTS kpi_sketches(
+        industry TEXT NOT NULL,
+        metric TEXT NOT NULL,
+        sketch TEXT,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        PRIMARY KEY (industry, metric)
+        )
+    """
+    UPSERT_SKETCH = """
+        INSERT INTO kpi_sketches(industry, metric, sketch) VALUES (%s, %s, %s)
+        ON CONFLICT(industry, metric) DO UPDATE SET sketch = excluded.sketch, updated_at = CURRENT_TIMESTAMP
+    """
+    LOCK_ROWS = ""   #SQLite locks the whole database for the write transaction
+    #businesses / analyses with the columns insert_business and insert_analysis write
+    PROFILE_TABLES = ["""
+        CREATE TABLE IF NOT EXISTS businesses(
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        business_name TEXT NOT NULL,
+        industry TEXT,
+        business_type TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """, """
+        CREATE TABLE IF NOT EXISTS analyses(
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        business_id INTEGER,
+        total_revenue REAL, total_costs REAL, net_profit REAL, profit_margin REAL,
+        ebitda REAL, burn_rate REAL, scalability_score INTEGER, risk_score INTEGER,
+        ipo_readiness INTEGER, shark_tank_score INTEGER,
+        full_kpis TEXT,
+        analyzed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """]
+
+    def __init__(self, path=":memory:"):
+        super().__init__()
+        self.path = path
 
+    def connect(self):
+        try:
+            self.connection = sqlite3.connect(self.path)
+            cursor = self.connection.cursor()
+            for table in self.PROFILE_TABLES + [self.TRANSACTIONS_TABLE, self.SKETCHES_TABLE]:
+                cursor.execute(table)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_business_date ON transactions(business_id, sale_date)")
+            cursor.close()
+            print(f"Connected to SQLite ({self.path})")
+            return True
+        except Exception as e:
+            print(f"Connection error:{e}")
+            return False
 
+    #no LOAD DATA in SQLite, executemany is its bulk path
+    def bulk_load_transactions(self, business_id, dataframe):
+        return self.insert_transactions(business_id, dataframe)
 
+    def close(self):
+        if self.connection:
+            self.connection.close()
+            self.connection = None
+            print("Database connection closed")
@@ -0,0 +1,94 @@
+#Small helpers shared by the on-disk caches (atomic writes + LRU eviction under a size budget)
+
+import os
+import tempfile
+
+def atomic_write(filepath, data):
+    """
+    Write bytes to a file atomically
+
+    The data goes to a temporary file in the same folder first and is then
+    renamed over the target, so readers (other workers) never see a half
+    written file.
+    """
+    folder = os.path.dirname(filepath) or "."
+    os.makedirs(folder, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=folder, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, filepath)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def touch(filepath):
+    """Mark a cache entry as recently used (eviction is by modification time)"""
+    try:
+        os.utime(filepath, None)
+    except OSError:
+        pass
+
+def folder_size(folder):
+    """Total size in bytes of the entries of a cache folder"""
+    return sum(size for _, size, _ in _entries(folder))
+
+def evict_lru(folder, max_bytes, keep=()):
+    """
+    Delete the least recently used entries until the folder fits in max_bytes
+
+    An entry is a file or a sub-folder directly inside the cache folder.
+
+    Args:
+        folder (str): Cache folder
+        max_bytes (int): Size budget
+        keep (iterable): Entry names that must not be evicted (e.g. the one just written)
+
+    Returns:
+        list: Names of the evicted entries
+    """
+    entries = _entries(folder)
+    total = sum(size for _, size, _ in entries)
+    evicted = []
+    for name, size, _ in sorted(entries, key=lambda entry: entry[2]):
+        if total <= max_bytes:
+            break
+        if name in keep:
+            continue
+        path = os.path.join(folder, name)
+        try:
+            if os.path.isdir(path):
+                for root, dirs, files in os.walk(path, topdown=False):
+                    for f in files:
+                        os.remove(os.path.join(root, f))
+                    for d in dirs:
+                        os.rmdir(os.path.join(root, d))
+                os.rmdir(path)
+            else:
+                os.remove(path)
+        except OSError:
+            continue  # already removed by another worker
+        total -= size
+        evicted.append(name)
+    return evicted
+
+# (name, size in bytes, last use time) of every entry in a cache folder
+def _entries(folder):
+    if not os.path.isdir(folder):
+        return []
+    entries = []
+    for name in os.listdir(folder):
+        if name.startswith(".tmp-"):
+            continue
+        path = os.path.join(folder, name)
+        try:
+            if os.path.isdir(path):
+                size = sum(os.path.getsize(os.path.join(root, f))
+                           for root, _, files in os.walk(path) for f in files)
+            else:
+                size = os.path.getsize(path)
+            entries.append((name, size, os.path.getmtime(path)))
+        except OSError:
+            continue
+    return entries
@@ -2,6 +2,15 @@
 
 import pandas as pd
 import numpy as np
+from feature_kernels import build_feature_matrix, build_panel_matrix, normalize_spec
+from jit_kernels import NO_GROUPS, rolling_moments_kernel, use_numba
+
+# Frequencies accepted by FeatureEngineer.resample (pandas offset aliases, months labelled by their first day)
+RESAMPLE_FREQUENCIES = {"D": "D", "daily": "D", "W": "W", "weekly": "W", "M": "MS", "monthly": "MS"}
+# How a column is aggregated per period (every other numeric column is summed)
+RESAMPLE_AGGREGATIONS = {"Price": "mean", "Initial_Investment": "last", "Current_Cash": "last"}
+# Ways to fill periods without any transaction
+RESAMPLE_FILLS = ("zero", "ffill", "interpolate", None)
 
 class FeatureEngineer:
     """
@@ -24,6 +33,50 @@ class FeatureEngineer:
         self.df = dataframe.copy()  # Create a copy to avoid modifying original
         print(f"✅ FeatureEngineer initialized with {len(self.df)} rows")
     
+    def resample(self, freq='W', fill='zero'):
+        """
+        Turn the transactions into a regular, sorted time series
+        
+        Rows come in random date order and several rows can share a day, so
+        lags and rolling windows over raw rows do not mean "previous period".
+        Rows are sorted by Date and aggregated per period (sums for money and
+        units, see RESAMPLE_AGGREGATIONS for the others); text columns such as
+        Product_Name are dropped and rows without a date are skipped.
+        
+        Args:
+            freq (str): 'D' / 'daily', 'W' / 'weekly' or 'M' / 'monthly'
+            fill (str): Periods without transactions:
+                - 'zero': sums are 0, the other columns keep their last value
+                - 'ffill': every column keeps its last value
+                - 'interpolate': linear interpolation between the periods around
+                - None: left as NaN (sums are still 0)
+        """
+        if freq not in RESAMPLE_FREQUENCIES:
+            raise ValueError(f"Unknown frequency '{freq}', use {list(RESAMPLE_FREQUENCIES)}")
+        if fill not in RESAMPLE_FILLS:
+            raise ValueError(f"Unknown fill '{fill}', use {list(RESAMPLE_FILLS)}")
+        
+        dates = pd.to_datetime(self.df['Date'])
+        numeric = self.df.select_dtypes(include=[np.number]).loc[dates.notna()]
+        numeric.index = pd.DatetimeIndex(dates[dates.notna()], name='Date')
+        numeric = numeric.sort_index(kind='stable')
+        
+        aggregations = {col: RESAMPLE_AGGREGATIONS.get(col, 'sum') for col in numeric.columns}
+        resampled = numeric.resample(RESAMPLE_FREQUENCIES[freq]).agg(aggregations)
+        
+        if fill == 'zero':
+            resampled = resampled.ffill()          # only the mean / last columns can be empty
+        elif fill in ('ffill', 'interpolate'):
+            empty = (numeric.resample(RESAMPLE_FREQUENCIES[freq]).size() == 0).to_numpy()
+            resampled = resampled.astype(np.float64)
+            resampled.loc[empty] = np.nan
+            resampled = resampled.ffill() if fill == 'ffill' else resampled.interpolate(method='linear')
+        
+        before_count = len(self.df)
+        self.df = resampled.reset_index()
+        print(f"✅ Resampled {before_count} rows to {len(self.df)} '{freq}' periods (fill: {fill})")
+        return self
+    
     def create_time_features(self):
         """
         Extract time-based features from Date column
@@ -84,6 +137,17 @@ class FeatureEngineer:
             windows (list): List of window sizes (e.g., [3, 6] for 3 and 6 period averages)
         """
         try:
+            if use_numba():
+                # compiled kernel: mean and std of every window in one pass
+                values = self.df[column].to_numpy(dtype=np.float64)
+                for window in windows:
+                    mean, std = np.empty(values.size), np.empty(values.size)
+                    rolling_moments_kernel(values, NO_GROUPS, window, np.empty(0), mean, np.empty(0), std)
+                    self.df[f'{column}_MA_{window}'] = mean
+                    self.df[f'{column}_STD_{window}'] = std
+                print(f"✅ Rolling features created for {column}: MA and STD for windows {windows} (numba)")
+                return self
+            
             for window in windows:
                 # Moving Average
                 ma_col_name = f'{column}_MA_{window}'
@@ -135,14 +199,146 @@ class FeatureEngineer:
         
         return self
     
+    def create_features_from_spec(self, spec):
+        """
+        Create many lag / rolling / growth / cumulative features in one step
+        
+        All features are computed into one preallocated NumPy matrix (shifted
+        views for lags, cumulative sums for rolling mean / std / var, strided
+        windows for min / max) and attached to the DataFrame with a single
+        concat, so hundreds of features do not fragment the DataFrame.
+        
+        Example spec:
+            {"columns": ["Revenue", "Units_sold"], "lags": [1, 2, 3],
+             "windows": [3, 6], "stats": ["mean", "std"],
+             "growth": True, "cumulative": True}
+        
+        Args:
+            spec (dict or list): One block or a list of blocks (see feature_kernels.normalize_spec)
+        """
+        try:
+            blocks = normalize_spec(spec)
+            needed = {col for block in blocks for col in block["columns"]}
+            missing = [col for col in needed if col not in self.df.columns]
+            if missing:
+                raise ValueError(f"Columns not found: {missing}")
+            columns = {col: self.df[col].to_numpy(dtype=np.float64) for col in needed}
+            matrix, names = build_feature_matrix(columns, blocks)
+            
+            features = pd.DataFrame(matrix, columns=names, index=self.df.index)
+            self.df = pd.concat([self.df.drop(columns=[n for n in names if n in self.df.columns]), features], axis=1)
+            
+            print(f"✅ {len(names)} features created from spec for {sorted(needed)}")
+        except Exception as e:
+            print(f"❌ Error creating features from spec: {e}")
+
+        return self
+
+    def apply_spec(self, recipe):
+        """
+        Run a whole feature recipe (what the API routes store in the feature store)
+
+        Example recipe:
+            {"resample": {"freq": "W", "fill": "zero"},
+             "time_features": True,
+             "features": {"columns": ["Revenue"], "lags": [1, 2, 3], "windows": [3, 5], "growth": True},
+             "drop_missing": True}
+
+        Args:
+            recipe (dict): resample (resample arguments, default none),
+                time_features (default True), features spec (see
+                create_features_from_spec) and drop_missing (default True)
+        """
+        if recipe.get('resample'):
+            self.resample(**recipe['resample'])
+        if recipe.get('time_features', True):
+            self.create_time_features()
+        if recipe.get('features'):
+            self.create_features_from_spec(recipe['features'])
+        if recipe.get('drop_missing', True):
+            self.drop_missing_rows()
+        return self
+
+    def create_panel_features(self, spec, group_column='Product_Name', order_by='Date', workers=1):
+        """
+        Create spec features inside every group (e.g. per product)
+        
+        Rows of different products are interleaved in the data, so a plain
+        Revenue_Lag_1 takes the revenue of whatever product came before.
+        Here lags, rolling statistics, growth and running totals only look
+        at earlier rows of the same group (ordered by order_by). The column
+        names are the same as create_features_from_spec.
+        
+        Args:
+            spec (dict or list): Feature spec (see feature_kernels.normalize_spec)
+            group_column (str): Column that defines the groups
+            order_by (str, optional): Column that orders the rows inside a group (None = row order)
+            workers (int): Processes to use when there are thousands of groups
+        """
+        try:
+            blocks = normalize_spec(spec)
+            needed = {col for block in blocks for col in block["columns"]}
+            missing = [col for col in needed | {group_column} if col not in self.df.columns]
+            if missing:
+                raise ValueError(f"Columns not found: {missing}")
+            columns = {col: self.df[col].to_numpy(dtype=np.float64) for col in needed}
+            codes, groups = pd.factorize(self.df[group_column])
+            order = None
+            if order_by is not None:
+                order = pd.to_datetime(self.df[order_by]).to_numpy().astype(np.int64) if order_by == 'Date' \
+                    else self.df[order_by].to_numpy()
+            matrix, names = build_panel_matrix(columns, blocks, codes, order=order, workers=workers)
+            
+            features = pd.DataFrame(matrix, columns=names, index=self.df.index)
+            self.df = pd.concat([self.df.drop(columns=[n for n in names if n in self.df.columns]), features], axis=1)
+            
+            print(f"✅ {len(names)} panel features created per {group_column} ({len(groups)} groups)")
+        except Exception as e:
+            print(f"❌ Error creating panel features: {e}")
+        
+        return self
+    
+    @staticmethod
+    def stream_features(chunks, spec, time_features=True, state=None):
+        """
+        Streaming mode: featurize Date-ordered chunks without the full frame
+        
+        Lags and rolling windows read the last max(lag, window) values kept
+        from the previous chunks, growth the last value and running totals
+        the total so far (see feature_state.FeatureState), so the chunks can
+        come straight from Dataloader.iter_chunks.
+        
+        Example:
+            loader = Dataloader("sales.csv")
+            for features in FeatureEngineer.stream_features((df for df, _ in loader.iter_chunks()), spec):
+                ...
+        
+        Args:
+            chunks (iterable): DataFrames of consecutive rows (sorted by Date)
+            spec (dict or list): Feature spec (see create_features_from_spec)
+            time_features (bool): Also create the create_time_features columns
+            state (FeatureState, optional): State to continue from (e.g. FeatureState.load)
+            
+        Yields:
+            pd.DataFrame: Feature rows of every chunk, same columns as the in-memory methods
+        """
+        from feature_state import FeatureState   # feature_state imports this module
+        
+        if state is None:
+            state = FeatureState(spec, time_features)
+        yield from state.stream(chunks)
+    
     def drop_missing_rows(self):
         """
         Remove rows with missing values (NaN)
         
-        Note: Lag and rolling features create NaN values for initial rows
+        Note: Lag and rolling features create NaN values for initial rows,
+        growth after a period with 0 revenue is infinite and is dropped too
         """
         before_count = len(self.df)
-        self.df = self.df.dropna()
+        numeric = self.df.select_dtypes(include=[np.number])
+        infinite = np.isinf(numeric.to_numpy(dtype=np.float64)).any(axis=1)
+        self.df = self.df[~infinite].dropna()
         after_count = len(self.df)
         removed = before_count - after_count
         
@@ -158,7 +354,7 @@ class FeatureEngineer:
         """
         return self.df
     
-    def prepare_ml_data(self, target_column='Revenue'):
+    def prepare_ml_data(self, target_column='Revenue', as_array=False, dtype=np.float32):
         """
         Prepare data for machine learning
         
@@ -166,9 +362,13 @@ class FeatureEngineer:
         
         Args:
             target_column (str): Name of the column to predict
+            as_array (bool): Return one C-contiguous NumPy matrix instead of a DataFrame
+                (tree models train on it without converting it again)
+            dtype: dtype of the matrix when as_array (np.float32 halves the memory, or np.float64)
             
         Returns:
-            tuple: (X, y) where X is features DataFrame and y is target Series
+            tuple: (X, y) where X is features DataFrame and y is target Series,
+                or (X, y, feature_names) with as_array (y is a float64 array)
         """
         try:
             # Select only numeric columns
@@ -178,6 +378,18 @@ class FeatureEngineer:
             if target_column not in numeric_df.columns:
                 raise ValueError(f"Target column '{target_column}' not found in numeric columns")
             
+            if as_array:
+                # One row-major matrix filled column by column (no intermediate float64 copy)
+                feature_names = [col for col in numeric_df.columns if col != target_column]
+                X = np.empty((len(numeric_df), len(feature_names)), dtype=dtype, order='C')
+                for j, col in enumerate(feature_names):
+                    X[:, j] = numeric_df[col].to_numpy()
+                y = numeric_df[target_column].to_numpy(dtype=np.float64)
+                
+                print(f"✅ ML data prepared as a {X.dtype} matrix: {X.shape[1]} features, {X.shape[0]} rows "
+                      f"({X.nbytes / 1024:.0f} KB)")
+                return X, y, feature_names
+            
             y = numeric_df[target_column]
             X = numeric_df.drop(columns=[target_column])
             
@@ -190,7 +402,64 @@ class FeatureEngineer:
         
         except Exception as e:
             print(f"❌ Error preparing ML data: {e}")
-            return None, None
+            return (None, None, None) if as_array else (None, None)
+
+    def prepare_horizon_targets(self, series, horizons, target_column='Revenue'):
+        """
+        Targets of a direct multi-horizon model
+        
+        Y[i, h] is the target h periods after row i of the feature frame
+        (h = 0 .. horizons-1), read from the full series the features were
+        built from, so rows dropped by drop_missing_rows do not shift the
+        periods. Rows too close to the end have NaN.
+        
+        Args:
+            series (pd.DataFrame): Data the features were built from (same index, e.g. the resampled data)
+            horizons (int): Number of periods
+            target_column (str): Column to predict
+            
+        Returns:
+            np.ndarray: float64 matrix of shape (rows, horizons)
+        """
+        values = series[target_column].to_numpy(dtype=np.float64)
+        positions = series.index.get_indexer(self.df.index)
+        if (positions < 0).any():
+            raise ValueError("Feature rows are not rows of the series")
+        Y = np.full((len(self.df), horizons), np.nan)
+        for h in range(horizons):
+            ahead = positions + h
+            inside = ahead < values.size
+            Y[inside, h] = values[ahead[inside]]
+        return Y
+    
+    def forecast_origin(self, recipe, feature_names, freq=None):
+        """
+        Feature row of the first period after the data (input of a direct model)
+        
+        self.df is the series (e.g. the resampled data). One row with the next
+        Date and unknown (NaN) values is appended and the recipe runs without
+        dropping rows, so the lags of that row are the last known values and
+        its time features are the ones of the next period.
+        
+        Args:
+            recipe (dict): Feature recipe the model was trained with (see apply_spec, no resample)
+            feature_names (list): Features the model uses
+            freq (str, optional): Period of the series ('D', 'W', 'M' ...), None repeats the last Date
+            
+        Returns:
+            np.ndarray: float64 feature row
+        """
+        last_date = pd.to_datetime(self.df['Date']).iloc[-1]
+        next_date = last_date + pd.tseries.frequencies.to_offset(RESAMPLE_FREQUENCIES[freq]) if freq else last_date
+        future = pd.concat([self.df, pd.DataFrame({'Date': [next_date]})], ignore_index=True)
+        
+        engineer = FeatureEngineer(future)
+        engineer.apply_spec({**recipe, 'resample': None, 'drop_missing': False})
+        row = engineer.get_features_dataframe().iloc[-1]
+        missing = [name for name in feature_names if name not in row.index or pd.isna(row[name])]
+        if missing:
+            raise ValueError(f"Features not known for the next period: {missing}")
+        return row[feature_names].to_numpy(dtype=np.float64)
 
 
 # ========== EXAMPLE USAGE ==========
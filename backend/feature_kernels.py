@@ -0,0 +1,339 @@
+#Vectorized lag / rolling / growth / cumulative kernels for FeatureEngineer (NumPy, or Numba loops for lags + moments)
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from jit_kernels import NO_GROUPS, lag_kernel, rolling_moments_kernel, use_numba
+
+# rolling statistic -> part of the column name (MA / STD keep the names of create_rolling_features)
+ROLLING_STATS = {"mean": "MA", "std": "STD", "var": "VAR", "sum": "SUM", "min": "MIN", "max": "MAX"}
+
+
+def normalize_spec(spec):
+    """
+    Feature spec as a list of blocks, every block a cross product
+
+    A block is a dict:
+        columns: ["Revenue", "Units_sold"]
+        lags: [1, 2, 3]
+        windows: [3, 6]
+        stats: ["mean", "std"]          (see ROLLING_STATS, default mean + std)
+        growth: True                    (percentage change, like create_growth_rate)
+        cumulative: True                (running total, like create_cumulative_features)
+
+    A spec is one block or a list of blocks.
+    """
+    blocks = spec if isinstance(spec, (list, tuple)) else [spec]
+    normalized = []
+    for block in blocks:
+        columns = block.get("columns", ["Revenue"])
+        stats = block.get("stats", ["mean", "std"])
+        unknown = [s for s in stats if s not in ROLLING_STATS]
+        if unknown:
+            raise ValueError(f"Unknown rolling statistics {unknown}, use {list(ROLLING_STATS)}")
+        lags = [int(lag) for lag in block.get("lags", [])]
+        windows = [int(window) for window in block.get("windows", [])]
+        if any(lag < 1 for lag in lags) or any(window < 1 for window in windows):
+            raise ValueError("Lags and windows must be positive integers")
+        normalized.append({
+            "columns": [columns] if isinstance(columns, str) else list(columns),
+            "lags": lags,
+            "windows": windows,
+            "stats": list(stats),
+            "growth": bool(block.get("growth", False)),
+            "cumulative": bool(block.get("cumulative", False)),
+        })
+    return normalized
+
+# Every feature of a spec in column order: (name, kind, source column, parameter)
+def feature_plan(spec):
+    plan, seen = [], set()
+    for block in normalize_spec(spec):
+        for column in block["columns"]:
+            features = [(f"{column}_Lag_{lag}", "lag", column, lag) for lag in block["lags"]]
+            for window in block["windows"]:
+                features += [(f"{column}_{ROLLING_STATS[stat]}_{window}", stat, column, window)
+                             for stat in block["stats"]]
+            if block["growth"]:
+                features.append((f"{column}_Growth", "growth", column, None))
+            if block["cumulative"]:
+                features.append((f"{column}_Cumsum", "cumulative", column, None))
+            for feature in features:
+                if feature[0] not in seen:
+                    seen.add(feature[0])
+                    plan.append(feature)
+    return plan
+
+def feature_names(spec):
+    return [name for name, _, _, _ in feature_plan(spec)]
+
+
+#---------------------------------Kernels (write into out)--------------------------------#
+
+# out[i] = values[i - lag] (NaN for the first lag rows)
+def lag_into(out, values, lag):
+    out[:lag] = np.nan
+    if lag < values.size:
+        out[lag:] = values[:values.size - lag]
+
+# Rows per block of the blocked prefix sums
+PREFIX_BLOCK = 4096
+# Window values per step of the rolling variance (bounds its temporary array)
+VARIANCE_CHUNK = 1 << 16
+
+class RollingSums:
+    """
+    Prefix sums of one column, shared by every window of a column
+
+    Window sums are differences of prefix sums. A prefix over millions of
+    rows gets large and the difference of two of them loses the small
+    digits, so the prefix restarts every PREFIX_BLOCK rows: a window inside
+    one block (or spanning two) only subtracts numbers of the size of a
+    block. Values are also centred on their mean. A window holding a NaN
+    gives NaN, like pandas.
+
+    Variances do not come from a prefix of squares (its cancellation is
+    large next to the variance of a quiet window): they are the squared
+    deviations from the window mean, and a run of equal values gives
+    exactly 0, like pandas.
+    """
+
+    def __init__(self, values):
+        nan = np.isnan(values)
+        n = values.size
+        self.values = values
+        self.filled = np.where(nan, 0.0, values)
+        self.center = float(np.mean(values[~nan])) if (~nan).any() else 0.0
+        centred = np.where(nan, 0.0, values - self.center)
+
+        blocks = -(-n // PREFIX_BLOCK)
+        padded = np.zeros((blocks, PREFIX_BLOCK))
+        padded.ravel()[:n] = centred
+        self.local1 = np.cumsum(padded, axis=1)                # prefix inside every block
+        self.nans = np.concatenate([[0], np.cumsum(nan)])
+        # length of the run of equal values ending at every row
+        rows = np.arange(n)
+        same = np.concatenate([[False], values[1:] == values[:-1]])
+        self.runs = rows - np.maximum.accumulate(np.where(same, 0, rows)) + 1
+
+    # sums of every full window ending at rows window-1 .. n-1 from the blocked prefix
+    def _window_sums(self, local, window):
+        n = self.values.size
+        flat = local.ravel()
+        if window > PREFIX_BLOCK:
+            # long windows: plain prefix of the block totals (sums are large anyway)
+            prefix = np.concatenate([[0.0], (flat + np.repeat(np.cumsum(local[:, -1]) - local[:, -1], PREFIX_BLOCK))[:n]])
+            return prefix[window:] - prefix[:-window]
+        sums = np.empty(flat.size)
+        sums[window - 1] = flat[window - 1]
+        sums[window:] = flat[window:] - flat[:-window]
+        # windows that start in the previous block miss that block's rows after the start: add its total
+        sums.reshape(local.shape)[1:, :window] += local[:-1, -1:]
+        return sums[window - 1:n]
+
+    # (sum of the centred values, no NaN) of every full window ending at rows window-1 .. n-1
+    def window(self, window):
+        s1 = self._window_sums(self.local1, window)
+        valid = (self.nans[window:] - self.nans[:-window]) == 0
+        return s1, valid
+
+    # sample variance of every full window (means = window means from the prefix sums)
+    def variance(self, window, means):
+        views = np.lib.stride_tricks.sliding_window_view(self.filled, window)
+        var = np.empty(views.shape[0])
+        step = max(1, VARIANCE_CHUNK // window)
+        for a in range(0, var.size, step):
+            deviations = views[a:a + step] - means[a:a + step, None]
+            # the second term removes the (tiny) error of the prefix sum mean
+            squares = np.einsum("ij,ij->i", deviations, deviations) - np.square(deviations.sum(axis=1)) / window
+            var[a:a + step] = np.maximum(squares, 0.0) / (window - 1)
+        var[self.runs[window - 1:] >= window] = 0.0
+        return var
+
+# min / max of every full window in O(n) whatever the window (van Herk / Gil-Werman):
+# cut the rows in blocks of `window`, a window is the suffix of one block + the prefix of the next
+def sliding_extreme(values, window, ufunc):
+    n = values.size
+    blocks = -(-n // window)
+    padded = np.full((blocks, window), -np.inf if ufunc is np.maximum else np.inf)
+    padded.ravel()[:n] = values
+    prefix = ufunc.accumulate(padded, axis=1).ravel()
+    suffix = ufunc.accumulate(padded[:, ::-1], axis=1)[:, ::-1].ravel()
+    return ufunc(suffix[:n - window + 1], prefix[window - 1:n])
+
+def rolling_into(outs, sums, window):
+    """
+    Rolling statistics of one window (rows before the first full window are NaN)
+
+    Args:
+        outs (dict): statistic -> output column (1-D view of the feature matrix)
+        sums (RollingSums): cumulative sums of the column
+        window (int): window size
+    """
+    n = sums.values.size
+    for out in outs.values():
+        out[:min(window - 1, n)] = np.nan
+    if window > n:
+        return
+    s1, valid = sums.window(window)
+    var = None
+    for stat, out in outs.items():
+        tail = out[window - 1:]
+        if stat == "mean":
+            tail[:] = s1 / window + sums.center
+        elif stat == "sum":
+            tail[:] = s1 + sums.center * window
+        elif stat in ("var", "std"):
+            if window == 1:
+                tail[:] = np.nan                   # sample variance of one value
+                continue
+            if var is None:
+                var = sums.variance(window, s1 / window + sums.center)
+            tail[:] = np.sqrt(var) if stat == "std" else var
+        else:
+            tail[:] = sliding_extreme(sums.values, window, np.minimum if stat == "min" else np.maximum)
+        tail[~valid] = np.nan
+
+# out[i] = (values[i] - values[i-1]) / values[i-1] * 100, like pct_change (missing values forward filled first)
+# with positions (row number inside its group) the fill never takes a value from the previous group
+def growth_into(out, values, positions=None):
+    nan = np.isnan(values)
+    if nan.any():
+        rows = np.arange(values.size)
+        last = np.maximum.accumulate(np.where(nan, 0, rows))
+        values = values[last]
+        if positions is not None:
+            values = np.where(last < rows - positions, np.nan, values)
+    out[0] = np.nan
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out[1:] = (values[1:] / values[:-1] - 1) * 100
+
+# running total (NaN rows stay NaN and are skipped, like cumsum), restarted at every group with positions
+def cumulative_into(out, values, positions=None):
+    nan = np.isnan(values)
+    np.cumsum(np.where(nan, 0.0, values), out=out)
+    if positions is not None:
+        starts = np.arange(values.size) - positions
+        before = np.concatenate([[0.0], out[:-1]])    # running total before every row
+        out -= before[starts]
+    out[nan] = np.nan
+
+
+def build_feature_matrix(columns, spec, positions=None):
+    """
+    Every feature of a spec in one preallocated float64 matrix
+
+    Args:
+        columns (dict): column name -> 1-D float64 array (all the same length)
+        spec: feature spec (see normalize_spec)
+        positions (np.ndarray, optional): row number inside its group for panel data
+            (rows sorted by group). Lags / windows reaching into the previous group are
+            NaN and growth / running totals restart at every group, so all groups are
+            done in the same array passes.
+
+    Returns:
+        tuple: (matrix of shape (rows, features), feature names)
+    """
+    plan = feature_plan(spec)
+    n = len(next(iter(columns.values()))) if columns else 0
+    matrix = np.empty((n, len(plan)), dtype=np.float64, order="F")   # one contiguous column per feature
+    if n == 0:
+        return matrix, [name for name, _, _, _ in plan]
+
+    sums = {}
+    rolling = {}
+    numba_kernels = use_numba()
+    groups = NO_GROUPS if positions is None else np.ascontiguousarray(positions, dtype=np.int64)
+    for j, (name, kind, column, parameter) in enumerate(plan):
+        values = columns[column]
+        out = matrix[:, j]
+        if kind == "lag" and numba_kernels:
+            lag_kernel(out, values, groups, parameter)     # shift + group mask in one pass
+        elif kind == "lag":
+            lag_into(out, values, parameter)
+            if positions is not None:
+                out[positions < parameter] = np.nan
+        elif kind == "growth":
+            growth_into(out, values, positions)
+            if positions is not None:
+                out[positions < 1] = np.nan
+        elif kind == "cumulative":
+            cumulative_into(out, values, positions)
+        else:
+            rolling.setdefault((column, parameter), {})[kind] = out
+    for (column, window), outs in rolling.items():
+        if numba_kernels:
+            # sum / mean / var / std of the window in one fused pass, min / max stay vectorized
+            empty = np.empty(0)
+            rolling_moments_kernel(np.ascontiguousarray(columns[column]), groups, window,
+                                   *[outs.pop(stat, empty) for stat in ("sum", "mean", "var", "std")])
+            if not outs:
+                continue
+        if column not in sums:
+            sums[column] = RollingSums(columns[column])
+        rolling_into(outs, sums[column], window)
+        if positions is not None:
+            for out in outs.values():
+                out[positions < window - 1] = np.nan
+    return matrix, [name for name, _, _, _ in plan]
+
+
+#---------------------------------Panel (per group) features--------------------------------#
+
+# Row number inside its group + first row of every group (codes already sorted)
+def group_positions(sorted_codes):
+    n = sorted_codes.size
+    starts = np.flatnonzero(np.concatenate([[True], sorted_codes[1:] != sorted_codes[:-1]])) if n else np.empty(0, dtype=np.int64)
+    sizes = np.diff(np.concatenate([starts, [n]]))
+    return np.arange(n) - np.repeat(starts, sizes), starts
+
+# Worker of build_panel_matrix (module level so the process pool can pickle it)
+def _panel_chunk(columns, spec, positions):
+    return build_feature_matrix(columns, spec, positions)[0]
+
+def build_panel_matrix(columns, spec, codes, order=None, workers=1, min_parallel_groups=1000):
+    """
+    Features computed inside every group (e.g. per Product_Name) in one matrix
+
+    Rows are sorted once by (group, order) and every feature is computed on
+    the sorted arrays with the group boundaries (no Python loop over the
+    groups). With workers > 1 and at least min_parallel_groups groups, whole
+    groups are split into chunks of about the same number of rows and the
+    chunks are computed in a process pool.
+
+    Args:
+        columns (dict): column name -> 1-D float64 array
+        spec: feature spec (see normalize_spec)
+        codes (np.ndarray): integer group code of every row (-1 = no group, all features NaN)
+        order (np.ndarray, optional): sort key inside a group (e.g. dates as int64), default row order
+        workers (int): processes to use
+
+    Returns:
+        tuple: (matrix in the original row order, feature names)
+    """
+    names = feature_names(spec)
+    n = codes.size
+    sort = np.lexsort((order, codes)) if order is not None else np.argsort(codes, kind="stable")
+    sorted_columns = {col: np.ascontiguousarray(values[sort]) for col, values in columns.items()}
+    positions, starts = group_positions(codes[sort])
+
+    if workers > 1 and starts.size >= min_parallel_groups:
+        # chunk bounds on group starts so no group is cut (n when a target falls in the last group)
+        targets = np.linspace(0, n, workers + 1)[1:-1]
+        starts_and_end = np.concatenate([starts, [n]])
+        bounds = np.unique(np.concatenate([[0], starts_and_end[np.searchsorted(starts, targets)], [n]]))
+        pieces = [(a, b) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+        with ProcessPoolExecutor(max_workers=min(workers, len(pieces))) as pool:
+            parts = list(pool.map(_panel_chunk,
+                                  [{col: values[a:b] for col, values in sorted_columns.items()} for a, b in pieces],
+                                  [spec] * len(pieces),
+                                  [positions[a:b] for a, b in pieces]))
+        matrix = np.concatenate(parts, axis=0) if parts else np.empty((0, len(names)))
+    else:
+        matrix, _ = build_feature_matrix(sorted_columns, spec, positions)
+
+    # back to the original row order (rows without a group get NaN, like groupby)
+    result = np.empty((n, len(names)), dtype=np.float64, order="F")
+    result[sort] = matrix
+    result[codes < 0] = np.nan
+    return result, names
@@ -0,0 +1,124 @@
+#Feature pruning before model training (leakage, constant and duplicate columns)
+
+from fnmatch import fnmatch
+import numpy as np
+import pandas as pd
+
+# Columns that are only known together with the target (same period) and leak it (fnmatch patterns)
+# e.g. Net_Profit = Revenue - Total_Cost, Revenue = Units_sold x Price, and the rolling / growth /
+# cumulative features of the target include the current value (Revenue = 3 x Revenue_MA_3 - Lag_1 - Lag_2)
+LEAKAGE_COLUMNS = {
+    'Revenue': ['Units_sold', 'Price', 'Costs_Of_Goods', 'Marketing_Cost', 'Logistic_Cost',
+                'Other_Cost', 'Total_Cost', 'Net_Profit', 'Operating_Expenses',
+                'Revenue_MA_*', 'Revenue_STD_*', 'Revenue_VAR_*', 'Revenue_SUM_*', 'Revenue_MIN_*',
+                'Revenue_MAX_*', 'Revenue_Growth', 'Revenue_Cumsum'],
+}
+
+class FeaturePruner:
+    """
+    Removes useless features before model training
+
+    Three steps, each one reported in `removed`:
+    1. Declared leakage columns of the target (see LEAKAGE_COLUMNS)
+    2. Zero (or tiny) variance columns, e.g. Initial_Investment or Day_of_Week of weekly data
+    3. Near duplicates: one correlation matrix of all the remaining columns,
+       a column correlated above the threshold with an earlier kept column is dropped
+    """
+
+    def __init__(self, variance_threshold=0.0, correlation_threshold=0.98, leakage=None):
+        """
+        Args:
+            variance_threshold (float): Columns with a variance <= this are dropped
+            correlation_threshold (float): |correlation| from which two columns are duplicates
+            leakage (list, optional): Leakage columns / patterns (default: LEAKAGE_COLUMNS of the target)
+        """
+        self.variance_threshold = variance_threshold
+        self.correlation_threshold = correlation_threshold
+        self.leakage = leakage
+        self.feature_names = None
+        self.kept = None
+        self.removed = {}
+
+    def fit(self, X, feature_names=None, target_column='Revenue'):
+        """
+        Decide which features to keep
+
+        Args:
+            X (pd.DataFrame or np.ndarray): Features
+            feature_names (list, optional): Column names when X is a NumPy matrix
+            target_column (str): Target the features are used for (picks the leakage list)
+
+        Returns:
+            FeaturePruner: self (ValueError when every feature is removed)
+        """
+        if isinstance(X, pd.DataFrame):
+            feature_names = list(X.columns)
+            X = X.to_numpy(dtype=np.float64)
+        self.feature_names = list(feature_names)
+        self.removed = {}
+
+        # Step 1: declared leakage
+        leakage = self.leakage if self.leakage is not None else LEAKAGE_COLUMNS.get(target_column, [])
+        candidates = []
+        for j, name in enumerate(self.feature_names):
+            if any(fnmatch(name, pattern) for pattern in leakage):
+                self.removed[name] = f"leaks {target_column}"
+            else:
+                candidates.append(j)
+
+        # Step 2: zero variance (all columns at once)
+        if candidates:
+            variances = np.nanvar(X[:, candidates].astype(np.float64), axis=0)
+            for j, variance in zip(list(candidates), variances):
+                if not variance > self.variance_threshold:
+                    self.removed[self.feature_names[j]] = "zero variance"
+                    candidates.remove(j)
+
+        # Step 3: correlated groups, the first column of a group is kept
+        if len(candidates) > 1:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                correlation = np.abs(np.corrcoef(X[:, candidates].astype(np.float64), rowvar=False))
+            duplicate = np.triu(np.nan_to_num(correlation) >= self.correlation_threshold, k=1)
+            dropped = np.zeros(len(candidates), dtype=bool)
+            for i in range(len(candidates)):
+                if dropped[i]:
+                    continue
+                group = np.flatnonzero(duplicate[i] & ~dropped)
+                dropped[group] = True
+                for g in group:
+                    self.removed[self.feature_names[candidates[g]]] = \
+                        f"correlated with {self.feature_names[candidates[i]]} ({correlation[i, g]:.3f})"
+            candidates = [j for j, drop in zip(candidates, dropped) if not drop]
+
+        self.kept = [self.feature_names[j] for j in candidates]
+        self._columns = np.array(candidates, dtype=np.intp)
+
+        print(f"✂️ Feature pruning: kept {len(self.kept)} of {len(self.feature_names)} features")
+        for name, reason in self.removed.items():
+            print(f"   - {name}: {reason}")
+        if not self.kept:
+            raise ValueError(f"No features left to predict {target_column} after pruning: {self.removed}")
+        return self
+
+    def transform(self, X):
+        """
+        Keep only the selected features
+
+        Args:
+            X (pd.DataFrame or np.ndarray): Features with the same columns as in fit
+
+        Returns:
+            Same type as X (a NumPy matrix stays C-contiguous with the same dtype)
+        """
+        if self.kept is None:
+            raise ValueError("Pruner not fitted yet! Call fit() first.")
+        if isinstance(X, pd.DataFrame):
+            return X[self.kept]
+        return np.ascontiguousarray(X[:, self._columns])
+
+    def fit_transform(self, X, feature_names=None, target_column='Revenue'):
+        return self.fit(X, feature_names, target_column).transform(X)
+
+    def report(self):
+        """What was kept and removed (JSON friendly)"""
+        return {'kept': self.kept, 'removed': self.removed}
@@ -0,0 +1,159 @@
+#Incremental (tail only) feature computation for appended rows
+
+import json
+import numpy as np
+import pandas as pd
+from feature_engineer import FeatureEngineer
+from feature_kernels import build_feature_matrix, cumulative_into, growth_into, normalize_spec, feature_plan
+from disk_cache import atomic_write
+
+class FeatureState:
+    """
+    Minimal state to featurize new rows without the history
+
+    For every spec column it keeps:
+    - tail: the last max(lag, window) values (enough for every lag and rolling window)
+    - total: the running total (Cumsum continues from it)
+    - last_valid: the last value after forward fill (Growth of the next row)
+
+    transform(new_rows) computes the features of the new rows from that
+    state only, in time proportional to the new rows, and the rows are the
+    same as a full recompute (lags, growth and running totals exactly, rolling
+    statistics up to float rounding). Rows must be appended in time order.
+    """
+
+    def __init__(self, spec, time_features=True):
+        self.spec = normalize_spec(spec)
+        self.time_features = time_features
+        plan = feature_plan(self.spec)
+        self.columns = list(dict.fromkeys(column for _, _, column, _ in plan))
+        self.history = max([p for _, kind, _, p in plan if kind not in ("growth", "cumulative")] + [1])
+        self.tail = {col: np.empty(0) for col in self.columns}
+        self.total = {col: 0.0 for col in self.columns}
+        self.last_valid = {col: np.nan for col in self.columns}
+        self.rows_seen = 0
+
+    # Remember what the next rows need (values must be the full column history or the new rows in order)
+    def _update(self, columns):
+        for col, values in columns.items():
+            self.tail[col] = np.concatenate([self.tail[col], values])[-self.history:]
+            valid = values[~np.isnan(values)]
+            if valid.size:
+                self.last_valid[col] = float(valid[-1])
+                self.total[col] = float(np.cumsum(np.concatenate([[self.total[col]], valid]))[-1])
+        self.rows_seen += len(next(iter(columns.values()))) if columns else 0
+
+    # time features of some rows (same as FeatureEngineer.create_time_features)
+    def _base_frame(self, dataframe):
+        engineer = FeatureEngineer(dataframe)
+        if self.time_features:
+            engineer.create_time_features()
+        return engineer.get_features_dataframe()
+
+    @classmethod
+    def fit(cls, dataframe, spec, time_features=True):
+        """
+        Featurize the full history once and keep the state
+
+        Returns:
+            tuple: (FeatureState, feature DataFrame of the history)
+        """
+        state = cls(spec, time_features)
+        engineer = FeatureEngineer(dataframe)
+        if time_features:
+            engineer.create_time_features()
+        engineer.create_features_from_spec(state.spec)
+        state._update({col: dataframe[col].to_numpy(dtype=np.float64) for col in state.columns})
+        return state, engineer.get_features_dataframe()
+
+    def transform(self, new_rows):
+        """
+        Features of appended rows from the state alone (the state moves forward)
+
+        Args:
+            new_rows (pd.DataFrame): rows after the ones already seen, same columns
+
+        Returns:
+            pd.DataFrame: new rows with the same feature columns as a full recompute
+        """
+        base = self._base_frame(new_rows)
+        new = {col: new_rows[col].to_numpy(dtype=np.float64) for col in self.columns}
+        n = len(new_rows)
+        plan = feature_plan(self.spec)
+        names = [name for name, _, _, _ in plan]
+        matrix = np.empty((n, len(plan)), dtype=np.float64, order="F")
+
+        if n:
+            # lags + rolling windows: tail + new rows, keep the new rows
+            window_plan = [i for i, (_, kind, _, _) in enumerate(plan) if kind not in ("growth", "cumulative")]
+            if window_plan:
+                extended = {col: np.concatenate([self.tail[col], new[col]]) for col in self.columns}
+                full, full_names = build_feature_matrix(extended, self.spec)
+                position = {name: j for j, name in enumerate(full_names)}
+                for i in window_plan:
+                    matrix[:, i] = full[-n:, position[names[i]]]
+            for i, (_, kind, column, _) in enumerate(plan):
+                if kind == "growth":
+                    # previous (forward filled) value in front, like the full pct_change
+                    out = np.empty(n + 1)
+                    growth_into(out, np.concatenate([[self.last_valid[column]], new[column]]))
+                    matrix[:, i] = out[1:]
+                elif kind == "cumulative":
+                    # the running total continues with the same additions as a full cumsum
+                    out = np.empty(n + 1)
+                    cumulative_into(out, np.concatenate([[self.total[column]], new[column]]))
+                    matrix[:, i] = out[1:]
+
+        self._update(new)
+        features = pd.DataFrame(matrix, columns=names, index=base.index)
+        return pd.concat([base.drop(columns=[c for c in names if c in base.columns]), features], axis=1)
+
+    def stream(self, chunks):
+        """
+        Generator of feature chunks for Date-ordered chunks of rows
+
+        Only the state is carried from one chunk to the next, so datasets
+        larger than memory are featurized chunk by chunk (e.g. the frames of
+        Dataloader.iter_chunks). Concatenating the yielded chunks gives the
+        same rows as the in-memory FeatureEngineer methods on the whole data.
+
+        Args:
+            chunks (iterable): DataFrames of consecutive rows
+
+        Yields:
+            pd.DataFrame: feature rows of every chunk
+        """
+        for chunk in chunks:
+            yield self.transform(chunk)
+
+    #-----------------------------------Persistence-----------------------------------#
+
+    def to_dict(self):
+        def floats(values):
+            return [None if np.isnan(v) else float(v) for v in values]
+        return {
+            'spec': self.spec,
+            'time_features': self.time_features,
+            'tail': {col: floats(values) for col, values in self.tail.items()},
+            'total': self.total,
+            'last_valid': {col: None if np.isnan(v) else v for col, v in self.last_valid.items()},
+            'rows_seen': self.rows_seen,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        state = cls(data['spec'], data.get('time_features', True))
+        state.tail = {col: np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+                      for col, values in data['tail'].items()}
+        state.total = {col: float(v) for col, v in data['total'].items()}
+        state.last_valid = {col: np.nan if v is None else float(v) for col, v in data['last_valid'].items()}
+        state.rows_seen = data.get('rows_seen', 0)
+        return state
+
+    def save(self, path):
+        atomic_write(path, json.dumps(self.to_dict()).encode("utf-8"))
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
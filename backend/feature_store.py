@@ -0,0 +1,100 @@
+#Disk store of engineered feature frames keyed by dataset content hash and feature recipe
+
+import hashlib
+import io
+import json
+import os
+import numpy as np
+import pandas as pd
+from disk_cache import atomic_write, touch, evict_lru
+from feature_kernels import normalize_spec
+
+# Bump when cleaning / feature code changes the stored frames
+FEATURE_STORE_VERSION = "2"
+
+# Recipe with every default filled in (same recipe = same key, whatever the JSON looked like)
+def canonical_recipe(recipe):
+    resample = recipe.get('resample')
+    return {
+        'resample': {'freq': resample.get('freq', 'W'), 'fill': resample.get('fill', 'zero')} if resample else None,
+        'time_features': bool(recipe.get('time_features', True)),
+        'features': normalize_spec(recipe.get('features', [])) if recipe.get('features') else [],
+        'drop_missing': bool(recipe.get('drop_missing', True)),
+    }
+
+
+class FeatureStore:
+    """
+    Persistent store of FeatureEngineer outputs
+
+    One columnar .npz file per (dataset hash, feature recipe, store version):
+    every column is its own array (strings as fixed width unicode + a null
+    mask), so a hit is a few array reads instead of load -> clean -> feature
+    engineering. Files are written atomically and the least recently used
+    ones are deleted when the folder grows over max_bytes.
+    """
+
+    def __init__(self, store_dir, max_bytes=512 * 1024 * 1024):
+        self.store_dir = store_dir
+        self.max_bytes = max_bytes
+        os.makedirs(self.store_dir, exist_ok=True)
+
+    # Key of one dataset + recipe
+    def make_key(self, dataset_hash, recipe):
+        payload = json.dumps({'dataset': dataset_hash,
+                              'version': FEATURE_STORE_VERSION,
+                              'recipe': canonical_recipe(recipe)}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.store_dir, f"{key}.npz")
+
+    # Stored feature DataFrame of a key (None when missing or unreadable)
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                dataframe = self._decode(data)
+        except (OSError, ValueError, KeyError):
+            return None
+        touch(path)
+        return dataframe
+
+    # Store a feature DataFrame and evict old entries if needed
+    def put(self, key, dataframe):
+        buffer = io.BytesIO()
+        np.savez(buffer, **self._encode(dataframe))
+        atomic_write(self._path(key), buffer.getvalue())
+        evict_lru(self.store_dir, self.max_bytes, keep={f"{key}.npz"})
+
+    # column i -> "c{i}" (+ "m{i}" null mask for text columns), names / kinds / index next to them
+    @staticmethod
+    def _encode(dataframe):
+        arrays = {'names': np.array([str(col) for col in dataframe.columns], dtype=str),
+                  'index': dataframe.index.to_numpy()}
+        kinds = []
+        for i, col in enumerate(dataframe.columns):
+            series = dataframe[col]
+            if pd.api.types.is_numeric_dtype(series.dtype) or pd.api.types.is_datetime64_dtype(series.dtype):
+                kinds.append("array")
+                arrays[f"c{i}"] = series.to_numpy()
+            else:
+                kinds.append("text")
+                nulls = series.isna().to_numpy()
+                arrays[f"c{i}"] = np.where(nulls, "", series.astype(str).to_numpy()).astype(str)
+                arrays[f"m{i}"] = nulls
+        arrays['kinds'] = np.array(kinds, dtype=str)
+        if arrays['index'].dtype == object:
+            arrays['index'] = np.arange(len(dataframe))
+        return arrays
+
+    @staticmethod
+    def _decode(data):
+        columns = {}
+        for i, (name, kind) in enumerate(zip(data['names'], data['kinds'])):
+            values = data[f"c{i}"]
+            if kind == "text":
+                values = values.astype(object)
+                values[data[f"m{i}"]] = None
+            columns[str(name)] = values
+        return pd.DataFrame(columns, index=data['index'])
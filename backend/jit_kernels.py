@@ -0,0 +1,142 @@
+#Optional Numba kernels (fused single pass loops) for the feature / cleaning hot loops
+
+import numpy as np
+
+try:
+    import numba
+    HAS_NUMBA = True
+except ImportError:       # plain NumPy kernels are used instead
+    numba = None
+    HAS_NUMBA = False
+
+# "numpy": vectorized array kernels (feature_kernels / pandas), "numba": the compiled loops below
+KERNEL_BACKENDS = ("numpy", "numba")
+_BACKEND = {"name": "numba" if HAS_NUMBA else "numpy"}
+
+def set_kernel_backend(name):
+    """Pick the kernels used by FeatureEngineer and DataCleaner ("numpy" or "numba")"""
+    if name not in KERNEL_BACKENDS:
+        raise ValueError(f"Unknown kernel backend '{name}', use {list(KERNEL_BACKENDS)}")
+    if name == "numba" and not HAS_NUMBA:
+        raise ValueError("The numba backend needs the numba package (pip install numba)")
+    _BACKEND["name"] = name
+
+def get_kernel_backend():
+    return _BACKEND["name"]
+
+def use_numba():
+    return _BACKEND["name"] == "numba"
+
+# Compiled without the GIL when numba is there (the functions stay plain Python otherwise)
+# error_model="numpy": x / 0 gives inf / NaN like NumPy instead of raising
+def _jit(func):
+    if not HAS_NUMBA:
+        return func
+    return numba.njit(cache=True, nogil=True, error_model="numpy")(func)
+
+# Empty positions array = one series (the kernels take arrays only, no None)
+NO_GROUPS = np.empty(0, dtype=np.int64)
+
+
+@_jit
+def lag_kernel(out, values, positions, lag):
+    """out[i] = values[i - lag], NaN when that row is before the series (or the group with positions)"""
+    grouped = positions.size > 0
+    for i in range(values.size):
+        if i >= lag and (not grouped or positions[i] >= lag):
+            out[i] = values[i - lag]
+        else:
+            out[i] = np.nan
+
+@_jit
+def rolling_moments_kernel(values, positions, window, sum_out, mean_out, var_out, std_out):
+    """
+    Rolling sum / mean / sample variance / std of one window in one pass
+
+    Welford's update adds the new value and removes the one leaving the
+    window, so there is no prefix sum and no temporary array. Windows with a
+    NaN (or reaching before the group start) are NaN and a window of equal
+    values has exactly 0 variance, like pandas. Outputs of size 0 are skipped.
+    """
+    n = values.size
+    grouped = positions.size > 0
+    nobs = 0
+    mean = 0.0
+    m2 = 0.0
+    run = 0              # length of the run of equal values ending at row i
+    previous = np.nan
+    for i in range(n):
+        if grouped and positions[i] == 0:
+            nobs = 0
+            mean = 0.0
+            m2 = 0.0
+            run = 0
+        x = values[i]
+        if x == x:
+            nobs += 1
+            delta = x - mean
+            mean += delta / nobs
+            m2 += delta * (x - mean)
+            run = run + 1 if (run > 0 and x == previous) else 1
+        else:
+            run = 0
+        previous = x
+
+        # the value leaving the window (only if it is in the same group)
+        if i >= window and (not grouped or positions[i] >= window):
+            y = values[i - window]
+            if y == y:
+                nobs -= 1
+                if nobs == 0:
+                    mean = 0.0
+                    m2 = 0.0
+                else:
+                    delta = y - mean
+                    mean -= delta / nobs
+                    m2 -= delta * (y - mean)
+
+        full = positions[i] >= window - 1 if grouped else i >= window - 1
+        if full and nobs == window:
+            var = np.nan
+            if window > 1:
+                var = 0.0 if (run >= window or m2 < 0) else m2 / (window - 1)
+            if sum_out.size:
+                sum_out[i] = mean * window
+            if mean_out.size:
+                mean_out[i] = mean
+            if var_out.size:
+                var_out[i] = var
+            if std_out.size:
+                std_out[i] = np.sqrt(var)
+        else:
+            if sum_out.size:
+                sum_out[i] = np.nan
+            if mean_out.size:
+                mean_out[i] = np.nan
+            if var_out.size:
+                var_out[i] = np.nan
+            if std_out.size:
+                std_out[i] = np.nan
+
+@_jit
+def zscore_keep_kernel(values, threshold, keep):
+    """
+    keep[i] = |values[i] - mean| / std < threshold (sample std, NaN values skipped)
+
+    One pass for the mean / std (Welford) and one for the mask, no
+    temporary arrays. NaN z-scores (NaN values, constant columns) are not
+    kept, like the pandas comparison.
+    """
+    nobs = 0
+    mean = 0.0
+    m2 = 0.0
+    for i in range(values.size):
+        x = values[i]
+        if x == x:
+            nobs += 1
+            delta = x - mean
+            mean += delta / nobs
+            m2 += delta * (x - mean)
+    std = np.sqrt(m2 / (nobs - 1)) if nobs > 1 else np.nan
+    for i in range(values.size):
+        keep[i] = abs(values[i] - mean) / std < threshold
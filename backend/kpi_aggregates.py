@@ -0,0 +1,102 @@
+#Mergeable KPI aggregates (everything get_all_kpis needs, without the rows)
+
+import pandas as pd
+import numpy as np
+from kpi_calculator import KPICalculator
+from kpi_kernels import KPIArrays, KERNEL_COLUMNS, column_total, monthly_totals, product_totals
+
+# Columns kept per month and per product
+MONTHLY_COLUMNS = ["Revenue", "Costs_Of_Goods", "Marketing_Cost", "Logistic_Cost", "Other_Cost"]
+PRODUCT_COLUMNS = ["Revenue", "Costs_Of_Goods", "Marketing_Cost"]
+
+class KPIAggregates:
+    """
+    Sufficient statistics of every KPI in KPICalculator
+
+    - rows: number of rows aggregated
+    - totals: column -> sum (revenue, costs, operating expenses, units)
+    - first_day / last_day: first and last date as int64 days (None when there are no dates)
+    - monthly: sums per month (PeriodIndex named Month, oldest first)
+    - products: sums per product (products in order of first appearance)
+
+    Aggregates of two parts of a dataset merge into the aggregates of the
+    whole, which is what partitioned, streamed or database backed KPI
+    computations need.
+    """
+
+    def __init__(self, rows, totals, first_day, last_day, monthly, products):
+        self.rows = rows
+        self.totals = totals
+        self.first_day = first_day
+        self.last_day = last_day
+        self.monthly = monthly
+        self.products = products
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        totals = {col: column_total(arrays, col) for col in KERNEL_COLUMNS if col in arrays.columns}
+        has_dates = arrays.days.size > 0
+        first_day = int(np.minimum.reduce(arrays.days)) if has_dates else None
+        last_day = int(np.maximum.reduce(arrays.days)) if has_dates else None
+
+        months, monthly_sums = monthly_totals(arrays, MONTHLY_COLUMNS)
+        monthly = pd.DataFrame(monthly_sums, columns=MONTHLY_COLUMNS,
+                               index=pd.PeriodIndex(months.astype("datetime64[M]"), freq="M", name="Month"))
+        names, product_sums = product_totals(arrays, PRODUCT_COLUMNS)
+        products = pd.DataFrame(product_sums, columns=PRODUCT_COLUMNS,
+                                index=pd.Index(names, name="Product_Name"))
+        return cls(len(arrays), totals, first_day, last_day, monthly, products)
+
+    @classmethod
+    def from_dataframe(cls, dataframe):
+        return cls.from_arrays(KPIArrays(dataframe))
+
+    # Aggregates of both parts together (self is the earlier part, for product order)
+    def merge(self, other):
+        totals = {col: self.totals.get(col, 0) + other.totals.get(col, 0)
+                  for col in dict.fromkeys(list(self.totals) + list(other.totals))}
+        firsts = [d for d in (self.first_day, other.first_day) if d is not None]
+        lasts = [d for d in (self.last_day, other.last_day) if d is not None]
+        monthly = pd.concat([self.monthly, other.monthly]).groupby(level=0).sum()
+        products = pd.concat([self.products, other.products]).groupby(level=0, sort=False).sum()
+        return KPIAggregates(self.rows + other.rows, totals,
+                             min(firsts) if firsts else None, max(lasts) if lasts else None,
+                             monthly, products)
+
+    # Every sum multiplied by a factor (estimates from a sample)
+    def scaled(self, factor):
+        return KPIAggregates(self.rows * factor,
+                             {col: value * factor for col, value in self.totals.items()},
+                             self.first_day, self.last_day,
+                             self.monthly * factor, self.products * factor)
+
+    # Merge a list of aggregates in order
+    @staticmethod
+    def merge_all(parts):
+        parts = list(parts)
+        result = parts[0]
+        for part in parts[1:]:
+            result = result.merge(part)
+        return result
+
+
+class AggregateKPICalculator(KPICalculator):
+    """KPICalculator reading KPIAggregates instead of rows (same KPI rules)"""
+
+    def __init__(self, aggregates):
+        super().__init__(None)
+        self.aggregates = aggregates
+
+    def _column_sum(self, column):
+        return self.aggregates.totals[column]
+
+    def _date_span_days(self):
+        if self.aggregates.first_day is None:
+            return 0
+        return self.aggregates.last_day - self.aggregates.first_day
+
+    def _monthly_sums(self, columns):
+        return self.aggregates.monthly[columns]
+
+    def _product_sums(self, columns):
+        return self.aggregates.products[columns]
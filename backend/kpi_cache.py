@@ -0,0 +1,49 @@
+#Disk cache of KPI results keyed by dataset content hash, KPI engine version and parameters
+
+import hashlib
+import json
+import os
+from disk_cache import atomic_write, touch, evict_lru
+from kpi_calculator import KPI_ENGINE_VERSION
+
+class KPICache:
+    """
+    Persistent cache of /analyze results
+
+    One JSON file per (dataset hash, KPI engine version, parameters). Files are
+    written atomically, so several workers can share the folder, and the least
+    recently used files are deleted when the folder grows over max_bytes.
+    Entries survive worker restarts; bumping KPI_ENGINE_VERSION invalidates
+    all of them.
+    """
+
+    def __init__(self, cache_dir, max_bytes=256 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    # Cache key of one request (parameters are serialized with sorted keys)
+    def make_key(self, dataset_hash, parameters):
+        payload = json.dumps({'dataset': dataset_hash,
+                              'engine': KPI_ENGINE_VERSION,
+                              'parameters': parameters}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    # Cached KPIs of a key (None when missing or unreadable)
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                kpis = json.load(f)
+        except (OSError, ValueError):
+            return None
+        touch(path)
+        return kpis
+
+    # Store KPIs (must already be JSON friendly) and evict old entries if needed
+    def put(self, key, kpis):
+        atomic_write(self._path(key), json.dumps(kpis).encode("utf-8"))
+        evict_lru(self.cache_dir, self.max_bytes, keep={f"{key}.json"})
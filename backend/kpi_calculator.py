@@ -1,36 +1,82 @@
 #KPI Metrics calculations
 
+import functools
 import pandas as pd
 import numpy as np 
 
+# Version of the KPI rules, bump it whenever a KPI formula changes (invalidates cached results)
+KPI_ENGINE_VERSION = "4"
+
+# KPI decorator: registers the KPI in the dependency graph and computes it once per calculator
+# name = key in get_all_kpis, depends_on = KPIs it reads, parameter = optional input (current_cash ...)
+def kpi(name, *depends_on, parameter=None):
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            key = (name, args, tuple(sorted(kwargs.items())))
+            if key not in self._kpi_cache:
+                self._kpi_cache[key] = method(self, *args, **kwargs)
+            return self._kpi_cache[key]
+        wrapper.kpi_name = name
+        wrapper.kpi_depends_on = depends_on
+        wrapper.kpi_parameter = parameter
+        return wrapper
+    return decorator
+
 class KPICalculator:
 
     def __init__(self,dataframe):
         self.df = dataframe
+        self._kpi_cache = {}  #results of the KPIs already computed
+
+    #-------------------------------Data Access---------------------------------------#
+
+    # Sum of one column (every total below goes through here)
+    def _column_sum(self, column):
+        return self.df[column].sum()
+
+    # Days between the first and the last date
+    def _date_span_days(self):
+        self.df['Date'] = pd.to_datetime(self.df['Date'])
+        return (self.df['Date'].max() - self.df['Date'].min()).days
+
+    # Sums of some columns per month (index = monthly periods, oldest first)
+    def _monthly_sums(self, columns):
+        self.df['Date'] = pd.to_datetime(self.df['Date'])
+        self.df['Month'] = self.df['Date'].dt.to_period('M')
+        return self.df.groupby('Month')[columns].sum()
+
+    # Sums of some columns per product (products in order of first appearance)
+    def _product_sums(self, columns):
+        return self.df.groupby("Product_Name", sort=False)[columns].sum()
 
     #All KPI Functions that plays an important role in the Anylasis
     
     #-------------------------------Basic Metrics--------------------------------------#
 
     # 1. Total Revenue (Refer: Sum Of Revenue column )
+    @kpi('total_revenue')
     def calculate_total_revenue(self):
-        return self.df['Revenue'].sum()
+        return self._column_sum('Revenue')
 
     # 2. Total Cost (Refer: Sum of all cost columns)
+    @kpi('total_cost')
     def calculate_total_cost(self):
-        cog = self.df["Costs_Of_Goods"].sum()
-        market = self.df["Marketing_Cost"].sum()
-        logistic = self.df["Logistic_Cost"].sum()
-        other = self.df["Other_Cost"].sum()
+        cog = self._column_sum("Costs_Of_Goods")
+        market = self._column_sum("Marketing_Cost")
+        logistic = self._column_sum("Logistic_Cost")
+        other = self._column_sum("Other_Cost")
         return cog + market + logistic + other
     
     # 3. Net Profit (Refer: Revenue - Total Cost)
+    @kpi('net_profit', 'total_revenue', 'total_cost')
     def calculate_net_profit(self):
         sales = self.calculate_total_revenue()
         costs = self.calculate_total_cost()
         return sales - costs
 
     # 4. Profit Margin % (Refer: (Profit/Revenue) × 100)
+    @kpi('profit_margin', 'total_revenue', 'net_profit')
     def calculate_profit_margin(self):
         sales = self.calculate_total_revenue()
         profit = self.calculate_net_profit()
@@ -39,36 +85,40 @@ class KPICalculator:
         return (profit/sales)*100
 
     # 5. Gross Profit (Refer: Revenue - Direct Costs only)
+    @kpi('gross_profit', 'total_revenue')
     def calculate_gross_profit(self):
         sales = self.calculate_total_revenue()
-        cog = self.df["Costs_Of_Goods"].sum()
+        cog = self._column_sum("Costs_Of_Goods")
         return sales - cog
     
     #----------------------------ADVANCED FINANCIAL METRICS-------------------------#
 
     # 6. EBITDA (Refer: Earnings Before Interest, Tax, Depreciation, Amortization)
     # Simplified: Operating Profit (assume no interest/tax in data)
+    @kpi('ebitda', 'gross_profit')
     def calculate_ebitda(self):              #(Earnings Before Interest, Tax, Depreciation, Amortization)
         gross = self.calculate_gross_profit()
-        operating = self.df["Costs_Of_Goods"].sum() + self.df["Marketing_Cost"].sum() + self.df["Logistic_Cost"].sum()
+        operating = self._column_sum("Costs_Of_Goods") + self._column_sum("Marketing_Cost") + self._column_sum("Logistic_Cost")
         return gross - operating
 
     # 7. Operating Profit (Refer: Gross Profit - Operating Expenses)
+    @kpi('operating_profit', 'gross_profit')
     def calculate_operating_profit(self):      #(Gross Profit - Operating Expenses)
         gross = self.calculate_gross_profit()
-        operating = self.df["Operating_Expenses"].sum()
+        operating = self._column_sum("Operating_Expenses")
         return gross - operating
 
     # 8. Monthly Burn Rate (Refer: Average monthly expenses)
+    @kpi('burn_rate', 'total_cost')
     def calculate_burn_rate(self): #(Monthly expenses average)
         total_costs = self.calculate_total_cost()
-        self.df['Date'] = pd.to_datetime(self.df['Date'])
-        days = (self.df['Date'].max() - self.df['Date'].min()).days
+        days = self._date_span_days()
         months = days/30.44 if days >0 else 1
         return round(total_costs/months,2)
 
     # 9. Runway (Refer: Months company can survive with current cash)
     # Assume current_cash passed separately or use profit as indicator
+    @kpi('runway_months', 'burn_rate', parameter='current_cash')
     def calculate_runway(self, current_cash=50000): #(Months remaining with current cash)
         burn = self.calculate_burn_rate()
         if burn <=0:
@@ -76,21 +126,22 @@ class KPICalculator:
         return round(current_cash/burn , 2)
 
     # 10. Break-even Point (Refer: Revenue needed where profit = 0)
+    @kpi('break_even_point', 'total_cost')
     def calculate_break_even_point(self): #(When profit = 0)
         total_expenses = self.calculate_total_cost()
         # current expenses of the business is the break-even revenue
         return round (total_expenses , 2)
 
     # 11. ROI % (Refer: Return on Investment)
+    @kpi('roi', 'net_profit', parameter='initial_investment')
     def calculate_roi(self,initial_investment=100000): #(Return on Investment %)
         profit = self.calculate_net_profit()
         return round((profit/initial_investment)*100 , 2)
 
     # 12. Revenue Growth Rate % (Refer: Month-on-month growth)
+    @kpi('revenue_growth_rate')
     def calculate_revenue_growth_rate(self): #(Month-on-month growth rate %)
-        self.df['Date'] = pd.to_datetime(self.df['Date'])
-        self.df['Month'] = self.df['Date'].dt.to_period('M')
-        monthly = self.df.groupby('Month')['Revenue'].sum()
+        monthly = self._monthly_sums(['Revenue'])['Revenue']
         if len(monthly) <2:
             return 0 
         first_month = monthly.iloc[0]
@@ -99,6 +150,7 @@ class KPICalculator:
         return round(growth,2)
 
     # 13. Expense Ratio % (Refer: Expenses as % of Revenue)
+    @kpi('expense_ratio', 'total_revenue', 'total_cost')
     def calculate_expense_ratio(self): #(Expenses as the % of Revenue %)
         revenue = self.calculate_total_revenue()
         expenses = self.calculate_total_cost()
@@ -109,16 +161,15 @@ class KPICalculator:
     #--------------------------------PRODUCT ANALYSIS-------------------------------#
 
     # 14. Room-wise Analysis (Refer: every product type performance)
+    @kpi('product_wise_analysis')
     def product_wise_analysis(self): #(peroformance of every single product)
         products = {} 
+        #revenue and costs of every product in one grouped pass
+        sums = self._product_sums(['Revenue', "Costs_Of_Goods", "Marketing_Cost"])
         #initialize  the loop for every  single product 
-        for product in self.df["Product_Name"].unique():
-            #filter the product
-            product_df = self.df[self.df["Product_Name"] == product]
-            #revenue of the product
-            revenue = product_df['Revenue'].sum()
+        for product, revenue, cog, marketing in zip(sums.index, sums['Revenue'], sums["Costs_Of_Goods"], sums["Marketing_Cost"]):
             #Cost of the product
-            cost = (product_df["Costs_Of_Goods"].sum() + product_df["Marketing_Cost"].sum())
+            cost = cog + marketing
             #profit(revenue - cost)
             profit =  revenue - cost
             #store in dictionary
@@ -130,6 +181,7 @@ class KPICalculator:
         return products
 
     #  15. Best Performing product (Refer: Highest profit room type)
+    @kpi('best_product', 'product_wise_analysis')
     def best_performing_product(self):
         analysis = self.product_wise_analysis()
         #findout the max profit product
@@ -137,6 +189,7 @@ class KPICalculator:
         return {'product':best[0], 'profit':best[1]['profit']}
 
     # 16. Worst Performing product (Refer: Lowest/negative profit)
+    @kpi('worst_product', 'product_wise_analysis')
     def worst_performing_product(self): 
         analysis = self.product_wise_analysis()
         #findout the min profit product 
@@ -147,18 +200,20 @@ class KPICalculator:
     # #--------------------------------EXPENSE BREAKDOWN------------------------------#
     
     # 17. Expense Breakdown % (Refer: Each category as % of total)
+    @kpi('expense_breakdown', 'total_cost')
     def expense_breakdown(self): #(Category-wise expenses)    
         total = self.calculate_total_cost()
         if total == 0 :
             return {}
         return {
-        "Costs_Of_Goods" : round((self.df["Costs_Of_Goods"].sum() / total) * 100,2),
-        "Marketing_Cost" : round((self.df["Marketing_Cost"].sum() / total) * 100,2),
-        "Logistic_Cost" : round((self.df["Logistic_Cost"].sum() / total) * 100,2),
-        "Other_Cost"     : round((self.df["Other_Cost"].sum() / total) * 100,2)
+        "Costs_Of_Goods" : round((self._column_sum("Costs_Of_Goods") / total) * 100,2),
+        "Marketing_Cost" : round((self._column_sum("Marketing_Cost") / total) * 100,2),
+        "Logistic_Cost" : round((self._column_sum("Logistic_Cost") / total) * 100,2),
+        "Other_Cost"     : round((self._column_sum("Other_Cost") / total) * 100,2)
         }
 
     # 18. Highest Expense Category (Refer: Which costs most)
+    @kpi('highest_expense', 'expense_breakdown')
     def highest_expense_category(self): #Which costs most 
         breakdown = self.expense_breakdown()
         if not breakdown:
@@ -169,29 +224,32 @@ class KPICalculator:
     # #----------------------------------TREND ANALYSIS-------------------------------#
     
     # 19. Monthly Revenue Trend (Refer: Revenue per month)
+    @kpi('monthly_revenue')
     def monthly_revenue_trend(self): #revenue per month
-        self.df['Date'] = pd.to_datetime(self.df['Date'])
-        self.df['Month'] = self.df['Date'].dt.to_period('M')
-        monthly = self.df.groupby('Month')["Revenue"].sum()
+        monthly = self._monthly_sums(["Revenue"])["Revenue"]
         return {str(k): round(v, 2) for k, v in monthly.items()}
     
     # 20. Monthly Profit Trend (Refer: Profit per month)
+    @kpi('monthly_profit')
     def monthly_profit_trend(self): #profit per month
-        self.df['Date'] = pd.to_datetime(self.df['Date'])
-        self.df['Month'] = self.df['Date'].dt.to_period('M')
+        monthly = self._monthly_sums(['Revenue',"Costs_Of_Goods","Marketing_Cost","Logistic_Cost","Other_Cost"])
 
-        monthly_revenue = self.df.groupby('Month')['Revenue'].sum()
-        monthly_expenses = self.df.groupby('Month')[
-            ["Costs_Of_Goods","Marketing_Cost","Logistic_Cost","Other_Cost"]].sum().sum(axis=1)
+        monthly_revenue = monthly['Revenue']
+        monthly_expenses = monthly[
+            ["Costs_Of_Goods","Marketing_Cost","Logistic_Cost","Other_Cost"]].sum(axis=1)
         
         monthly_profit = monthly_revenue -monthly_expenses
         return {str(k):round(v,2) for k ,v in monthly_profit.items()}
         
     # 21. Growth Trajectory (Refer: Is business growing or declining?)
+    @kpi('growth_trajectory', 'monthly_revenue')
     def growth_trajectory(self): #(Increasing/Decreasing) means is business growing or declining?
         trend = self.monthly_revenue_trend()
         #convert the trend values into list
         values = list(trend.values())
+        #less than two months has no halves to compare (e.g. a filter selecting one month)
+        if len(values) < 2:
+            return "Stable"
         #average of the first half
         first_half = values[:len(values)//2] 
         first_avg = sum(first_half ) / len(first_half)
@@ -209,16 +267,30 @@ class KPICalculator:
             return "Stable"
 
     # 22. Seasonal Analysis (Refer: Quarter-wise performance)
+    @kpi('seasonal_analysis')
     def seasonal_analysis(self): #(Quarter-wise performance)
-        self.df["Date"] = pd.to_datetime(self.df['Date'])
-        self.df["Quarter"] = self.df["Date"].dt.quarter
-        quartly = self.df.groupby("Quarter")['Revenue'].sum()
+        monthly = self._monthly_sums(['Revenue'])['Revenue']
+        #roll the months up into their quarter number
+        quartly = monthly.groupby(monthly.index.quarter).sum()
         return {f'Q{k}': round(v,2) for k,v in quartly.items()}
+
+    # 22b. Year-over-year Seasonal Analysis (Refer: every quarter of every year vs the same quarter last year)
+    @kpi('seasonal_by_year')
+    def seasonal_by_year(self): #(Q1 2020 and Q1 2021 are kept apart)
+        monthly = self._monthly_sums(['Revenue'])['Revenue']
+        quartly = monthly.groupby([monthly.index.year, monthly.index.quarter]).sum()
+        result = {}
+        for (year, quarter), revenue in quartly.items():
+            last_year = quartly.get((year - 1, quarter))
+            growth = round((revenue - last_year) / last_year * 100, 2) if last_year else None
+            result[f'{year}-Q{quarter}'] = {'revenue': round(revenue,2), 'yoy_growth': growth}
+        return result
     
     
     # #--------------------------------INVESTMENT READINESS---------------------------#
     
     # 23. Scalability Score 0-100 (Refer: Can business scale?)
+    @kpi('scalability_score', 'revenue_growth_rate', 'profit_margin', 'expense_ratio')
     def calculate_scalability_score(self): #(0-100) means can business scale 
         growth = self.calculate_revenue_growth_rate()
         margin = self.calculate_profit_margin()
@@ -241,6 +313,7 @@ class KPICalculator:
         return min(score,100)
 
     # 24. Risk Score 0-100 (Refer: Investment risk - lower is better)
+    @kpi('risk_score', 'profit_margin', 'burn_rate', 'total_revenue', 'growth_trajectory')
     def calculate_risk_score(self):  #(0-100) means Investment risk - Lower is better 
         margin = self.calculate_profit_margin()
         burn = self.calculate_burn_rate()
@@ -261,6 +334,7 @@ class KPICalculator:
         return max(0,min(risk ,100))
 
     # 25. IPO Readiness 0-100 (Refer: Ready for public offering?)
+    @kpi('ipo_readiness', 'profit_margin', 'total_revenue', 'revenue_growth_rate', 'growth_trajectory')
     def calculate_ipo_readiness(self): #(0-100) means is it ready for the public offering
         #Factors Depends : probability , growth ,scale
         profit = self.calculate_profit_margin()
@@ -284,6 +358,7 @@ class KPICalculator:
         return min(score,100)
 
     # 26. Shark Tank Score 0-100 (Refer: Would sharks invest?)
+    @kpi('shark_tank_score', 'profit_margin', 'revenue_growth_rate', 'scalability_score', 'risk_score')
     def calculate_shark_tank_score(self):  #(0-100) means Would sharks invest?
         margin = self.calculate_profit_margin() 
         growth = self.calculate_revenue_growth_rate()
@@ -306,6 +381,7 @@ class KPICalculator:
         return min(int(score),100)
 
     #  27. Expansion Recommendation (Refer: Should expand?)
+    @kpi('expansion_recommendation', 'profit_margin', 'revenue_growth_rate', 'risk_score', 'growth_trajectory')
     def expansion_recommendation(self): #(Yes/No with reasons) means should expand 
         margin = self.calculate_profit_margin() 
         growth = self.calculate_revenue_growth_rate()
@@ -345,22 +421,25 @@ class KPICalculator:
     #-------------------------------ADDITIONAL METRICS----------------------------#
         
     # 28. Customer Acquisition Cost (CAC) (Refer: Marketing / New Customers)
+    @kpi('customer_acquisition_cost')
     def calculate_cac(self):
-        marketing = self.df["Marketing_Cost"].sum()
-        units_sold = self.df["Units_sold"].sum()
+        marketing = self._column_sum("Marketing_Cost")
+        units_sold = self._column_sum("Units_sold")
         if units_sold == 0:
             return 0
         return round(marketing/units_sold,2)
 
      # 29. Average Revenue Per Booking (Refer: Revenue / Total Units_sold)
+    @kpi('avg_revenue_per_booking', 'total_revenue')
     def calculate_avg_revenue_per_booking(self):
         revenue = self.calculate_total_revenue()
-        units_sold  = self.df["Units_sold"].sum()
+        units_sold  = self._column_sum("Units_sold")
         if units_sold == 0 :
             return 0 
         return round(revenue / units_sold, 2)
 
     # 30. Operating Efficiency Ratio (Refer: Operating Profit / Revenue)
+    @kpi('operating_efficiency', 'total_revenue', 'operating_profit')
     def calculate_operating_efficiency(self):
         revenue = self.calculate_total_revenue()
         operating_efficiency = self.calculate_operating_profit()
@@ -369,6 +448,7 @@ class KPICalculator:
         return round((operating_efficiency/revenue)*100,2)
 
     # 31. Cash Flow Health (Refer: Positive/Negative/Neutral)
+    @kpi('cash_flow_health', 'net_profit', 'burn_rate')
     def cash_flow_health(self):
         profit = self.calculate_net_profit()
         burn = self.calculate_burn_rate()
@@ -383,6 +463,7 @@ class KPICalculator:
             return "Poor - Negative Cash Flow"
         
     # 32. Market Position Indicator (Refer: Based on growth & profitability)
+    @kpi('market_position', 'revenue_growth_rate', 'profit_margin')
     def market_position_indicator(self):
         growth = self.calculate_revenue_growth_rate()
         margin = self.calculate_profit_margin()
@@ -400,52 +481,48 @@ class KPICalculator:
 
     #----------------------------------FINAL MASTER FUNCTION------------------------------#
 
+    # Names of all the KPIs in get_all_kpis order
+    @classmethod
+    def available_kpis(cls):
+        return list(KPI_GRAPH)
+
+    # KPIs needed for the requested ones (dependencies first, every KPI listed once)
+    @classmethod
+    def resolve_kpis(cls, fields):
+        unknown = [name for name in fields if name not in KPI_GRAPH]
+        if unknown:
+            raise ValueError(f"Unknown KPIs: {unknown}")
+        order = []
+        def visit(name):
+            if name in order:
+                return
+            for dependency in KPI_GRAPH[name][1]:
+                visit(dependency)
+            order.append(name)
+        for name in fields:
+            visit(name)
+        return order
+
+    # Get only the requested KPIs (Refer: computes the transitive dependencies, each exactly once)
+    def get_kpis(self, fields=None, **parameters):
+        fields = self.available_kpis() if fields is None else list(fields)
+        values = {}
+        for name in self.resolve_kpis(fields):
+            method_name, _, parameter = KPI_GRAPH[name]
+            method = getattr(self, method_name)
+            if parameter in parameters:
+                values[name] = method(**{parameter: parameters[parameter]})
+            else:
+                values[name] = method()
+        return {name: values[name] for name in fields}
+
     # Get ALL KPIs (Refer: Complete report calling all the fucntions)
-    def get_all_kpis(self):
-        return {
-            # Basic
-            'total_revenue': self.calculate_total_revenue(),
-            'total_cost': self.calculate_total_cost(),
-            'net_profit': self.calculate_net_profit(),
-            'profit_margin': self.calculate_profit_margin(),
-            'gross_profit': self.calculate_gross_profit(),
-            
-            # Advanced Financial
-            'ebitda': self.calculate_ebitda(),
-            'operating_profit': self.calculate_operating_profit(),
-            'burn_rate': self.calculate_burn_rate(),
-            'runway_months': self.calculate_runway(),
-            'break_even_point': self.calculate_break_even_point(),
-            'roi': self.calculate_roi(),
-            'revenue_growth_rate': self.calculate_revenue_growth_rate(),
-            'expense_ratio': self.calculate_expense_ratio(),
-            
-            # Product Analysis
-            'product_wise_analysis': self.product_wise_analysis(),
-            'best_product': self.best_performing_product(),
-            'worst_product': self.worst_performing_product(),
-            
-            # Expense
-            'expense_breakdown': self.expense_breakdown(),
-            'highest_expense': self.highest_expense_category(),
-            
-            # Trends
-            'monthly_revenue': self.monthly_revenue_trend(),
-            'monthly_profit': self.monthly_profit_trend(),
-            'growth_trajectory': self.growth_trajectory(),
-            'seasonal_analysis': self.seasonal_analysis(),
-            
-            # Investment
-            'scalability_score': self.calculate_scalability_score(),
-            'risk_score': self.calculate_risk_score(),
-            'ipo_readiness': self.calculate_ipo_readiness(),
-            'shark_tank_score': self.calculate_shark_tank_score(),
-            'expansion_recommendation': self.expansion_recommendation(),
-            
-            # Bonus
-            'customer_acquisition_cost': self.calculate_cac(),
-            'avg_revenue_per_booking': self.calculate_avg_revenue_per_booking(),
-            'operating_efficiency': self.calculate_operating_efficiency(),
-            'cash_flow_health': self.cash_flow_health(),
-            'market_position': self.market_position_indicator()
-        }
\ No newline at end of file
+    def get_all_kpis(self, **parameters):
+        return self.get_kpis(None, **parameters)
+
+
+# KPI dependency graph: name -> (method name, KPIs it depends on, parameter), in get_all_kpis order
+KPI_GRAPH = {
+    method.kpi_name: (attr, method.kpi_depends_on, method.kpi_parameter)
+    for attr, method in vars(KPICalculator).items() if hasattr(method, "kpi_name")
+}
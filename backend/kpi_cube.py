@@ -0,0 +1,113 @@
+#Calendar OLAP cube (year x quarter x month x product) for trend queries
+
+import pandas as pd
+from kpi_calculator import KPICalculator
+
+# Measures kept in every cell
+CUBE_COLUMNS = ["Revenue", "Units_sold", "Costs_Of_Goods", "Marketing_Cost",
+                "Logistic_Cost", "Other_Cost", "Operating_Expenses"]
+CUBE_LEVELS = ["Year", "Quarter", "Month", "Product_Name"]
+
+class KPICube:
+    """
+    Pre-aggregated sums per (Year, Quarter, Month, Product_Name)
+
+    Built once per dataset with one groupby. Every trend, seasonality and
+    product-over-time question is then a roll-up of the cells (a groupby over
+    a few thousand cells instead of the raw rows). Rows without a valid date
+    are kept in cells with Year = Quarter = Month = 0 so totals and product
+    figures still include them; time roll-ups skip those cells.
+    """
+
+    def __init__(self, dataframe):
+        dates = pd.to_datetime(dataframe["Date"])
+        keys = pd.DataFrame({
+            "Year": dates.dt.year.fillna(0).astype(int),
+            "Quarter": dates.dt.quarter.fillna(0).astype(int),
+            "Month": dates.dt.month.fillna(0).astype(int),
+            "Product_Name": dataframe["Product_Name"],
+        }, index=dataframe.index)
+        columns = [col for col in CUBE_COLUMNS if col in dataframe.columns]
+        self.cells = dataframe[columns].groupby([keys[level] for level in CUBE_LEVELS]).sum()
+        self.columns = columns
+        self.product_order = list(pd.unique(dataframe["Product_Name"].dropna()))
+        self.first_date = dates.min()
+        self.last_date = dates.max()
+
+    # Sum the cells over every level not listed (levels=[] gives the grand totals)
+    def rollup(self, levels, columns=None, dated_only=False):
+        columns = self.columns if columns is None else columns
+        cells = self.cells[columns]
+        if dated_only:
+            cells = cells[cells.index.get_level_values("Year") > 0]
+        if not levels:
+            return cells.sum()
+        return cells.groupby(level=levels).sum()
+
+    # Sums per calendar month (PeriodIndex, oldest first)
+    def monthly(self, columns=None):
+        table = self.rollup(["Year", "Month"], columns, dated_only=True)
+        index = pd.PeriodIndex([pd.Period(year=y, month=m, freq="M") for y, m in table.index], name="Month")
+        return table.set_axis(index)
+
+    # Sums per (year, quarter), e.g. "2021-Q1" (Q1 2020 and Q1 2021 stay apart)
+    def quarterly(self, columns=None):
+        table = self.rollup(["Year", "Quarter"], columns, dated_only=True)
+        return table.set_axis([f"{y}-Q{q}" for y, q in table.index])
+
+    # Sums per quarter number over all years (classic seasonality)
+    def seasonal(self, columns=None):
+        return self.rollup(["Quarter"], columns, dated_only=True)
+
+    # Year-over-year view of one measure: {quarter: {year: value, ...}} + growth vs the same quarter last year
+    def year_over_year(self, column="Revenue"):
+        table = self.rollup(["Quarter", "Year"], [column], dated_only=True)[column]
+        result = {}
+        for quarter, values in table.groupby(level="Quarter"):
+            values = values.droplevel("Quarter")
+            result[f"Q{quarter}"] = {}
+            for year, value in values.items():
+                last_year = values.get(year - 1)
+                growth = round((value - last_year) / last_year * 100, 2) if last_year else None
+                result[f"Q{quarter}"][str(year)] = {'value': round(value, 2), 'yoy_growth': growth}
+        return result
+
+    # One product (or all) over time at month / quarter / year granularity
+    def product_trend(self, product=None, column="Revenue", freq="M"):
+        levels = {"M": ["Product_Name", "Year", "Month"],
+                  "Q": ["Product_Name", "Year", "Quarter"],
+                  "Y": ["Product_Name", "Year"]}
+        if freq not in levels:
+            raise ValueError(f"Unknown frequency '{freq}', use one of {list(levels)}")
+        table = self.rollup(levels[freq], [column], dated_only=True)[column]
+        if product is not None:
+            if product not in self.product_order:
+                raise ValueError(f"Unknown product '{product}'")
+            table = table.loc[[product]]
+        label = {"M": lambda k: f"{k[1]}-{k[2]:02d}", "Q": lambda k: f"{k[1]}-Q{k[2]}", "Y": lambda k: str(k[1])}[freq]
+        trend = {}
+        for key, value in table.items():
+            trend.setdefault(key[0], {})[label(key)] = round(value, 2)
+        return trend
+
+
+class CubeKPICalculator(KPICalculator):
+    """KPICalculator answering every KPI from a KPICube (trend KPIs are roll-ups of the cells)"""
+
+    def __init__(self, cube):
+        super().__init__(None)
+        self.cube = cube
+
+    def _column_sum(self, column):
+        return self.cube.rollup([], [column])[column]
+
+    def _date_span_days(self):
+        if pd.isna(self.cube.first_date):
+            return 0
+        return (self.cube.last_date - self.cube.first_date).days
+
+    def _monthly_sums(self, columns):
+        return self.cube.monthly(columns)
+
+    def _product_sums(self, columns):
+        return self.cube.rollup(["Product_Name"], columns).reindex(self.cube.product_order)
@@ -0,0 +1,151 @@
+#Multi-core map-reduce execution of the KPIs
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+from data_loader import Dataloader
+from kpi_aggregates import KPIAggregates, AggregateKPICalculator
+
+# Smallest byte range worth sending to another process
+MIN_PARTITION_BYTES = 8 * 1024 * 1024
+
+#---------------------------------Worker functions----------------------------------#
+# (module level so the process pool can pickle them)
+
+# Partial aggregates of one partition of an already cleaned dataframe
+def _dataframe_aggregates(frame):
+    return KPIAggregates.from_dataframe(frame)
+
+# One hash per raw row (duplicates across partitions / blocks)
+# numbers hashed as float64 so 5 and 5.0 from partitions with different dtypes still match
+def row_hashes(df):
+    numeric = df.select_dtypes(include=["number"])
+    raw = df.astype({col: np.float64 for col in numeric.columns})
+    return pd.util.hash_pandas_object(raw, index=False).to_numpy()
+
+# Pass 1 over a byte range: numeric sums / counts (for the global fill values) + one hash per raw row (for duplicates)
+def _range_statistics(filepath, start, end):
+    df = Dataloader(filepath).load_csv_range(start, end)
+    numeric = df.select_dtypes(include=["number"])
+    return numeric.sum(), numeric.count(), row_hashes(df)
+
+# Pass 2 over a byte range: the DataCleaner steps with the global fill values / duplicate flags, then the aggregates
+def _range_aggregates(filepath, start, end, fill_values, duplicated):
+    df = Dataloader(filepath).load_csv_range(start, end)
+    fills = {col: fill_values.get(col, "Unknown") for col in df.columns}
+    df = df.fillna(fills)[~duplicated]
+    if "Date" in df.columns:
+        df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+    return KPIAggregates.from_dataframe(df)
+
+
+class ParallelKPIExecutor:
+    """
+    Map-reduce KPI computation over a process pool
+
+    map: every partition is turned into KPIAggregates in its own process
+    reduce: the aggregates are merged in partition order
+    finish: AggregateKPICalculator derives the usual KPI dict
+
+    Two inputs are supported:
+    - aggregate_dataframe: a cleaned dataframe split into row or date partitions
+    - aggregate_file: a csv split into byte ranges; every worker reads and cleans
+      its own range, so the rows never go through the parent process. Cleaning
+      needs two things of the whole file (column means for the missing values,
+      duplicates across ranges), so the file is read twice: pass 1 returns the
+      sums / counts and a hash per row, pass 2 cleans and aggregates.
+
+    Results match KPICalculator on the cleaned data (sums are added in another
+    order, so floats can differ in the last bits). One known difference of the
+    file path: duplicates are found on the raw rows, so a row with a missing
+    value and a row already holding the fill value are not treated as equal.
+    """
+
+    def __init__(self, workers=None, partitions=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.partitions = partitions or self.workers
+
+    # Run one worker function over a list of argument tuples (in the parent when there is only one)
+    def _map(self, function, arguments):
+        if len(arguments) == 1 or self.workers == 1:
+            return [function(*args) for args in arguments]
+        with ProcessPoolExecutor(max_workers=min(self.workers, len(arguments))) as pool:
+            return list(pool.map(function, *zip(*arguments)))
+
+    def aggregate_dataframe(self, dataframe, partition_by="rows"):
+        """
+        KPIAggregates of a cleaned dataframe computed partition by partition
+
+        Args:
+            dataframe: cleaned data (DataCleaner.clean_all)
+            partition_by: "rows" (consecutive rows) or "date" (consecutive date ranges)
+
+        Returns:
+            KPIAggregates: the merged aggregates of all partitions
+        """
+        if partition_by == "rows":
+            positions = np.arange(len(dataframe))
+        elif partition_by == "date":
+            positions = np.argsort(pd.to_datetime(dataframe["Date"]).to_numpy(), kind="stable")
+        else:
+            raise ValueError(f"Unknown partitioning '{partition_by}', use 'rows' or 'date'")
+
+        parts = [p for p in np.array_split(positions, max(min(self.partitions, len(dataframe)), 1)) if p.size]
+        if not parts:
+            return KPIAggregates.from_dataframe(dataframe)
+        results = self._map(_dataframe_aggregates, [(dataframe.iloc[np.sort(p)],) for p in parts])
+        aggregates = KPIAggregates.merge_all(results)
+
+        if partition_by == "date":
+            # products back in order of first appearance in the rows, like the single-core path
+            order = pd.unique(dataframe["Product_Name"].dropna())
+            aggregates.products = aggregates.products.reindex([p for p in order if p in aggregates.products.index])
+        return aggregates
+
+    # Byte ranges covering the data lines of a file (at least MIN_PARTITION_BYTES each)
+    def _byte_ranges(self, filepath):
+        size = os.path.getsize(filepath)
+        with open(filepath, "rb") as f:
+            data_start = len(f.readline())
+        count = int(max(min(self.partitions, -(-(size - data_start) // MIN_PARTITION_BYTES)), 1))
+        bounds = np.linspace(data_start, size, count + 1).astype(np.int64)
+        return [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:])]
+
+    def aggregate_file(self, filepath):
+        """
+        KPIAggregates of a csv file, loaded and cleaned in parallel byte ranges
+
+        Args:
+            filepath: path of the csv file
+
+        Returns:
+            KPIAggregates: same figures as Dataloader + DataCleaner.clean_all + KPIAggregates
+        """
+        ranges = self._byte_ranges(filepath)
+
+        # pass 1: global column means and duplicate flags
+        stats = self._map(_range_statistics, [(filepath, a, b) for a, b in ranges])
+        numeric_parts = [s for s, _, h in stats if h.size]
+        common = set.intersection(*(set(s.index) for s in numeric_parts)) if numeric_parts else set()
+        sums = pd.concat([s for s, _, _ in stats], axis=1).sum(axis=1)
+        counts = pd.concat([c for _, c, _ in stats], axis=1).sum(axis=1)
+        fill_values = {col: sums[col] / counts[col] if counts[col] > 0 else np.nan for col in common}
+        hashes = [h for _, _, h in stats]
+        duplicated = pd.Series(np.concatenate(hashes)).duplicated().to_numpy()
+        flags = np.split(duplicated, np.cumsum([h.size for h in hashes])[:-1])
+
+        # pass 2: clean + aggregate every range
+        results = self._map(_range_aggregates,
+                            [(filepath, a, b, fill_values, f) for (a, b), f in zip(ranges, flags)])
+        return KPIAggregates.merge_all(results)
+
+    def get_kpis(self, source, fields=None, partition_by="rows", **parameters):
+        """
+        KPI dict of a csv path or a cleaned dataframe (same keys as KPICalculator.get_kpis)
+        """
+        if isinstance(source, pd.DataFrame):
+            aggregates = self.aggregate_dataframe(source, partition_by)
+        else:
+            aggregates = self.aggregate_file(source)
+        return AggregateKPICalculator(aggregates).get_kpis(fields, **parameters)
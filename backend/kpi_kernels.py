@@ -0,0 +1,135 @@
+#Pure NumPy KPI kernels (no pandas Series / groupby in the hot path)
+
+import pandas as pd
+import numpy as np
+from kpi_calculator import KPICalculator
+
+# Money / count columns used by the KPIs
+KERNEL_COLUMNS = ["Revenue", "Costs_Of_Goods", "Marketing_Cost", "Logistic_Cost",
+                  "Other_Cost", "Operating_Expenses", "Units_sold"]
+
+class KPIArrays:
+    """
+    One dataset as contiguous NumPy arrays
+
+    - row_days / valid_date: Date as int64 days since 1970-01-01 for every row + which rows have a date
+    - days: the int64 days of the rows with a valid date
+    - months: month number since 1970-01 of those rows (= pandas monthly Period ordinal)
+    - product_codes / product_names: Product_Name as integer codes, names in order of first appearance
+    - columns: every KPI column as float64 (missing values count as 0, like pandas sum)
+    - integer: the KPI columns that are integers in the dataframe (their sums come back as int64, like pandas)
+    """
+
+    def __init__(self, dataframe):
+        dates = pd.to_datetime(dataframe["Date"])
+        self.valid_date = dates.notna().to_numpy()
+        self.row_days = dates.to_numpy().astype("datetime64[D]").astype(np.int64)
+        self._set_days()
+
+        codes, names = pd.factorize(dataframe["Product_Name"])
+        self.product_codes = codes.astype(np.intp)
+        self.product_names = np.asarray(names, dtype=object)
+
+        self.columns = {}
+        self.integer = set()
+        for col in KERNEL_COLUMNS:
+            if col in dataframe.columns:
+                if pd.api.types.is_integer_dtype(dataframe[col].dtype):
+                    self.integer.add(col)
+                values = np.ascontiguousarray(dataframe[col].to_numpy(dtype=np.float64))
+                if np.isnan(values).any():
+                    values = np.where(np.isnan(values), 0.0, values)
+                self.columns[col] = values
+
+    # days / months of the rows with a valid date
+    def _set_days(self):
+        self.days = self.row_days[self.valid_date]
+        self.months = self.days.astype("datetime64[D]").astype("datetime64[M]").astype(np.int64)
+
+    # Number of rows
+    def __len__(self):
+        return self.row_days.size
+
+    # New KPIArrays with only some rows (positions or boolean mask), product codes stay the same
+    def take(self, rows):
+        subset = object.__new__(KPIArrays)
+        subset.valid_date = self.valid_date[rows]
+        subset.row_days = self.row_days[rows]
+        subset._set_days()
+        subset.product_codes = self.product_codes[rows]
+        subset.product_names = self.product_names
+        subset.integer = self.integer
+        subset.columns = {col: np.ascontiguousarray(values[rows]) for col, values in self.columns.items()}
+        return subset
+
+
+# float64 sums of an integer column back to int64 (exact below 2**53, like the pandas int64 sums)
+def _as_column_dtype(arrays, column, sums):
+    return sums.astype(np.int64) if column in arrays.integer else sums
+
+# Total of one column
+def column_total(arrays, column):
+    return _as_column_dtype(arrays, column, np.add.reduce(arrays.columns[column]))
+
+# Days between the first and the last valid date
+def date_span_days(arrays):
+    if arrays.days.size == 0:
+        return 0
+    return int(np.maximum.reduce(arrays.days) - np.minimum.reduce(arrays.days))
+
+# Sums per month with np.bincount (returns month ordinals present in the data + one sum array per column)
+def monthly_totals(arrays, columns):
+    if arrays.months.size == 0:
+        return np.empty(0, dtype=np.int64), {col: np.empty(0) for col in columns}
+    first = np.minimum.reduce(arrays.months)
+    slots = arrays.months - first
+    counts = np.bincount(slots)
+    present = np.flatnonzero(counts)
+    sums = {}
+    for col in columns:
+        values = arrays.columns[col][arrays.valid_date]
+        sums[col] = _as_column_dtype(arrays, col, np.bincount(slots, weights=values, minlength=counts.size)[present])
+    return present + first, sums
+
+# Sums per product with np.bincount (returns the product names present in the rows + one sum array per column)
+# rows without a product name are skipped, like groupby; products come in order of first appearance in these rows
+def product_totals(arrays, columns):
+    has_product = arrays.product_codes >= 0
+    codes = arrays.product_codes[has_product]
+    # codes present in these rows + the first row of every one of them
+    present, first = np.unique(codes, return_index=True)
+    present = present[np.argsort(first, kind="stable")]
+    size = arrays.product_names.size
+    sums = {col: _as_column_dtype(arrays, col, np.bincount(codes, weights=arrays.columns[col][has_product],
+                                                           minlength=size)[present])
+            for col in columns}
+    return arrays.product_names[present], sums
+
+
+class NumpyKPICalculator(KPICalculator):
+    """
+    KPICalculator running on KPIArrays instead of pandas
+
+    Only the data access methods are replaced; every KPI rule is inherited, so
+    the results are the same numbers and types as the pandas path (sums of
+    integer columns come back as int64).
+    """
+
+    def __init__(self, dataframe, arrays=None):
+        super().__init__(dataframe)
+        self.arrays = KPIArrays(dataframe) if arrays is None else arrays
+
+    def _column_sum(self, column):
+        return column_total(self.arrays, column)
+
+    def _date_span_days(self):
+        return date_span_days(self.arrays)
+
+    def _monthly_sums(self, columns):
+        months, sums = monthly_totals(self.arrays, columns)
+        index = pd.PeriodIndex(months.astype("datetime64[M]"), freq="M", name="Month")
+        return pd.DataFrame(sums, index=index, columns=columns)
+
+    def _product_sums(self, columns):
+        names, sums = product_totals(self.arrays, columns)
+        return pd.DataFrame(sums, index=pd.Index(names, name="Product_Name"), columns=columns)
@@ -0,0 +1,194 @@
+#Progressive, sample based KPI preview for huge uploads
+
+import os
+import numpy as np
+import pandas as pd
+from data_loader import Dataloader
+from data_cleaner import DataCleaner
+from kpi_kernels import KPIArrays
+from kpi_aggregates import KPIAggregates, AggregateKPICalculator
+from kpi_executor import row_hashes
+
+class KPIPreview:
+    """
+    Approximate KPIs within a second, refined until they are exact
+
+    1. A random sample of rows is read by seeking to random byte offsets
+       (no full read). The aggregates of the sample are scaled up to the
+       estimated number of rows and every KPICalculator metric is computed
+       from them.
+    2. The file is then scanned in blocks. After each block the scanned part
+       is exact and only the part not scanned yet is estimated, from the
+       sample rows that lie in it. When the scan ends nothing is estimated
+       and the result equals the exact pipeline.
+
+    Blocks are cleaned like ParallelKPIExecutor.aggregate_file cleans byte
+    ranges: duplicates are found from raw row hashes shared by all the blocks
+    and missing numbers get the column mean of the whole file. That mean is
+    only known at the end, so every block is aggregated twice, once with the
+    missing values as 0 and once as 1 where a value is missing; the scanned
+    part is zeros + mean x missing (with the running mean until the scan ends).
+
+    Confidence intervals come from a bootstrap over the sample rows of the
+    part not scanned yet, so they shrink as the scan goes on and collapse
+    to the exact value at the end.
+    """
+
+    def __init__(self, filepath, sample_size=2000, chunk_bytes=64 * 1024 * 1024,
+                 bootstrap=40, confidence=0.95, seed=42):
+        self.loader = Dataloader(filepath)
+        self.total_bytes = os.path.getsize(filepath)
+        self.sample_size = sample_size
+        self.chunk_bytes = chunk_bytes
+        self.bootstrap = bootstrap
+        self.confidence = confidence
+        self.rng = np.random.default_rng(seed)
+        self.seed = seed
+        self.arrays = None
+
+    # Random sample of the file, cleaned without dropping rows (offsets must stay aligned)
+    def _load_sample(self):
+        sample, self.offsets, self.line_bytes = self.loader.sample_rows(self.sample_size, seed=self.seed)
+        cleaner = DataCleaner(sample)
+        cleaner.handle_missing_values()
+        cleaner.format_dates()
+        self.arrays = KPIArrays(cleaner.get_dataframe())
+        with open(self.loader.filepath, "rb") as f:
+            self.header_bytes = len(f.readline())
+
+    # Aggregates of a raw block without its duplicate rows: (missing numbers as 0, 1 where a number is missing)
+    @staticmethod
+    def _block_aggregates(chunk, duplicated):
+        df = chunk[~duplicated]
+        numeric = list(df.select_dtypes(include=["number"]).columns)
+        df = df.fillna({col: "Unknown" for col in df.columns if col not in numeric})
+        if "Date" in df.columns:
+            df["Date"] = pd.to_datetime(df["Date"], errors="coerce")
+        missing = df[numeric].isna()
+        zeros = KPIAggregates.from_dataframe(df.fillna({col: 0 for col in numeric}))
+        if not missing.to_numpy().any():
+            return zeros, None
+        indicators = df.assign(**{col: missing[col].astype(np.float64) for col in numeric})
+        return zeros, KPIAggregates.from_dataframe(indicators)
+
+    # Scanned part with the missing numbers filled with the given column means
+    # (only the columns that have missing values change, the others keep their int sums)
+    @staticmethod
+    def _filled(zeros, missing, means):
+        if missing is None:
+            return zeros
+        filled = KPIAggregates(zeros.rows, dict(zeros.totals), zeros.first_day, zeros.last_day,
+                               zeros.monthly.copy(), zeros.products.copy())
+        for col, count in missing.totals.items():
+            if count > 0:
+                filled.totals[col] = zeros.totals[col] + means[col] * count
+                for part, missing_part in ((filled.monthly, missing.monthly), (filled.products, missing.products)):
+                    if col in part.columns:
+                        part[col] = part[col] + missing_part[col].reindex(part.index, fill_value=0) * means[col]
+        return filled
+
+    # Exact part + scaled estimate of the rest
+    @staticmethod
+    def _combine(exact, rest):
+        if exact is None:
+            return rest
+        if rest is None:
+            return exact
+        return exact.merge(rest)
+
+    # Aggregates of the part not scanned yet, estimated from some sample rows
+    def _rest_estimate(self, rows, remaining_bytes):
+        estimated_rows = remaining_bytes / self.line_bytes[rows].mean()
+        rest = KPIAggregates.from_arrays(self.arrays.take(rows))
+        return rest.scaled(estimated_rows / len(rows)), estimated_rows
+
+    # Scalar numeric KPIs of a result (the ones that get an interval)
+    @staticmethod
+    def _numeric(kpis):
+        return {name: float(value) for name, value in kpis.items()
+                if isinstance(value, (int, float, np.number)) and not isinstance(value, (bool, np.bool_))}
+
+    # KPIs, intervals and progress for a given scan position
+    def _estimate(self, exact, scanned_bytes):
+        remaining_bytes = max(self.total_bytes - scanned_bytes, 0)
+        rows = np.flatnonzero(self.offsets >= scanned_bytes)
+        if rows.size == 0 and remaining_bytes > 0:
+            rows = np.arange(len(self.arrays))  # no sample row left in the rest, use the whole sample
+
+        if remaining_bytes == 0 or rows.size == 0:
+            kpis = AggregateKPICalculator(exact).get_all_kpis()
+            numeric = self._numeric(kpis)
+            intervals = {name: [value, value] for name, value in numeric.items()}
+            return self._result(kpis, intervals, exact.rows, exact.rows, 1.0, True)
+
+        rest, estimated_rows = self._rest_estimate(rows, remaining_bytes)
+        kpis = AggregateKPICalculator(self._combine(exact, rest)).get_all_kpis()
+
+        # bootstrap the sample rows of the rest
+        numeric = self._numeric(kpis)
+        replicates = {name: [] for name in numeric}
+        for _ in range(self.bootstrap):
+            resampled = self.rng.choice(rows, size=rows.size, replace=True)
+            rest_b, _ = self._rest_estimate(resampled, remaining_bytes)
+            values = self._numeric(AggregateKPICalculator(self._combine(exact, rest_b)).get_all_kpis())
+            for name in replicates:
+                if name in values:
+                    replicates[name].append(values[name])
+        tail = (1 - self.confidence) / 2 * 100
+        intervals = {name: [float(np.nanpercentile(values, tail)), float(np.nanpercentile(values, 100 - tail))]
+                     for name, values in replicates.items() if values}
+
+        scanned_rows = exact.rows if exact is not None else 0
+        progress = (scanned_bytes - self.header_bytes) / max(self.total_bytes - self.header_bytes, 1)
+        return self._result(kpis, intervals, scanned_rows, scanned_rows + estimated_rows, progress, False)
+
+    def _result(self, kpis, intervals, scanned_rows, estimated_rows, progress, exact):
+        return {
+            'kpis': kpis,
+            'confidence_intervals': intervals,
+            'confidence': self.confidence,
+            'rows_scanned': int(scanned_rows),
+            'estimated_rows': int(round(estimated_rows)),
+            'progress': round(min(max(progress, 0.0), 1.0), 4),
+            'exact': exact
+        }
+
+    def estimate(self):
+        """
+        First estimate, from the random sample only
+
+        Returns:
+            dict: kpis, confidence_intervals ({kpi: [low, high]}), progress (0.0), exact (False)
+        """
+        if self.arrays is None:
+            self._load_sample()
+        if len(self.arrays) == 0:
+            raise ValueError("No rows could be sampled from the file")
+        return self._estimate(None, self.header_bytes)
+
+    def progressive(self):
+        """
+        Generator of estimates: the sample estimate first, then one per scanned block
+
+        The last item has exact=True and equals the full computation.
+        """
+        yield self.estimate()
+        zeros = missing = sums = counts = None
+        seen = set()
+        for chunk, scanned_bytes in self.loader.iter_chunks(self.chunk_bytes):
+            # duplicates inside the block and of rows of the earlier blocks
+            hashes = row_hashes(chunk)
+            duplicated = pd.Series(hashes).duplicated().to_numpy() | \
+                np.fromiter((h in seen for h in hashes.tolist()), dtype=bool, count=hashes.size)
+            seen.update(hashes.tolist())
+
+            # column sums / counts of the raw rows (the fill value is the mean before duplicates are dropped)
+            numeric = chunk.select_dtypes(include=["number"])
+            sums = numeric.sum() if sums is None else sums.add(numeric.sum(), fill_value=0)
+            counts = numeric.count() if counts is None else counts.add(numeric.count(), fill_value=0)
+
+            block_zeros, block_missing = self._block_aggregates(chunk, duplicated)
+            zeros = block_zeros if zeros is None else zeros.merge(block_zeros)
+            if block_missing is not None:
+                missing = block_missing if missing is None else missing.merge(block_missing)
+            yield self._estimate(self._filled(zeros, missing, sums / counts), scanned_bytes)
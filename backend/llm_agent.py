@@ -11,13 +11,14 @@ class LLMAgent:
 
     # Updated llm_agent.py - generate_recommendations function
 
-    def generate_recommendations(self, kpis, business_profile=None):
+    def generate_recommendations(self, kpis, business_profile=None, benchmarks=None):
         """
         Generate recommendations with business profile context
         
         Args:
             kpis (dict): KPI metrics
             business_profile (dict, optional): Business profile from entry questions
+            benchmarks (dict, optional): Industry percentiles from BusinessDatabase.get_benchmarks
         """
         
         # Build business context if profile provided
@@ -41,6 +42,17 @@ class LLMAgent:
             - Their specific concerns
             """
         
+        # Build peer comparison if benchmarks provided (real percentiles of the same industry)
+        benchmark_context = "No peer data available for this industry yet."
+        if benchmarks and benchmarks.get('benchmarks'):
+            lines = []
+            for metric, b in benchmarks['benchmarks'].items():
+                direction = "higher is better" if b['higher_is_better'] else "lower is better"
+                lines.append(f"• {metric}: {b['value']} → {b['percentile']}th percentile "
+                             f"(industry p25 {b['p25']:.2f}, median {b['median']:.2f}, p75 {b['p75']:.2f}, "
+                             f"{direction}, {b['peers']} peers)")
+            benchmark_context = f"Industry: {benchmarks.get('industry')}\n            " + "\n            ".join(lines)
+
         business_info = f"""
         BUSINESS KPI SUMMARY     
         {profile_context}
@@ -89,6 +101,9 @@ class LLMAgent:
             • Operating Efficiency: {kpis['operating_efficiency']}%
             • Cash Flow Health: {kpis['cash_flow_health']}
             • Market Position: {kpis['market_position']}
+
+            # 🏁 INDUSTRY BENCHMARKS (percentile among peers of the same industry)
+            {benchmark_context}
             """
         
         #LLM prompt that guide it 
@@ -153,7 +168,7 @@ class LLMAgent:
         "business_context_analysis": {{
             "profile_summary": "{business_profile if business_profile else 'No profile provided'}",
             "contextual_insights": "Analyze how the business’s goals, funding needs, and concerns affect recommendations.",
-            "industry_comparison": "Comment how this business stands vs typical industry performance patterns"
+            "industry_comparison": "Compare this business with its peers using the INDUSTRY BENCHMARKS percentiles (fall back to typical industry patterns only when no peer data is available)"
         }},
 
         "alerts_and_risks": {{
@@ -1,169 +1,200 @@
 
 
-from sklearn.model_selection import train_test_split
+from sklearn.model_selection import train_test_split, TimeSeriesSplit
 from sklearn.linear_model import LinearRegression
 from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+from sklearn.base import MultiOutputMixin
+from sklearn.multioutput import MultiOutputRegressor
 from sklearn.metrics import mean_absolute_error, mean_squared_error, r2_score
+from joblib import Parallel, delayed
 import joblib
 import numpy as np
 import os
+import time
+
+# Candidate models tried by train_models: name -> function returning a new (unfitted) model
+# add or remove entries here (or pass candidates= to MLPredictor) to change the candidates
+CANDIDATE_MODELS = {
+    'Linear Regression': lambda: LinearRegression(),
+    'Random Forest': lambda: RandomForestRegressor(n_estimators=100, max_depth=10, random_state=42, n_jobs=-1),
+    'Gradient Boosting': lambda: GradientBoostingRegressor(n_estimators=100, max_depth=5, random_state=42),
+}
+
+def fit_model(model, X, y):
+    """Fit a candidate (one model per horizon if it has a single output, float64 for least squares)"""
+    if np.ndim(y) == 2 and not isinstance(model, MultiOutputMixin):
+        # e.g. boosting has one output per model: one model per horizon
+        model = MultiOutputRegressor(model)
+    if isinstance(model, LinearRegression) and isinstance(X, np.ndarray) and X.dtype != np.float64:
+        # least squares needs float64 (a float32 matrix is only widened for this model)
+        X = X.astype(np.float64)
+    model.fit(X, y)
+    return model
+
+def score(y_true, y_pred):
+    return {
+        'MAE': round(float(mean_absolute_error(y_true, y_pred)), 2),
+        'RMSE': round(float(np.sqrt(mean_squared_error(y_true, y_pred))), 2),
+        'R2': round(float(r2_score(y_true, y_pred)), 4) if len(y_true) > 1 else None,   # undefined on one row
+    }
+
+# Rows of a DataFrame / Series or of a NumPy array by position
+def take_rows(data, index):
+    return data.iloc[index] if hasattr(data, 'iloc') else data[index]
+
+def fit_candidate(name, model, X, y, train, test):
+    """
+    Fit one candidate and score it on the test rows (runs in a worker process)
+    
+    X and y are the whole data, shared by every task (memory mapped, not
+    copied per task), the rows of the task are sliced here.
+    
+    Args:
+        train (np.ndarray): Positions of the training rows
+        test (np.ndarray): Positions of the test rows
+    
+    Returns:
+        tuple: (name, fitted model, metrics dict, wall time in seconds)
+    """
+    start = time.perf_counter()
+    model = fit_model(model, take_rows(X, train), take_rows(y, train))
+    y_pred = model.predict(take_rows(X, test))
+    seconds = time.perf_counter() - start
+    
+    metrics = score(take_rows(y, test), y_pred)
+    metrics['train_seconds'] = round(seconds, 3)
+    return name, model, metrics, seconds
+
+# A new candidate for a pool of `workers` fits: its own thread pool (n_jobs) is one thread when
+# several fits already run side by side, so processes x threads do not oversubscribe the cores
+def new_candidate(factory, workers):
+    model = factory()
+    if workers > 1 and 'n_jobs' in model.get_params():
+        model.set_params(n_jobs=1)
+    return model
+
+# Largest number of walk-forward folds (<= n_splits) that leaves every fold >= 2 test rows (R2 needs two)
+# and >= 2 training rows
+def walk_forward_splits(n_rows, n_splits, gap=0):
+    for k in range(n_splits, 1, -1):
+        test_size = n_rows // (k + 1)
+        if test_size >= 2 and n_rows - gap - k * test_size >= 2:
+            return k
+    raise ValueError(f"Not enough rows ({n_rows}) for walk-forward validation")
 
 class MLPredictor:
     """
     Machine Learning Predictor for business forecasting
     
-    Supports:
+    Supports (see CANDIDATE_MODELS):
     - Linear Regression
     - Random Forest
     - Gradient Boosting
     
-    Automatically selects best model based on R² score
+    The candidates are fitted at the same time in worker processes and the
+    best model is selected automatically based on R² score
     """
     
-    def __init__(self):
-        """Initialize ML models"""
+    def __init__(self, candidates=None, workers=None):
+        """
+        Initialize ML models
+        
+        Args:
+            candidates (dict, optional): name -> model factory (default CANDIDATE_MODELS)
+            workers (int, optional): Processes for the fits (default: one per fit, at most one per core)
+        """
+        self.candidates = dict(CANDIDATE_MODELS if candidates is None else candidates)
+        self.workers = workers
+        self.models = {}
         self.linear_model = None
         self.rf_model = None
         self.gb_model = None
         self.best_model = None
         self.best_model_name = None
         self.feature_names = None
+        self.horizons = 1         # periods predicted at once (direct multi-horizon model when > 1)
+        self.target_name = None
         self.metrics = {}
+        self.timings = {}
         
         print("✅ MLPredictor initialized")
     
-    def train_models(self, X, y, test_size=0.2):
+    def train_models(self, X, y, test_size=0.2, feature_names=None):
         """
         Train multiple ML models and select the best one
         
         Args:
-            X (pd.DataFrame): Features
-            y (pd.Series): Target variable
+            X (pd.DataFrame or np.ndarray): Features (a C-contiguous float32 matrix from
+                prepare_ml_data(as_array=True) goes to the tree models without any copy)
+            y (pd.Series or np.ndarray): Target variable, or a (rows, horizons) matrix of the
+                target 0..horizons-1 periods ahead (see FeatureEngineer.prepare_horizon_targets)
+                for a direct multi-horizon model
             test_size (float): Proportion of data for testing (default: 0.2)
+            feature_names (list, optional): Column names when X is a NumPy matrix
             
         Returns:
-            dict: Dictionary containing metrics for all models
+            dict: Dictionary containing metrics for all models (+ train_seconds of every model)
         """
         print("\n" + "=" * 60)
         print("TRAINING ML MODELS")
         print("=" * 60)
         
         # Store feature names for future predictions
-        self.feature_names = list(X.columns)
+        if isinstance(X, np.ndarray):
+            self.feature_names = list(feature_names) if feature_names is not None \
+                else [f"feature_{i}" for i in range(X.shape[1])]
+        else:
+            self.feature_names = list(X.columns)
+        self.horizons = y.shape[1] if np.ndim(y) == 2 else 1
+        self.target_name = getattr(y, 'name', None) or 'Revenue'
         
-        # Split data into train and test sets
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=test_size, random_state=42
+        # Split data into train and test sets (positions, the workers slice the shared X / y)
+        train, test = train_test_split(
+            np.arange(len(X)), test_size=test_size, random_state=42
         )
         
         print(f"\n📊 Data Split:")
-        print(f"   Training set: {len(X_train)} rows ({(1-test_size)*100:.0f}%)")
-        print(f"   Testing set: {len(X_test)} rows ({test_size*100:.0f}%)")
+        print(f"   Training set: {len(train)} rows ({(1-test_size)*100:.0f}%)")
+        print(f"   Testing set: {len(test)} rows ({test_size*100:.0f}%)")
         print(f"   Features: {X.shape[1]}")
         
-        # ===== MODEL 1: LINEAR REGRESSION =====
-        print("\n" + "-" * 60)
-        print("🔹 Training Linear Regression...")
-        print("-" * 60)
-        
-        self.linear_model = LinearRegression()
-        self.linear_model.fit(X_train, y_train)
-        
-        y_pred_linear = self.linear_model.predict(X_test)
-        
-        mae_linear = mean_absolute_error(y_test, y_pred_linear)
-        rmse_linear = np.sqrt(mean_squared_error(y_test, y_pred_linear))
-        r2_linear = r2_score(y_test, y_pred_linear)
-        
-        self.metrics['linear_regression'] = {
-            'MAE': round(mae_linear, 2),
-            'RMSE': round(rmse_linear, 2),
-            'R2': round(r2_linear, 4)
-        }
-        
-        print(f"Linear Regression Results:")
-        print(f"   MAE (Mean Absolute Error): ₹{mae_linear:,.2f}")
-        print(f"   RMSE (Root Mean Squared Error): ₹{rmse_linear:,.2f}")
-        print(f"   R² Score: {r2_linear:.4f}")
-        
-        # ===== MODEL 2: RANDOM FOREST =====
-        print("\n" + "-" * 60)
-        print("🔹 Training Random Forest...")
-        print("-" * 60)
-        
-        self.rf_model = RandomForestRegressor(
-            n_estimators=100,
-            max_depth=10,
-            random_state=42,
-            n_jobs=-1
-        )
-        self.rf_model.fit(X_train, y_train)
-        
-        y_pred_rf = self.rf_model.predict(X_test)
-        
-        mae_rf = mean_absolute_error(y_test, y_pred_rf)
-        rmse_rf = np.sqrt(mean_squared_error(y_test, y_pred_rf))
-        r2_rf = r2_score(y_test, y_pred_rf)
-        
-        self.metrics['random_forest'] = {
-            'MAE': round(mae_rf, 2),
-            'RMSE': round(rmse_rf, 2),
-            'R2': round(r2_rf, 4)
-        }
-        
-        print(f"Random Forest Results:")
-        print(f"   MAE (Mean Absolute Error): ₹{mae_rf:,.2f}")
-        print(f"   RMSE (Root Mean Squared Error): ₹{rmse_rf:,.2f}")
-        print(f"   R² Score: {r2_rf:.4f}")
-        
-        # ===== MODEL 3: GRADIENT BOOSTING =====
-        print("\n" + "-" * 60)
-        print("🔹 Training Gradient Boosting...")
-        print("-" * 60)
-        
-        self.gb_model = GradientBoostingRegressor(
-            n_estimators=100,
-            max_depth=5,
-            random_state=42
+        # ===== ALL CANDIDATES AT ONCE =====
+        # large matrices are memory mapped read-only into the workers instead of copied per model
+        workers = self._workers(len(self.candidates))
+        print(f"\n🔹 Training {len(self.candidates)} models on {workers} worker(s): {list(self.candidates)}")
+        start = time.perf_counter()
+        results = Parallel(n_jobs=workers, max_nbytes='1M', mmap_mode='r')(
+            delayed(fit_candidate)(name, new_candidate(factory, workers), X, y, train, test)
+            for name, factory in self.candidates.items()
         )
-        self.gb_model.fit(X_train, y_train)
-        
-        y_pred_gb = self.gb_model.predict(X_test)
-        
-        mae_gb = mean_absolute_error(y_test, y_pred_gb)
-        rmse_gb = np.sqrt(mean_squared_error(y_test, y_pred_gb))
-        r2_gb = r2_score(y_test, y_pred_gb)
-        
-        self.metrics['gradient_boosting'] = {
-            'MAE': round(mae_gb, 2),
-            'RMSE': round(rmse_gb, 2),
-            'R2': round(r2_gb, 4)
-        }
+        wall = time.perf_counter() - start
+        
+        self.models, self.metrics, self.timings = {}, {}, {}
+        for name, model, metrics, seconds in results:
+            key = name.lower().replace(' ', '_')
+            self.models[name] = model
+            self.metrics[key] = metrics
+            self.timings[name] = round(seconds, 3)
+            
+            print("\n" + "-" * 60)
+            print(f"{name} Results:")
+            print(f"   MAE (Mean Absolute Error): ₹{metrics['MAE']:,.2f}")
+            print(f"   RMSE (Root Mean Squared Error): ₹{metrics['RMSE']:,.2f}")
+            print(f"   R² Score: {metrics['R2']:.4f}")
+            print(f"   Training time: {seconds:.2f}s")
+        print(f"\n⏱️ All models trained in {wall:.2f}s (sum of the fits {sum(self.timings.values()):.2f}s)")
         
-        print(f"Gradient Boosting Results:")
-        print(f"   MAE (Mean Absolute Error): ₹{mae_gb:,.2f}")
-        print(f"   RMSE (Root Mean Squared Error): ₹{rmse_gb:,.2f}")
-        print(f"   R² Score: {r2_gb:.4f}")
+        self._set_model_attributes()
         
         # ===== SELECT BEST MODEL =====
         print("\n" + "=" * 60)
         print("MODEL SELECTION")
         print("=" * 60)
         
-        r2_scores = {
-            'Linear Regression': r2_linear,
-            'Random Forest': r2_rf,
-            'Gradient Boosting': r2_gb
-        }
+        r2_scores = {name: self.metrics[name.lower().replace(' ', '_')]['R2'] for name in self.models}
         
         self.best_model_name = max(r2_scores, key=r2_scores.get)
-        
-        if self.best_model_name == 'Linear Regression':
-            self.best_model = self.linear_model
-        elif self.best_model_name == 'Random Forest':
-            self.best_model = self.rf_model
-        else:
-            self.best_model = self.gb_model
+        self.best_model = self.models[self.best_model_name]
         
         print(f"\n🏆 Best Model: {self.best_model_name}")
         print(f"   R² Score: {r2_scores[self.best_model_name]:.4f}")
@@ -171,6 +202,98 @@ class MLPredictor:
         
         return self.metrics
     
+    # linear_model / rf_model / gb_model = the fitted models of self.models (None when not fitted)
+    def _set_model_attributes(self):
+        self.linear_model = self.models.get('Linear Regression')
+        self.rf_model = self.models.get('Random Forest')
+        self.gb_model = self.models.get('Gradient Boosting')
+    
+    # processes for a number of independent fits
+    def _workers(self, tasks):
+        workers = self.workers if self.workers is not None else (os.cpu_count() or 1)
+        return max(1, min(workers, tasks))
+    
+    def train_walk_forward(self, X, y, n_splits=5, feature_names=None):
+        """
+        Select the best model with walk-forward (expanding window) validation
+        
+        Rows must be in time order. Fold k trains on every row before its test
+        block, so no model sees the future. Every (candidate, fold) fit runs as
+        its own task in a process pool, the model with the lowest mean MAE
+        over the folds wins and is refitted on all the rows.
+        With horizon targets (2-D y) the last horizons-1 training rows of a
+        fold are left out, their targets would reach into the test block.
+        
+        Args:
+            X (pd.DataFrame or np.ndarray): Features in time order
+            y (pd.Series or np.ndarray): Target (or (rows, horizons) matrix)
+            n_splits (int): Number of folds (fewer when there are not enough rows)
+            feature_names (list, optional): Column names when X is a NumPy matrix
+            
+        Returns:
+            dict: metrics per model: mean MAE / RMSE / R2, train_seconds and the metrics of every fold
+        """
+        print("\n" + "=" * 60)
+        print("WALK-FORWARD VALIDATION")
+        print("=" * 60)
+        
+        if isinstance(X, np.ndarray):
+            self.feature_names = list(feature_names) if feature_names is not None \
+                else [f"feature_{i}" for i in range(X.shape[1])]
+        else:
+            self.feature_names = list(X.columns)
+            X = X.to_numpy()
+        self.horizons = y.shape[1] if np.ndim(y) == 2 else 1
+        self.target_name = getattr(y, 'name', None) or 'Revenue'
+        y = np.asarray(y, dtype=np.float64)
+        
+        gap = self.horizons - 1
+        folds = list(TimeSeriesSplit(n_splits=walk_forward_splits(len(X), n_splits, gap), gap=gap).split(X))
+        tasks = [(name, factory, k, train, test) for name, factory in self.candidates.items()
+                 for k, (train, test) in enumerate(folds)]
+        workers = self._workers(len(tasks))
+        print(f"\n📊 {len(folds)} folds x {len(self.candidates)} models = {len(tasks)} fits on {workers} worker(s)")
+        
+        start = time.perf_counter()
+        results = Parallel(n_jobs=workers, max_nbytes='1M', mmap_mode='r')(
+            delayed(fit_candidate)(name, new_candidate(factory, workers), X, y, train, test)
+            for name, factory, k, train, test in tasks
+        )
+        wall = time.perf_counter() - start
+        
+        self.metrics, self.timings = {}, {}
+        for (name, _, k, train, test), (_, _, fold_metrics, seconds) in zip(tasks, results):
+            key = name.lower().replace(' ', '_')
+            entry = self.metrics.setdefault(key, {'name': name, 'folds': []})
+            entry['folds'].append({'fold': k + 1, 'train_rows': len(train), 'test_rows': len(test), **fold_metrics})
+            self.timings[name] = round(self.timings.get(name, 0.0) + seconds, 3)
+        for key, entry in self.metrics.items():
+            for metric in ('MAE', 'RMSE', 'R2'):
+                values = [fold[metric] for fold in entry['folds'] if fold[metric] is not None]
+                entry[metric] = round(float(np.mean(values)), 4 if metric == 'R2' else 2) if values else None
+            entry['train_seconds'] = self.timings[entry['name']]
+            
+            print("\n" + "-" * 60)
+            print(f"{entry['name']} Results (mean of {len(entry['folds'])} folds):")
+            print(f"   MAE (Mean Absolute Error): ₹{entry['MAE']:,.2f}")
+            print(f"   RMSE (Root Mean Squared Error): ₹{entry['RMSE']:,.2f}")
+            print(f"   R² Score: {entry['R2']}")
+            print(f"   Training time: {entry['train_seconds']:.2f}s")
+        print(f"\n⏱️ All folds trained in {wall:.2f}s (sum of the fits {sum(self.timings.values()):.2f}s)")
+        
+        # ===== SELECT BEST MODEL (lowest mean out-of-sample error), refit on all rows =====
+        best_key = min(self.metrics, key=lambda key: self.metrics[key]['MAE'])
+        self.best_model_name = self.metrics[best_key]['name']
+        self.best_model = fit_model(self.candidates[self.best_model_name](), X, y)
+        self.models = {self.best_model_name: self.best_model}
+        self._set_model_attributes()      # only the refitted model, the fold models are not kept
+        
+        print("\n" + "=" * 60)
+        print(f"🏆 Best Model: {self.best_model_name} (mean MAE ₹{self.metrics[best_key]['MAE']:,.2f})")
+        print("=" * 60)
+        
+        return self.metrics
+    
     def save_model(self, filepath='models/sales_predictor.pkl'):
         """
         Save the best trained model to disk
@@ -187,6 +310,8 @@ class MLPredictor:
                 'model': self.best_model,
                 'model_name': self.best_model_name,
                 'feature_names': self.feature_names,
+                'horizons': self.horizons,
+                'target_name': self.target_name,
                 'metrics': self.metrics
             }
             
@@ -210,6 +335,8 @@ class MLPredictor:
             self.best_model = model_data['model']
             self.best_model_name = model_data['model_name']
             self.feature_names = model_data['feature_names']
+            self.horizons = model_data.get('horizons', 1)
+            self.target_name = model_data.get('target_name', 'Revenue')
             self.metrics = model_data['metrics']
             
             print(f"\n✅ Model loaded successfully: {filepath}")
@@ -237,34 +364,29 @@ class MLPredictor:
     
     def predict_next_periods(self, last_features, num_periods=6):
         """
-        Predict future periods (simplified approach)
+        Predict future periods with the direct multi-horizon model
         
-        Note: This is a basic implementation. For production, use proper
-        time series forecasting with updated lag features.
+        The model was trained on horizon targets (FeatureEngineer.prepare_horizon_targets,
+        a 1-D target is one horizon): last_features is the feature row of the next
+        period (FeatureEngineer.forecast_origin) and all the periods come out of one
+        predict call, no prediction is fed back as a feature.
         
         Args:
-            last_features (np.array or pd.Series): Features from the last known period
-            num_periods (int): Number of future periods to predict
+            last_features (np.array or pd.Series): Feature row of the period to predict first
+            num_periods (int): Number of future periods to predict (at most the trained horizons)
             
         Returns:
             list: Predicted values for next N periods
         """
         if self.best_model is None:
             raise ValueError("Model not trained yet! Call train_models() first.")
+        if num_periods > self.horizons:
+            raise ValueError(f"Model was trained for {self.horizons} periods, {num_periods} requested")
         
         print(f"\n📈 Generating predictions for next {num_periods} periods...")
         
-        predictions = []
-        current_features = np.array(last_features).reshape(1, -1)
-        
-        for period in range(num_periods):
-            # Predict next value
-            pred = self.best_model.predict(current_features)[0]
-            predictions.append(round(pred, 2))
-            
-            # Note: In production, update lag features here
-            # For now, keeping features constant (simplified)
-        
+        current_features = np.array(last_features, dtype=np.float64).reshape(1, -1)
+        predictions = [round(float(p), 2) for p in np.ravel(self.best_model.predict(current_features))[:num_periods]]
         print(f"✅ Predictions generated: {predictions}")
         return predictions
     
@@ -279,7 +401,11 @@ class MLPredictor:
             dict: Feature names and their importance scores
         """
         if self.best_model_name in ['Random Forest', 'Gradient Boosting']:
-            importances = self.best_model.feature_importances_
+            if hasattr(self.best_model, 'estimators_') and isinstance(self.best_model, MultiOutputRegressor):
+                # one boosting model per horizon: average importance
+                importances = np.mean([m.feature_importances_ for m in self.best_model.estimators_], axis=0)
+            else:
+                importances = self.best_model.feature_importances_
             
             feature_importance = dict(zip(self.feature_names, importances))
             
@@ -320,7 +446,8 @@ if __name__ == "__main__":
         'Customers': np.random.randint(50, 200, n_samples)
     })
     
-    y = pd.Series(np.random.randint(20000, 60000, n_samples), name='Revenue')
+    # Revenue of the next 6 periods (direct multi-horizon targets)
+    y = np.random.randint(20000, 60000, (n_samples, 6)).astype(float)
     
     print(f"\n📊 Sample Data:")
     print(f"   Features: {X.shape}")
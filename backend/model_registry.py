@@ -0,0 +1,87 @@
+#Versioned registry of trained models keyed by business, dataset content hash and training spec
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime
+from disk_cache import touch, evict_lru
+from ml_predictor import MLPredictor
+
+# Bump when the training code changes the registered models
+MODEL_REGISTRY_VERSION = "2"
+
+class ModelRegistry:
+    """
+    Trained forecasting models on disk, one folder per (business, dataset hash, training spec)
+
+    A folder holds model.pkl (MLPredictor.save_model format) and meta.json
+    (metrics, training time, feature names ...). It is written under a
+    temporary name and renamed into place, so a request never loads a half
+    written model and two workers training the same key do not corrupt each
+    other. Folders are LRU evicted when the registry grows over max_bytes.
+    """
+
+    def __init__(self, registry_dir, max_bytes=1024 * 1024 * 1024):
+        self.registry_dir = registry_dir
+        self.max_bytes = max_bytes
+        os.makedirs(self.registry_dir, exist_ok=True)
+
+    # Key of one business + dataset + training spec (spec serialized with sorted keys)
+    def make_key(self, business_id, dataset_hash, spec):
+        payload = json.dumps({'business': business_id,
+                              'dataset': dataset_hash,
+                              'version': MODEL_REGISTRY_VERSION,
+                              'spec': spec}, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.registry_dir, key)
+
+    # Metadata of a registered model (None when missing)
+    def get_meta(self, key):
+        try:
+            with open(os.path.join(self._path(key), "meta.json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    # (MLPredictor with the model loaded, metadata) of a key, None when missing or unreadable
+    def get(self, key):
+        meta = self.get_meta(key)
+        if meta is None:
+            return None
+        predictor = MLPredictor()
+        predictor.load_model(os.path.join(self._path(key), "model.pkl"))
+        if predictor.best_model is None:
+            return None
+        touch(self._path(key))
+        return predictor, meta
+
+    def put(self, key, predictor, meta):
+        """
+        Register a trained model (an existing entry of the same key is kept)
+
+        Args:
+            key (str): make_key of the model
+            predictor (MLPredictor): trained predictor
+            meta (dict): JSON friendly metadata (created_at and key are added)
+
+        Returns:
+            dict: the stored metadata
+        """
+        meta = {**meta, 'key': key, 'created_at': datetime.now().isoformat(timespec='seconds')}
+        tmp_dir = tempfile.mkdtemp(dir=self.registry_dir, prefix=".tmp-")
+        try:
+            predictor.save_model(os.path.join(tmp_dir, "model.pkl"))
+            with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            try:
+                os.rename(tmp_dir, self._path(key))
+            except OSError:
+                pass          # another worker registered the same key first
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        evict_lru(self.registry_dir, self.max_bytes, keep={key})
+        return meta
@@ -0,0 +1,267 @@
+#Portfolio KPI calculations (many businesses in one pass)
+
+import pandas as pd
+import numpy as np
+
+COST_COLUMNS = ["Costs_Of_Goods", "Marketing_Cost", "Logistic_Cost", "Other_Cost"]
+
+class PortfolioKPICalculator:
+    """
+    Same KPIs as KPICalculator.get_all_kpis, but for a whole portfolio at once
+
+    The dataframe is one long frame with a business key column. Every sum is a
+    grouped sum, and the rule based scores are evaluated as array expressions
+    over all businesses instead of one KPICalculator per business.
+    """
+
+    def __init__(self, dataframe, business_col="Business_ID", current_cash=50000, initial_investment=100000):
+        if business_col not in dataframe.columns:
+            raise ValueError(f"Business column '{business_col}' not found in data")
+        self.df = dataframe
+        self.business_col = business_col
+        self.current_cash = current_cash
+        self.initial_investment = initial_investment
+
+    #---------------------------------GROUPED AGGREGATES-------------------------------#
+
+    # Column totals for every business (one row per business)
+    def _totals(self):
+        columns = ["Revenue", "Operating_Expenses", "Units_sold"] + COST_COLUMNS
+        return self.df.groupby(self.business_col)[columns].sum()
+
+    # Months covered by every business (same 30.44 days rule as calculate_burn_rate)
+    def _months_covered(self, dates):
+        span = dates.groupby(self.df[self.business_col]).agg(["min", "max"])
+        days = (span["max"] - span["min"]).dt.days
+        return pd.Series(np.where(days > 0, days / 30.44, 1), index=span.index)
+
+    # Revenue and cost per (business, month), months sorted inside every business
+    def _monthly(self, dates):
+        months = dates.dt.to_period("M").rename("Month")
+        return self.df.groupby([self.df[self.business_col], months])[["Revenue"] + COST_COLUMNS].sum()
+
+    # Revenue per (business, quarter number)
+    def _quarterly(self, dates):
+        quarters = dates.dt.quarter.rename("Quarter")
+        return self.df.groupby([self.df[self.business_col], quarters])["Revenue"].sum()
+
+    # Revenue and cost per (business, product), products in order of first appearance
+    def _products(self):
+        products = self.df.groupby([self.business_col, "Product_Name"], sort=False)[
+            ["Revenue", "Costs_Of_Goods", "Marketing_Cost"]].sum()
+        products["Cost"] = products["Costs_Of_Goods"] + products["Marketing_Cost"]
+        products["Profit"] = products["Revenue"] - products["Cost"]
+        return products
+
+    # Revenue per (business, year, quarter) + growth vs the same quarter last year (like seasonal_by_year)
+    def _seasonal_by_year(self, monthly_revenue):
+        months = monthly_revenue.index.get_level_values(1)
+        quarterly = monthly_revenue.groupby([monthly_revenue.index.get_level_values(0),
+                                             months.year, months.quarter]).sum()
+        result = {}
+        for business, group in quarterly.groupby(level=0):
+            revenues = {(year, quarter): revenue for (_, year, quarter), revenue in group.items()}
+            result[business] = {}
+            for (year, quarter), revenue in revenues.items():
+                last_year = revenues.get((year - 1, quarter))
+                growth = round((revenue - last_year) / last_year * 100, 2) if last_year else None
+                result[business][f'{year}-Q{quarter}'] = {'revenue': round(revenue, 2), 'yoy_growth': growth}
+        return result
+
+    #----------------------------------VECTORIZED KPIS---------------------------------#
+
+    # Month-on-month growth (first vs last month) for every business
+    def _growth_rate(self, monthly_revenue):
+        grouped = monthly_revenue.groupby(level=0)
+        first, last, count = grouped.first(), grouped.last(), grouped.size()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            growth = ((last - first) / first) * 100
+        return growth.round(2).where(count >= 2, 0)
+
+    # Growth trajectory from the first and second half of the rounded monthly trend
+    def _growth_trajectory(self, monthly_revenue):
+        values = monthly_revenue.round(2)
+        grouped = values.groupby(level=0)
+        position = grouped.cumcount()
+        half = grouped.transform("size") // 2
+        first_half = position < half
+        with np.errstate(divide="ignore", invalid="ignore"):
+            first_avg = values[first_half].groupby(level=0).sum() / first_half.groupby(level=0).sum()
+            second_avg = values[~first_half].groupby(level=0).sum() / (~first_half).groupby(level=0).sum()
+        first_avg = first_avg.reindex(second_avg.index)
+        return pd.Series(np.select(
+            [second_avg > first_avg * 1.1, second_avg > first_avg, second_avg < first_avg * 0.9],
+            ["Strong Growth", "Moderate Growth", "Declining"],
+            default="Stable"), index=second_avg.index)
+
+    # Scalability score 0-100 for every business
+    def _scalability_score(self, growth, margin, exp_ratio):
+        score = np.select([growth > 20, growth > 10, growth > 0], [30, 20, 10], default=0)
+        score += np.select([margin > 20, margin > 10, margin > 0], [30, 20, 10], default=0)
+        score += np.select([exp_ratio < 70, exp_ratio < 85], [40, 25], default=10)
+        return np.minimum(score, 100)
+
+    # Risk score 0-100 for every business (lower is better)
+    def _risk_score(self, margin, burn, revenue, trajectory):
+        risk = 50 + np.select([margin < 0, margin < 10], [30, 15], default=-10)
+        risk += np.where(burn > revenue / 2, 20, 0)
+        risk += np.select([trajectory == "Declining", trajectory == "Strong Growth"], [20, -15], default=0)
+        return np.clip(risk, 0, 100)
+
+    # IPO readiness 0-100 for every business
+    def _ipo_readiness(self, margin, revenue, growth, trajectory):
+        profitable = margin > 0
+        score = np.where(profitable & (revenue > 10000000), 40, 0)
+        score += np.select([profitable & (revenue > 5000000), profitable], [25, 10], default=0)
+        score += np.select([growth > 50, growth > 25, growth > 10], [30, 20, 10], default=0)
+        score += np.select([trajectory == "Strong Growth", trajectory == "Moderate Growth"], [30, 15], default=0)
+        return np.minimum(score, 100)
+
+    # Shark Tank score 0-100 for every business
+    def _shark_tank_score(self, margin, growth, scalability, risk):
+        score = np.select([margin > 20, margin > 10, margin > 0], [25, 15, 5], default=0).astype(float)
+        score += np.select([growth > 30, growth > 15], [25, 15], default=0)
+        score += scalability * 0.3
+        score += np.where(risk < 40, 20, 0)
+        return np.minimum(np.trunc(score).astype(int), 100)
+
+    # Expansion recommendation (same rules and wording as KPICalculator)
+    def _expansion_recommendation(self, margin, growth, risk, trajectory):
+        recommendations = []
+        for m, g, r, t in zip(margin, growth, risk, trajectory):
+            if m <= 0:
+                recommendations.append({
+                    'recommendation': 'No',
+                    'reasons': ['Comapany is not profitable yet',
+                                'Focus on acheving profitability first']})
+                continue
+            reasons = []
+            if m > 15:
+                reasons.append(f'Healty profit margin of {m}%')
+            if g > 20:
+                reasons.append(f'Strong revenue growth of {g}%')
+            if r < 50:
+                reasons.append('Low risk profile')
+            if t in ['Strong Growth', 'Moderate Growth']:
+                reasons.append(f'{t} trajectory indicates market demand')
+            if len(reasons) >= 3:
+                recommendations.append({'recommendation': 'YES', 'reasons': reasons})
+            elif len(reasons) >= 1:
+                recommendations.append({'recommendation': 'MAYBE', 'reasons': reasons +
+                                        ['Monitor and work more for 2-3 more quarters for  expandation']})
+            else:
+                recommendations.append({'recommendation': 'NO', 'reasons': ['Improve and focus on the profitability and growth metrics first']})
+        return recommendations
+
+    #----------------------------------FINAL MASTER FUNCTION------------------------------#
+
+    # Get ALL KPIs for every business (one row per business, same keys as get_all_kpis)
+    def get_all_kpis(self):
+        dates = pd.to_datetime(self.df["Date"])
+        totals = self._totals()
+        months = self._months_covered(dates).reindex(totals.index)
+        monthly = self._monthly(dates)
+        quarterly = self._quarterly(dates)
+        products = self._products()
+
+        revenue = totals["Revenue"]
+        cog = totals["Costs_Of_Goods"]
+        total_cost = totals[COST_COLUMNS].sum(axis=1)
+        net_profit = revenue - total_cost
+        gross_profit = revenue - cog
+        operating_profit = gross_profit - totals["Operating_Expenses"]
+        units = totals["Units_sold"]
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            margin = ((net_profit / revenue) * 100).where(revenue != 0, 0)
+            exp_ratio = ((total_cost / revenue) * 100).round(2).where(revenue != 0, 0)
+            burn = (total_cost / months).round(2)
+            runway = (self.current_cash / burn).round(2).astype(object).where(burn > 0, "Infinite (No Expenses)")
+            cac = (totals["Marketing_Cost"] / units).round(2).where(units != 0, 0)
+            avg_booking = (revenue / units).round(2).where(units != 0, 0)
+            efficiency = ((operating_profit / revenue) * 100).round(2).where(revenue != 0, 0)
+
+        growth = self._growth_rate(monthly["Revenue"]).reindex(totals.index)
+        trajectory = self._growth_trajectory(monthly["Revenue"]).reindex(totals.index)
+        scalability = self._scalability_score(growth.values, margin.values, exp_ratio.values)
+        risk = self._risk_score(margin.values, burn.values, revenue.values, trajectory.values)
+
+        # Product analysis (first max / first min in order of appearance, like max()/min() on the dict)
+        profit_by_business = products["Profit"].groupby(level=0, sort=False)
+        best = products.loc[profit_by_business.idxmax().reindex(totals.index)].reset_index(level=1)
+        worst = products.loc[profit_by_business.idxmin().reindex(totals.index)].reset_index(level=1)
+
+        # Expense breakdown in percentage of total cost
+        with np.errstate(divide="ignore", invalid="ignore"):
+            shares = totals[COST_COLUMNS].div(total_cost, axis=0).mul(100).round(2)
+        breakdown = [{} if cost == 0 else row for cost, row in zip(total_cost, shares.to_dict(orient="records"))]
+        highest = [None if not row else dict(zip(('category', 'percentage'), max(row.items(), key=lambda x: x[1])))
+                   for row in breakdown]
+
+        # Trends
+        monthly_profit = monthly["Revenue"] - monthly[COST_COLUMNS].sum(axis=1)
+        monthly_revenue_dicts = {b: {str(m): round(v, 2) for (_, m), v in s.items()}
+                                 for b, s in monthly["Revenue"].groupby(level=0)}
+        monthly_profit_dicts = {b: {str(m): round(v, 2) for (_, m), v in s.items()}
+                                for b, s in monthly_profit.groupby(level=0)}
+        seasonal_dicts = {b: {f'Q{q}': round(v, 2) for (_, q), v in s.items()}
+                          for b, s in quarterly.groupby(level=0)}
+        seasonal_by_year_dicts = self._seasonal_by_year(monthly["Revenue"])
+        product_dicts = {b: {p: {'revenue': r, 'cost': c, 'profit': pr}
+                             for (_, p), r, c, pr in zip(group.index, group["Revenue"], group["Cost"], group["Profit"])}
+                         for b, group in products.groupby(level=0, sort=False)}
+
+        result = pd.DataFrame({
+            # Basic
+            'total_revenue': revenue,
+            'total_cost': total_cost,
+            'net_profit': net_profit,
+            'profit_margin': margin,
+            'gross_profit': gross_profit,
+
+            # Advanced Financial
+            'ebitda': gross_profit - totals[["Costs_Of_Goods", "Marketing_Cost", "Logistic_Cost"]].sum(axis=1),
+            'operating_profit': operating_profit,
+            'burn_rate': burn,
+            'runway_months': runway,
+            'break_even_point': total_cost.round(2),
+            'roi': ((net_profit / self.initial_investment) * 100).round(2),
+            'revenue_growth_rate': growth,
+            'expense_ratio': exp_ratio,
+
+            # Product Analysis
+            'product_wise_analysis': pd.Series(product_dicts),
+            'best_product': [{'product': p, 'profit': v} for p, v in zip(best["Product_Name"], best["Profit"])],
+            'worst_product': [{'product': p, 'profit': v} for p, v in zip(worst["Product_Name"], worst["Profit"])],
+
+            # Expense
+            'expense_breakdown': breakdown,
+            'highest_expense': highest,
+
+            # Trends
+            'monthly_revenue': pd.Series(monthly_revenue_dicts),
+            'monthly_profit': pd.Series(monthly_profit_dicts),
+            'growth_trajectory': trajectory,
+            'seasonal_analysis': pd.Series(seasonal_dicts),
+            'seasonal_by_year': pd.Series(seasonal_by_year_dicts),
+
+            # Investment
+            'scalability_score': scalability,
+            'risk_score': risk,
+            'ipo_readiness': self._ipo_readiness(margin.values, revenue.values, growth.values, trajectory.values),
+            'shark_tank_score': self._shark_tank_score(margin.values, growth.values, scalability, risk),
+            'expansion_recommendation': self._expansion_recommendation(margin.values, growth.values, risk, trajectory.values),
+
+            # Bonus
+            'customer_acquisition_cost': cac,
+            'avg_revenue_per_booking': avg_booking,
+            'operating_efficiency': efficiency,
+            'cash_flow_health': np.select(
+                [net_profit > burn * 2, net_profit > burn, net_profit > 0],
+                ["Excellent Flow", "Good", "Fair"], default="Poor - Negative Cash Flow"),
+            'market_position': np.select(
+                [(growth > 30) & (margin > 20), (growth > 15) & (margin > 10), (growth > 10) & (margin > 0)],
+                ["Market Leader", "Strong Compititor", "Growing Player"],
+                default="Struggling/Emerging means low position"),
+        }, index=totals.index)
+        return result
@@ -0,0 +1,186 @@
+#Mergeable quantile sketches for cross-business KPI benchmarking
+
+import math
+import numbers
+
+# KPI columns benchmarked per industry (True = higher is better)
+BENCHMARK_METRICS = {
+    "total_revenue": True,
+    "net_profit": True,
+    "profit_margin": True,
+    "ebitda": True,
+    "burn_rate": False,
+    "roi": True,
+    "revenue_growth_rate": True,
+    "scalability_score": True,
+    "risk_score": False,
+    "ipo_readiness": True,
+    "shark_tank_score": True,
+}
+
+class QuantileSketch:
+    """
+    DDSketch style quantile sketch (relative error buckets)
+
+    A value v > 0 falls in bucket ceil(log(v) / log(gamma)) with
+    gamma = (1 + a) / (1 - a), so any quantile is returned within a relative
+    error a. Negative values use a mirrored set of buckets and zeros a
+    counter. The number of buckets only grows with the log of the value
+    range (a few hundred for money columns), adding a value is O(1) and two
+    sketches merge by adding their bucket counts.
+    """
+
+    # Smallest magnitude kept apart from zero
+    MIN_VALUE = 1e-9
+
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.positive = {}
+        self.negative = {}
+        self.zero = 0
+        self.count = 0
+        self.min = None
+        self.max = None
+
+    def _key(self, magnitude):
+        return math.ceil(math.log(magnitude) / self.log_gamma)
+
+    # Middle of a bucket (relative error <= relative_accuracy for every value in it)
+    def _value(self, key):
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def add(self, value, weight=1):
+        value = float(value)
+        if math.isnan(value) or math.isinf(value):
+            return
+        if value > self.MIN_VALUE:
+            key = self._key(value)
+            self.positive[key] = self.positive.get(key, 0) + weight
+        elif value < -self.MIN_VALUE:
+            key = self._key(-value)
+            self.negative[key] = self.negative.get(key, 0) + weight
+        else:
+            self.zero += weight
+        self.count += weight
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other):
+        for key, count in other.positive.items():
+            self.positive[key] = self.positive.get(key, 0) + count
+        for key, count in other.negative.items():
+            self.negative[key] = self.negative.get(key, 0) + count
+        self.zero += other.zero
+        self.count += other.count
+        for bound in (other.min, other.max):
+            if bound is not None:
+                self.min = bound if self.min is None else min(self.min, bound)
+                self.max = bound if self.max is None else max(self.max, bound)
+        return self
+
+    # Buckets from the smallest to the largest value: (representative value, count)
+    def _buckets(self):
+        for key in sorted(self.negative, reverse=True):
+            yield -self._value(key), self.negative[key]
+        if self.zero:
+            yield 0.0, self.zero
+        for key in sorted(self.positive):
+            yield self._value(key), self.positive[key]
+
+    def quantile(self, q):
+        """Value below which a fraction q of the values lie (None when empty)"""
+        if self.count == 0:
+            return None
+        rank = q * (self.count - 1)
+        seen = 0
+        for value, count in self._buckets():
+            seen += count
+            if seen > rank:
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def percentile_rank(self, value):
+        """Percent (0-100) of the values below value, values in the same bucket count half"""
+        if self.count == 0:
+            return None
+        value = float(value)
+        if value > self.MIN_VALUE:
+            side, key = 1, self._key(value)
+        elif value < -self.MIN_VALUE:
+            side, key = -1, self._key(-value)
+        else:
+            side, key = 0, None
+
+        below = sum(self.negative.values()) if side >= 0 else 0
+        if side > 0:
+            below += self.zero
+            below += sum(c for k, c in self.positive.items() if k < key)
+            equal = self.positive.get(key, 0)
+        elif side < 0:
+            below += sum(c for k, c in self.negative.items() if k > key)
+            equal = self.negative.get(key, 0)
+        else:
+            equal = self.zero
+        return round(100.0 * (below + 0.5 * equal) / self.count, 2)
+
+    def to_dict(self):
+        return {
+            'relative_accuracy': self.relative_accuracy,
+            'positive': {str(k): c for k, c in self.positive.items()},
+            'negative': {str(k): c for k, c in self.negative.items()},
+            'zero': self.zero,
+            'count': self.count,
+            'min': self.min,
+            'max': self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data.get('relative_accuracy', 0.01))
+        sketch.positive = {int(k): c for k, c in data.get('positive', {}).items()}
+        sketch.negative = {int(k): c for k, c in data.get('negative', {}).items()}
+        sketch.zero = data.get('zero', 0)
+        sketch.count = data.get('count', 0)
+        sketch.min = data.get('min')
+        sketch.max = data.get('max')
+        return sketch
+
+
+# Number out of a KPI value (scores come back as plain numbers, anything else is skipped)
+def metric_value(kpis, metric):
+    value = kpis.get(metric)
+    if isinstance(value, bool) or not isinstance(value, numbers.Real):
+        return None
+    if math.isnan(value) or math.isinf(value):
+        return None
+    return float(value)
+
+def benchmark(sketches, kpis):
+    """
+    Percentile ranks of a business against the sketches of its industry
+
+    Args:
+        sketches (dict): metric -> QuantileSketch of the industry
+        kpis (dict): KPIs of the business
+
+    Returns:
+        dict: metric -> value, percentile, p25 / median / p75 of the peers, higher_is_better, peers
+    """
+    result = {}
+    for metric, higher_is_better in BENCHMARK_METRICS.items():
+        sketch = sketches.get(metric)
+        value = metric_value(kpis, metric)
+        if sketch is None or sketch.count == 0 or value is None:
+            continue
+        result[metric] = {
+            'value': value,
+            'percentile': sketch.percentile_rank(value),
+            'p25': sketch.quantile(0.25),
+            'median': sketch.quantile(0.5),
+            'p75': sketch.quantile(0.75),
+            'higher_is_better': higher_is_better,
+            'peers': sketch.count,
+        }
+    return result
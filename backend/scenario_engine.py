@@ -0,0 +1,122 @@
+#What-if scenarios for runway, ROI, burn rate, margin and break-even
+
+import numpy as np
+
+COST_COLUMNS = ["Costs_Of_Goods", "Marketing_Cost", "Logistic_Cost", "Other_Cost"]
+
+# Turn one request parameter into a 1-D array
+# (number -> [number], list -> array, {"start", "stop", "num"} -> np.linspace)
+def parameter_values(spec):
+    if isinstance(spec, dict):
+        return np.linspace(float(spec["start"]), float(spec["stop"]), int(spec.get("num", 10)))
+    return np.atleast_1d(np.asarray(spec, dtype=np.float64)).ravel()
+
+# Number of values of one request parameter, without building a linspace
+def parameter_size(spec):
+    if isinstance(spec, dict):
+        float(spec["start"]), float(spec["stop"])
+        num = int(spec.get("num", 10))
+        if num < 0:
+            raise ValueError(f"num must be non-negative, got {num}")
+        return num
+    if isinstance(spec, (int, float)):
+        return 1
+    return np.asarray(spec, dtype=np.float64).size
+
+
+class ScenarioEngine:
+    """
+    Broadcasted what-if engine on top of a KPICalculator
+
+    The dataset is reduced once to a handful of aggregates (total revenue, the
+    four cost categories and the months covered). Every scenario is then a few
+    array operations over those numbers, so thousands of combinations of cash,
+    investment, revenue growth and per-category cost multipliers cost one
+    vectorized pass. With growth 0 and multipliers 1 the results are the same
+    as calculate_burn_rate / calculate_runway / calculate_roi.
+    """
+
+    def __init__(self, calculator):
+        self.revenue = float(calculator.calculate_total_revenue())
+        self.costs = {col: float(calculator._column_sum(col)) for col in COST_COLUMNS}
+        days = calculator._date_span_days()
+        self.months = days / 30.44 if days > 0 else 1
+
+    # Combine parameters: grid=True -> every combination, grid=False -> element-wise (numpy broadcasting)
+    def _combine(self, parameters, grid):
+        names = list(parameters)
+        arrays = [parameter_values(parameters[name]) for name in names]
+        if grid:
+            arrays = np.meshgrid(*arrays, indexing="ij")
+        else:
+            arrays = np.broadcast_arrays(*arrays)
+        return {name: np.ravel(values) for name, values in zip(names, arrays)}
+
+    # Number of scenarios a request would produce (checked before allocating anything)
+    # Python ints, so huge grids cannot wrap around; stops as soon as the count goes over limit
+    @staticmethod
+    def count_scenarios(parameters, grid=True, limit=None):
+        count = 1
+        for name, spec in parameters.items():
+            size = parameter_size(spec)
+            if grid:
+                count *= size
+            elif size != 1:
+                if count not in (1, size):
+                    raise ValueError(f"{name} has {size} values, the other parameters have {count}")
+                count = size
+            if limit is not None and count > limit:
+                return count
+        return count
+
+    def evaluate(self, current_cash=50000, initial_investment=100000, revenue_growth=0,
+                 cost_multipliers=None, grid=True):
+        """
+        Evaluate every scenario in one broadcasted computation
+
+        Args:
+            current_cash: cash available (number, list or {"start", "stop", "num"})
+            initial_investment: money invested, used for ROI
+            revenue_growth (%): change applied to total revenue
+            cost_multipliers (dict): cost column -> multiplier(s), e.g. {"Marketing_Cost": [0.5, 1, 1.5]}
+            grid (bool): every combination (True) or element-wise pairing (False)
+
+        Returns:
+            dict: parameter arrays and result arrays, one value per scenario
+        """
+        cost_multipliers = cost_multipliers or {}
+        unknown = [col for col in cost_multipliers if col not in self.costs]
+        if unknown:
+            raise ValueError(f"Unknown cost columns: {unknown}")
+
+        parameters = {"current_cash": current_cash,
+                      "initial_investment": initial_investment,
+                      "revenue_growth": revenue_growth}
+        parameters.update({f"{col}_multiplier": value for col, value in cost_multipliers.items()})
+        values = self._combine(parameters, grid)
+
+        revenue = self.revenue * (1 + values["revenue_growth"] / 100)
+        total_cost = np.zeros_like(revenue)
+        for col, cost in self.costs.items():
+            total_cost = total_cost + cost * values.get(f"{col}_multiplier", 1.0)
+        net_profit = revenue - total_cost
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            profit_margin = np.where(revenue == 0, 0.0, (net_profit / revenue) * 100)
+            burn_rate = np.round(total_cost / self.months, 2)
+            runway = np.where(burn_rate <= 0, np.inf, np.round(values["current_cash"] / burn_rate, 2))
+            roi = np.round((net_profit / values["initial_investment"]) * 100, 2)
+
+        return {
+            "parameters": values,
+            "results": {
+                "total_revenue": revenue,
+                "total_cost": total_cost,
+                "net_profit": net_profit,
+                "profit_margin": profit_margin,
+                "burn_rate": burn_rate,
+                "runway_months": runway,
+                "roi": roi,
+                "break_even_point": np.round(total_cost, 2),
+            },
+        }
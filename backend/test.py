@@ -72,20 +72,20 @@ def test_backend():
     from feature_engineer import FeatureEngineer
     from ml_predictor import MLPredictor
 
-    engineer = FeatureEngineer(cleaned_df)
-    engineer.create_time_features()
-    engineer.create_lag_features(column='Revenue', lags=[1, 2, 3])
-    engineer.create_rolling_features(column='Revenue', windows=[3, 5])
-    engineer.create_growth_rate(column='Revenue')
-    engineer.drop_missing_rows()
+    # direct model: one target column per future period, features of the first period after the data
+    recipe = {'time_features': True, 'features': {'columns': ['Revenue'], 'lags': [1, 2, 3]}, 'drop_missing': True}
+    series_df = cleaned_df[['Date', 'Revenue']]
+    engineer = FeatureEngineer(series_df).apply_spec(recipe)
 
-    X, y = engineer.prepare_ml_data(target_column='Revenue')
+    X, _ = engineer.prepare_ml_data(target_column='Revenue')
+    Y = engineer.prepare_horizon_targets(series_df, 6, target_column='Revenue')
+    known = ~np.isnan(Y).any(axis=1)
 
     predictor = MLPredictor()
-    metrics = predictor.train_models(X, y, test_size=0.2)
+    metrics = predictor.train_models(X[known], Y[known], test_size=0.2)
     predictor.save_model('../models/sales_predictor.pkl')
 
-    last_features = X.iloc[-1].values
+    last_features = FeatureEngineer(series_df).forecast_origin(recipe, predictor.feature_names)
     predictions = predictor.predict_next_periods(last_features, num_periods=6)
 
     result['ml_predictions'] = {
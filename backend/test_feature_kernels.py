@@ -0,0 +1,93 @@
+#feature_kernels against pandas rolling / groupby and the column by column FeatureEngineer methods
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+from feature_engineer import FeatureEngineer
+from feature_kernels import build_feature_matrix, build_panel_matrix
+
+ROLLING_SPEC = {'columns': ['x'], 'windows': [1, 2, 3, 7], 'stats': ['mean', 'sum', 'std', 'var', 'min', 'max']}
+
+def values_with_runs(seed=0, rows=20000):
+    rng = np.random.default_rng(seed)
+    # large and small values mixed, constant runs of both, a few NaN
+    values = np.where(rng.random(rows) < 0.5, 1e6, rng.lognormal(3, 1, rows)).round(3)
+    values[100:120] = 1e6
+    values[500:510] = 7.25
+    values[rng.integers(0, rows, 20)] = np.nan
+    return values
+
+def exact_var(values, window):
+    var = np.full(values.size, np.nan)
+    var[window - 1:] = np.var(sliding_window_view(values, window), axis=1, ddof=1)
+    return var
+
+def test_rolling_matches_pandas():
+    values = values_with_runs()
+    matrix, names = build_feature_matrix({'x': values}, ROLLING_SPEC)
+    rolling = {w: pd.Series(values).rolling(w) for w in ROLLING_SPEC['windows']}
+    scale = np.nanmax(np.abs(values))
+    for j, name in enumerate(names):
+        _, stat, window = name.split('_')
+        window = int(window)
+        expected = {'MA': rolling[window].mean, 'SUM': rolling[window].sum, 'MIN': rolling[window].min,
+                    'MAX': rolling[window].max, 'STD': rolling[window].std, 'VAR': rolling[window].var}[stat]()
+        assert np.array_equal(np.isnan(matrix[:, j]), expected.isna().to_numpy()), name
+        if stat in ('MA', 'SUM', 'MIN', 'MAX'):
+            np.testing.assert_allclose(matrix[:, j], expected, rtol=0, atol=1e-12 * scale * window, err_msg=name)
+
+def test_rolling_variance_is_exact_and_zero_on_constant_windows():
+    values = values_with_runs(seed=1)
+    matrix, names = build_feature_matrix({'x': values}, ROLLING_SPEC)
+    for window in (2, 3, 7):
+        var = matrix[:, names.index(f'x_VAR_{window}')]
+        std = matrix[:, names.index(f'x_STD_{window}')]
+        expected = exact_var(values, window)
+        constant = expected == 0
+        assert constant.any()
+        assert (var[constant] == 0).all() and (std[constant] == 0).all()
+        np.testing.assert_allclose(var, expected, rtol=1e-12, atol=0)
+        np.testing.assert_allclose(std, np.sqrt(expected), rtol=1e-12, atol=0)
+
+def test_panel_matrix_with_a_dominant_last_group():
+    # 1500 small groups + one last group holding most of the rows: the chunk targets fall inside it
+    rng = np.random.default_rng(2)
+    codes = np.concatenate([np.repeat(np.arange(1500), 2), np.full(20000, 1500)])
+    values = rng.normal(100, 10, codes.size)
+    shuffle = rng.permutation(codes.size)
+    codes, values = codes[shuffle], values[shuffle]
+    spec = {'columns': ['x'], 'lags': [1], 'windows': [2], 'stats': ['mean', 'std']}
+
+    serial, names = build_panel_matrix({'x': values}, spec, codes)
+    parallel, _ = build_panel_matrix({'x': values}, spec, codes, workers=4)
+    np.testing.assert_array_equal(parallel, serial)
+
+    grouped = pd.Series(values).groupby(codes)
+    previous = grouped.shift(1)
+    expected = {'x_Lag_1': previous, 'x_MA_2': grouped.rolling(2).mean().droplevel(0).sort_index(),
+                'x_STD_2': (pd.Series(values) - previous).abs() / np.sqrt(2)}    # exact std of two values
+    for j, name in enumerate(names):
+        np.testing.assert_allclose(serial[:, j], expected[name].to_numpy(), rtol=1e-12, err_msg=name)
+
+def test_kernels_match_create_lag_and_rolling_features():
+    # revenue like values (pandas rolling std drifts on the 1e6 / small mix of values_with_runs)
+    rng = np.random.default_rng(3)
+    values = rng.lognormal(10, 1, 5000)
+    values[rng.integers(0, 5000, 10)] = np.nan
+    engineer = FeatureEngineer(pd.DataFrame({'x': values}))
+    engineer.create_lag_features('x', lags=[1, 2, 3])
+    engineer.create_rolling_features('x', windows=[3, 5, 12])
+    legacy = engineer.get_features_dataframe()
+
+    spec = {'columns': ['x'], 'lags': [1, 2, 3], 'windows': [3, 5, 12], 'stats': ['mean', 'std']}
+    matrix, names = build_feature_matrix({'x': values}, spec)
+    assert sorted(names) == sorted(legacy.columns.drop('x'))
+    scale = np.nanmax(np.abs(values))
+    for j, name in enumerate(names):
+        expected = legacy[name].to_numpy()
+        assert np.array_equal(np.isnan(matrix[:, j]), np.isnan(expected)), name
+        if '_Lag_' in name:
+            np.testing.assert_array_equal(matrix[:, j], expected, err_msg=name)
+        else:
+            # prefix sum means vs pandas running sums, exact std vs the pandas online update: to the data scale
+            np.testing.assert_allclose(matrix[:, j], expected, rtol=0, atol=1e-10 * scale, err_msg=name)
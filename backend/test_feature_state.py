@@ -0,0 +1,52 @@
+#Streamed features (FeatureState) against the batch FeatureEngineer methods
+
+import numpy as np
+import pandas as pd
+from feature_engineer import FeatureEngineer
+
+SPEC = {'columns': ['Revenue'], 'lags': [1, 2], 'windows': [2, 3, 7], 'stats': ['mean', 'std', 'var'],
+        'growth': True, 'cumulative': True}
+
+def test_stream_matches_batch_on_uneven_chunks():
+    rng = np.random.default_rng(3)
+    frame = pd.DataFrame({'Date': pd.date_range('2000-01-01', periods=3000, freq='D'),
+                          'Revenue': rng.lognormal(10, 1, 3000)})
+    frame.loc[[10, 11, 1200], 'Revenue'] = np.nan
+    batch = FeatureEngineer(frame.copy()).create_features_from_spec(SPEC).get_features_dataframe()
+
+    cuts = [0, 1, 7, 300, 301, 1500, 2999, 3000]
+    chunks = (frame.iloc[a:b].copy() for a, b in zip(cuts[:-1], cuts[1:]))
+    streamed = pd.concat(list(FeatureEngineer.stream_features(chunks, SPEC, time_features=False)))
+
+    assert list(streamed.columns) == list(batch.columns)
+    for column in batch.columns.drop('Date'):
+        # rolling means come from prefix sums that restart at other rows: equal to ~1e-14, the rest exactly
+        np.testing.assert_allclose(streamed[column].to_numpy(float), batch[column].to_numpy(float),
+                                   rtol=1e-12, atol=0, err_msg=column)
+
+def test_stream_matches_the_column_by_column_methods():
+    rng = np.random.default_rng(4)
+    frame = pd.DataFrame({'Date': pd.date_range('2000-01-01', periods=2000, freq='D'),
+                          'Revenue': rng.lognormal(10, 1, 2000)})
+    frame.loc[[0, 5, 6, 999], 'Revenue'] = np.nan
+    engineer = FeatureEngineer(frame.copy())
+    engineer.create_lag_features('Revenue', lags=[1, 2])
+    engineer.create_rolling_features('Revenue', windows=[2, 3, 7])
+    engineer.create_growth_rate('Revenue')
+    engineer.create_cumulative_features('Revenue')
+    batch = engineer.get_features_dataframe()
+
+    spec = {'columns': ['Revenue'], 'lags': [1, 2], 'windows': [2, 3, 7], 'stats': ['mean', 'std'],
+            'growth': True, 'cumulative': True}
+    cuts = [0, 3, 4, 500, 1000, 1999, 2000]
+    chunks = (frame.iloc[a:b].copy() for a, b in zip(cuts[:-1], cuts[1:]))
+    streamed = pd.concat(list(FeatureEngineer.stream_features(chunks, spec, time_features=False)))
+
+    assert sorted(streamed.columns) == sorted(batch.columns)
+    scale = frame['Revenue'].abs().max()
+    for column in batch.columns.drop('Date'):
+        # pandas rolling std is an online update that loses digits on windows of close values:
+        # compared to the size of the data there, the other features to float rounding
+        atol = 1e-10 * scale if '_STD_' in column else 0
+        np.testing.assert_allclose(streamed[column].to_numpy(float), batch[column].to_numpy(float),
+                                   rtol=1e-12, atol=atol, err_msg=column)
@@ -0,0 +1,98 @@
+#KPI backends (NumPy kernels, parallel executor, date range index) against the pandas KPICalculator
+
+import numpy as np
+import pandas as pd
+import kpi_executor
+from data_cleaner import DataCleaner
+from data_loader import Dataloader
+from kpi_aggregates import AggregateKPICalculator
+from kpi_calculator import KPICalculator
+from kpi_executor import ParallelKPIExecutor
+from kpi_kernels import KPIArrays, NumpyKPICalculator
+from time_index import TimeRangeIndex
+
+def assert_same_kpis(actual, expected, path="kpis"):
+    # same keys in the same order, same value types (int sums stay int), floats equal to rounding
+    assert type(actual) is type(expected), (path, type(actual), type(expected))
+    if isinstance(expected, dict):
+        assert list(actual) == list(expected), path
+        for key in expected:
+            assert_same_kpis(actual[key], expected[key], f"{path}.{key}")
+    elif isinstance(expected, (float, np.floating)):
+        assert np.isclose(actual, expected, rtol=1e-9), (path, actual, expected)
+    else:
+        assert actual == expected, (path, actual, expected)
+
+def business_frame(rows=400, seed=0):
+    # two years of rows, integer money columns and float ones (cents), products in random order
+    rng = np.random.default_rng(seed)
+    units = rng.integers(1, 20, rows)
+    price = rng.integers(100, 5000, rows)
+    frame = pd.DataFrame({
+        'Date': (pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 700, rows), unit='D')).strftime('%Y-%m-%d'),
+        'Product_Name': rng.choice(['product1', 'product2', 'product3', 'product4', 'product5'], rows),
+        'Units_sold': units, 'Price': price, 'Revenue': units * price,
+        'Costs_Of_Goods': rng.integers(10, 2000, rows),
+        'Marketing_Cost': rng.uniform(10, 2000, rows).round(2),
+        'Logistic_Cost': rng.integers(10, 500, rows),
+        'Other_Cost': rng.uniform(0, 300, rows).round(2),
+        'Operating_Expenses': rng.integers(100, 3000, rows),
+    })
+    return frame
+
+def test_numpy_backend_matches_pandas_with_int_and_float_columns():
+    cleaned = DataCleaner(business_frame()).clean_all()
+    assert pd.api.types.is_integer_dtype(cleaned['Revenue']) and pd.api.types.is_float_dtype(cleaned['Marketing_Cost'])
+    assert_same_kpis(NumpyKPICalculator(cleaned).get_all_kpis(), KPICalculator(cleaned).get_all_kpis())
+
+def test_numpy_backend_on_selected_rows_matches_pandas_on_the_subset():
+    cleaned = DataCleaner(business_frame(seed=1)).clean_all()
+    rows = np.flatnonzero(cleaned['Product_Name'].isin(['product2', 'product4']).to_numpy())
+    subset = NumpyKPICalculator(None, arrays=KPIArrays(cleaned).take(rows))
+    assert_same_kpis(subset.get_all_kpis(), KPICalculator(cleaned.iloc[rows].copy()).get_all_kpis())
+
+def test_parallel_file_executor_with_missing_values_and_duplicates_across_partitions(tmp_path, monkeypatch):
+    path = str(tmp_path / "business.csv")
+    frame = business_frame(rows=600, seed=2)
+    # a duplicate of a row of the first partition at the end, missing values in three other partitions
+    frame = pd.concat([frame, frame.iloc[[3]]], ignore_index=True)
+    frame['Revenue'] = frame['Revenue'].astype(float)
+    frame.loc[10, 'Revenue'] = np.nan
+    frame.loc[300, 'Marketing_Cost'] = np.nan
+    frame.loc[500, 'Product_Name'] = np.nan
+    frame.to_csv(path, index=False)
+    loader = Dataloader(path)
+    loader.load_csv()
+    expected = KPICalculator(DataCleaner(loader.get_dataframe()).clean_all()).get_all_kpis()
+
+    monkeypatch.setattr(kpi_executor, "MIN_PARTITION_BYTES", 1)
+    for workers in (1, 2):
+        executor = ParallelKPIExecutor(workers=workers, partitions=4)
+        assert len(executor._byte_ranges(path)) == 4
+        assert_same_kpis(AggregateKPICalculator(executor.aggregate_file(path)).get_all_kpis(), expected)
+
+def test_parallel_dataframe_executor_matches_pandas():
+    cleaned = DataCleaner(business_frame(seed=3)).clean_all()
+    expected = KPICalculator(cleaned).get_all_kpis()
+    for partition_by in ("rows", "date"):
+        aggregates = ParallelKPIExecutor(workers=1, partitions=5).aggregate_dataframe(cleaned, partition_by)
+        assert_same_kpis(AggregateKPICalculator(aggregates).get_all_kpis(), expected)
+
+def test_date_range_calculator_matches_pandas_on_the_sliced_rows():
+    frame = business_frame(seed=4)
+    frame.loc[7, 'Date'] = 'not a date'          # never inside a range
+    cleaned = DataCleaner(frame).clean_all()
+    index = TimeRangeIndex(cleaned)
+    # inside the data, on its first / last day, open ended and across the year boundary
+    for start, end in [('2020-03-15', '2020-09-30'), (None, '2020-12-31'), ('2021-01-01', None),
+                       ('2020-11-20', '2021-02-10'), (cleaned['Date'].min(), cleaned['Date'].max())]:
+        mask = pd.Series(True, index=cleaned.index)
+        if start is not None:
+            mask &= cleaned['Date'] >= pd.Timestamp(start)
+        if end is not None:
+            mask &= cleaned['Date'] <= pd.Timestamp(end)
+        # rows in file order: the range calculator reads date sorted rows but keeps the product order
+        sliced = cleaned[mask].copy()
+        calculator = index.calculator(start, end)
+        assert calculator.row_count() == len(sliced)
+        assert_same_kpis(calculator.get_all_kpis(), KPICalculator(sliced).get_all_kpis(), f"kpis[{start}:{end}]")
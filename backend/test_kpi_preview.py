@@ -0,0 +1,48 @@
+#KPIPreview final (exact) record against the pandas pipeline
+
+import numpy as np
+import pandas as pd
+from data_cleaner import DataCleaner
+from data_loader import Dataloader
+from kpi_calculator import KPICalculator
+from kpi_preview import KPIPreview
+
+def assert_same_kpis(actual, expected, path="kpis"):
+    if isinstance(expected, dict):
+        assert list(actual) == list(expected), path
+        for key in expected:
+            assert_same_kpis(actual[key], expected[key], f"{path}.{key}")
+    elif isinstance(expected, (float, np.floating)) and not isinstance(expected, bool):
+        assert np.isclose(actual, expected, rtol=1e-9), (path, actual, expected)
+    else:
+        assert actual == expected, (path, actual, expected)
+
+def make_csv(path, rows=300, seed=0):
+    rng = np.random.default_rng(seed)
+    units = rng.integers(1, 20, rows)
+    price = rng.integers(100, 5000, rows)
+    frame = pd.DataFrame({
+        'Date': (pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 500, rows), unit='D')).strftime('%Y-%m-%d'),
+        'Product_Name': rng.choice(['product1', 'product2', 'product3', 'product4'], rows),
+        'Units_sold': units, 'Price': price, 'Revenue': units * price,
+    })
+    for column in ['Costs_Of_Goods', 'Marketing_Cost', 'Logistic_Cost', 'Other_Cost', 'Operating_Expenses']:
+        frame[column] = rng.integers(10, 2000, rows)
+    # a duplicate of an early row at the end (another block) and missing values in a few blocks
+    frame = pd.concat([frame, frame.iloc[[5]]], ignore_index=True)
+    frame.loc[20, 'Revenue'] = np.nan
+    frame.loc[150, 'Marketing_Cost'] = np.nan
+    frame.loc[200, 'Product_Name'] = np.nan
+    frame.to_csv(path, index=False)
+
+def test_final_preview_record_equals_the_cleaned_pipeline(tmp_path):
+    path = str(tmp_path / "business.csv")
+    make_csv(path)
+    loader = Dataloader(path)
+    loader.load_csv()
+    expected = KPICalculator(DataCleaner(loader.get_dataframe()).clean_all()).get_all_kpis()
+
+    records = list(KPIPreview(path, sample_size=50, chunk_bytes=2000).progressive())
+    assert len(records) > 3                      # the NaN rows and the duplicate are in different blocks
+    assert records[-1]['exact'] and not any(record['exact'] for record in records[:-1])
+    assert_same_kpis(records[-1]['kpis'], expected)
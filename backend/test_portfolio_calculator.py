@@ -0,0 +1,37 @@
+#Parity of PortfolioKPICalculator with the per-business KPICalculator
+
+import numpy as np
+import pandas as pd
+from kpi_calculator import KPICalculator
+from portfolio_calculator import PortfolioKPICalculator
+
+def make_business(seed, rows=120):
+    rng = np.random.default_rng(seed)
+    units = rng.integers(1, 20, rows)
+    price = rng.integers(100, 5000, rows)
+    frame = pd.DataFrame({
+        'Date': pd.Timestamp('2020-01-01') + pd.to_timedelta(np.sort(rng.integers(0, 700, rows)), unit='D'),
+        'Product_Name': rng.choice(['product1', 'product2', 'product3'], rows),
+        'Units_sold': units,
+        'Price': price,
+        'Revenue': units * price,
+    })
+    for column in ['Costs_Of_Goods', 'Marketing_Cost', 'Logistic_Cost', 'Other_Cost', 'Operating_Expenses']:
+        frame[column] = (frame['Revenue'] * rng.uniform(0.01, 0.2, rows)).round()
+    return frame
+
+def portfolio():
+    return pd.concat([make_business(seed).assign(Business_ID=seed) for seed in (1, 2, 3)], ignore_index=True)
+
+def test_portfolio_has_every_get_all_kpis_key():
+    result = PortfolioKPICalculator(portfolio()).get_all_kpis()
+    single = KPICalculator(make_business(1)).get_all_kpis()
+    assert list(result.columns) == list(single)
+
+def test_portfolio_matches_per_business_kpis():
+    result = PortfolioKPICalculator(portfolio()).get_all_kpis()
+    for business in (1, 2, 3):
+        single = KPICalculator(make_business(business)).get_all_kpis()
+        for name in ['total_revenue', 'net_profit', 'revenue_growth_rate', 'growth_trajectory',
+                     'seasonal_analysis', 'seasonal_by_year', 'risk_score', 'shark_tank_score']:
+            assert result.loc[business, name] == single[name], name
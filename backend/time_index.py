@@ -0,0 +1,109 @@
+#Date-sorted prefix-sum index for date-range KPI queries
+
+import pandas as pd
+import numpy as np
+from kpi_calculator import KPICalculator
+
+# Columns that get a running total (revenue, every cost column and units)
+PREFIX_COLUMNS = ["Revenue", "Costs_Of_Goods", "Marketing_Cost", "Logistic_Cost",
+                  "Other_Cost", "Operating_Expenses", "Units_sold"]
+
+class TimeRangeIndex:
+    """
+    Rows sorted by Date plus a cumulative sum for every money column
+
+    The total of a column between two dates is prefix[hi] - prefix[lo], where
+    lo and hi come from two binary searches on the sorted day numbers, so a
+    range total costs O(log n) instead of a filter over the whole frame.
+    """
+
+    def __init__(self, dataframe):
+        dates = pd.to_datetime(dataframe["Date"])
+        valid = dates.notna().to_numpy()
+        order = np.argsort(dates.to_numpy()[valid], kind="stable")
+
+        # Sorted copy of the data (rows without a date can never fall in a range)
+        self.df = dataframe[valid].iloc[order].reset_index(drop=True)
+        # position of every sorted row in the original data (order of first appearance of the products)
+        self.positions = np.flatnonzero(valid)[order]
+        self.df["Date"] = dates.to_numpy()[valid][order]
+        self.days = self.df["Date"].to_numpy().astype("datetime64[D]").astype(np.int64)
+
+        # prefix[col][i] = sum of the first i rows, prefix[col][0] = 0
+        self.prefix = {}
+        for col in PREFIX_COLUMNS:
+            if col in self.df.columns:
+                values = self.df[col].to_numpy()
+                self.prefix[col] = np.concatenate([np.zeros(1, dtype=values.dtype), np.cumsum(values)])
+
+    # Day number of a date (None means open ended)
+    @staticmethod
+    def _to_day(value):
+        return np.datetime64(pd.Timestamp(value), "D").astype(np.int64)
+
+    # Row positions [lo, hi) of the rows between start and end (both inclusive)
+    def locate(self, start=None, end=None):
+        lo = 0 if start is None else int(np.searchsorted(self.days, self._to_day(start), side="left"))
+        hi = len(self.days) if end is None else int(np.searchsorted(self.days, self._to_day(end), side="right"))
+        return lo, max(lo, hi)
+
+    # Total of one column over the rows [lo, hi)
+    def range_sum(self, column, lo, hi):
+        return self.prefix[column][hi] - self.prefix[column][lo]
+
+    # Totals of every indexed column between two dates
+    def range_totals(self, start=None, end=None):
+        lo, hi = self.locate(start, end)
+        return {col: self.range_sum(col, lo, hi) for col in self.prefix}
+
+    # KPI calculator limited to a date range
+    def calculator(self, start=None, end=None):
+        return RangeKPICalculator(self, start, end)
+
+
+class RangeKPICalculator(KPICalculator):
+    """
+    KPICalculator over the rows of a TimeRangeIndex between two dates
+
+    Totals and everything derived from them (margin, expense ratio, burn rate,
+    runway, ROI, scores that only use those) are read from the prefix sums.
+    The sorted rows of the range are only sliced out when a KPI needs them
+    (monthly trends, product analysis).
+    """
+
+    def __init__(self, index, start=None, end=None):
+        self.index = index
+        self.lo, self.hi = index.locate(start, end)
+        self._rows = None
+        super().__init__(None)
+
+    # Rows of the range, materialized on first use
+    @property
+    def df(self):
+        if self._rows is None:
+            self._rows = self.index.df.iloc[self.lo:self.hi].copy()
+        return self._rows
+
+    @df.setter
+    def df(self, dataframe):
+        self._rows = dataframe
+
+    # Number of rows inside the range
+    def row_count(self):
+        return self.hi - self.lo
+
+    def _column_sum(self, column):
+        if column in self.index.prefix:
+            return self.index.range_sum(column, self.lo, self.hi)
+        return super()._column_sum(column)
+
+    def _date_span_days(self):
+        if self.hi <= self.lo:
+            return 0
+        return int(self.index.days[self.hi - 1] - self.index.days[self.lo])
+
+    # Products in order of first appearance in the original rows (like the same rows of the unsorted data)
+    def _product_sums(self, columns):
+        sums = super()._product_sums(columns)
+        first = pd.Series(self.index.positions[self.lo:self.hi]).groupby(self.df["Product_Name"].to_numpy()).min()
+        return sums.iloc[np.argsort(first.reindex(sums.index).to_numpy(), kind="stable")]